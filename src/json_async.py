@@ -0,0 +1,46 @@
+"""Parses JSON read from asyncio streams without blocking the event loop."""
+
+import asyncio
+
+from json_tokenizer import PushParser
+
+DEFAULT_READ_SIZE = 1 << 16
+
+
+async def aiter_values(reader, read_size=DEFAULT_READ_SIZE, **options):
+    """Yields each top-level value read from reader as soon as it is complete.
+
+    reader is an asyncio.StreamReader, or anything with a coroutine
+    read(n) that returns str or bytes and an empty chunk at the end.  At
+    most read_size bytes are read and parsed at a time, and control goes
+    back to the event loop after each, so a large document already in the
+    reader's buffer does not hold up other tasks.  Besides those bytes
+    only the unfinished value is kept.  options are passed on to
+    PushParser.
+    """
+    async for values in _parse(reader, read_size, PushParser(**options)):
+        for value in values:
+            yield value
+
+
+async def aiter_events(reader, read_size=DEFAULT_READ_SIZE, **options):
+    """Yields the (prefix, event, value) triples of Tokenizer.events.
+
+    Reads as aiter_values does, but only the open containers are kept, so
+    a single top-level value may be of any size.
+    """
+    async for events in _parse(reader, read_size, PushParser(events=True, **options)):
+        for event in events:
+            yield event
+
+
+async def _parse(reader, read_size, parser):
+    """Yields what parser returns for each chunk of reader, then at the end."""
+    while True:
+        chunk = await reader.read(read_size)
+        if not chunk:
+            break
+        yield parser.feed(chunk)
+        # read returns at once while the reader has data buffered.
+        await asyncio.sleep(0)
+    yield parser.close()
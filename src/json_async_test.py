@@ -0,0 +1,66 @@
+"""Unit tests for parsing JSON from asyncio streams."""
+
+import asyncio
+import unittest
+from json_async import aiter_events, aiter_values
+from json_tokenizer import Tokenizer
+
+
+def stream_reader(*chunks):
+    """Returns a StreamReader that holds chunks and then the end of the stream."""
+    reader = asyncio.StreamReader()
+    for chunk in chunks:
+        reader.feed_data(chunk)
+    reader.feed_eof()
+    return reader
+
+
+class TestAsyncParsing(unittest.IsolatedAsyncioTestCase):
+
+    async def test_values(self):
+        reader = stream_reader(b'{"a": [1, "\xc3\xa9"]} 2', b'3 [true', b', null]')
+        values = [value async for value in aiter_values(reader, read_size=3)]
+        self.assertEqual(values, [{'a': [1, 'é']}, 23, [True, None]])
+
+    async def test_values_as_they_arrive(self):
+        reader = asyncio.StreamReader()
+        values = aiter_values(reader)
+        reader.feed_data(b'[1, 2] {"b"')
+        self.assertEqual(await anext(values), [1, 2])
+        reader.feed_data(b': 3}')
+        reader.feed_eof()
+        self.assertEqual(await anext(values), {'b': 3})
+        with self.assertRaises(StopAsyncIteration):
+            await anext(values)
+
+    async def test_events(self):
+        document = '{"items": [{"price": 1.5}, {"x": {}}], "ok": false}'
+        reader = stream_reader(document.encode())
+        events = [event async for event in aiter_events(reader, read_size=4)]
+        self.assertEqual(events, list(Tokenizer(document, engine='regex').events()))
+
+    async def test_yields_to_other_tasks(self):
+        reader = stream_reader(('[' + ', '.join(['1'] * 10000) + ']').encode())
+        ticks = 0
+
+        async def tick():
+            nonlocal ticks
+            while True:
+                ticks += 1
+                await asyncio.sleep(0)
+
+        ticker = asyncio.create_task(tick())
+        await asyncio.sleep(0)
+        ticks = 0
+        values = [value async for value in aiter_values(reader, read_size=1000)]
+        ticker.cancel()
+        self.assertEqual(len(values[0]), 10000)
+        self.assertGreater(ticks, 10)
+
+    async def test_rejects_incomplete_input(self):
+        with self.assertRaises(RuntimeError):
+            [value async for value in aiter_values(stream_reader(b'[1, 2'))]
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,351 @@
+"""Benchmarks for the json tokenizer.
+
+Run as a script it measures each parser on each corpus and prints the
+results as JSON, so that runs on different commits can be compared:
+
+    python json_benchmark.py --scale 1 --output results.json
+"""
+
+import argparse
+import asyncio
+import base64
+from collections import deque
+import io
+import json
+import platform
+import random
+import time
+import tracemalloc
+
+from json_async import aiter_values
+from json_tokenizer import TokenType, Tokenizer
+from json_writer import dump
+
+
+def records_document(n, seed=0) -> str:
+    """Returns a JSON array of n small records with strings and numbers."""
+    rng = random.Random(seed)
+    return json.dumps([
+        {
+            "id": i,
+            "name": f"user{i}",
+            "score": round(rng.random() * 100, 3),
+            "tags": ["a", "bb", "ccc"],
+            "active": rng.random() < 0.5,
+            "note": None,
+        }
+        for i in range(n)
+    ], indent=1)
+
+
+def coordinates_document(n, seed=0) -> str:
+    """Returns a JSON array of n lines of 50 [longitude, latitude] pairs."""
+    rng = random.Random(seed)
+    return json.dumps([
+        [[round(rng.uniform(-180, 180), 6), round(rng.uniform(-90, 90), 6)]
+         for _ in range(50)]
+        for _ in range(n)
+    ])
+
+
+def twitter_document(n, seed=0) -> str:
+    """Returns a twitter-like search result of n nested status records."""
+    rng = random.Random(seed)
+    words = ['json', 'parser', 'fast', 'stream', 'token', 'café', '東京', 'emoji 😀', 'a\tb', 'quote"d']
+
+    def user(i):
+        return {
+            "id": rng.randrange(1 << 40),
+            "screen_name": f"user_{i}",
+            "name": " ".join(rng.choices(words, k=2)),
+            "followers_count": rng.randrange(100000),
+            "verified": rng.random() < 0.1,
+            "profile": {"lang": rng.choice(["en", "ja", "fr"]), "url": None},
+        }
+
+    return json.dumps({
+        "statuses": [
+            {
+                "id": rng.randrange(1 << 62),
+                "created_at": f"2024-01-{i % 28 + 1:02d}T12:00:00Z",
+                "text": " ".join(rng.choices(words, k=12)),
+                "user": user(i),
+                "entities": {
+                    "hashtags": [{"text": rng.choice(words), "indices": [j, j + 5]}
+                                 for j in range(rng.randrange(4))],
+                    "urls": [],
+                },
+                "retweet_count": rng.randrange(1000),
+                "favorited": False,
+                "coordinates": None,
+            }
+            for i in range(n)
+        ],
+        "search_metadata": {"count": n, "completed_in": 0.087},
+    }, ensure_ascii=False)
+
+
+def base64_document(n, size=10000, seed=0) -> str:
+    """Returns an array of n records carrying size-byte base64 payloads."""
+    rng = random.Random(seed)
+    return json.dumps([
+        {"name": f"blob{i}.bin", "data": base64.b64encode(rng.randbytes(size)).decode()}
+        for i in range(n)
+    ])
+
+
+def nested_document(depth) -> str:
+    """Returns objects and arrays nested alternately depth levels deep."""
+    document = '0'
+    for level in range(depth):
+        if level % 2:
+            document = '[' + document + ', 1, 2]'
+        else:
+            document = '{"k": ' + document + ', "v": [1, 2.5, "x"]}'
+    return document
+
+
+def tiny_messages(n, seed=0) -> list:
+    """Returns n separate documents of a few tokens each."""
+    rng = random.Random(seed)
+    return [json.dumps({"op": rng.choice(["ping", "ack", "put"]), "seq": i, "ok": True})
+            for i in range(n)]
+
+
+def corpora(scale=1) -> dict:
+    """Returns the deterministic benchmark corpora as lists of documents.
+
+    scale multiplies the amount of data in each corpus.
+    """
+    return {
+        'twitter': [twitter_document(200 * scale)],
+        'canada': [coordinates_document(300 * scale)],
+        'base64': [base64_document(20 * scale)],
+        'nested': [nested_document(500)] * (20 * scale),
+        'tiny': tiny_messages(5000 * scale),
+    }
+
+
+def _drain_tokens(document):
+    t = Tokenizer(document, engine='regex')
+    get = t.get
+    END = TokenType.END
+    while get()[0] is not END:
+        pass
+
+
+def _match_value(document):
+    return Tokenizer(document, engine='regex').match_value()
+
+
+def _match_numeric_arrays(document):
+    return Tokenizer(document, engine='regex', numeric_arrays='array').match_value()
+
+
+def _match_string_runs(document):
+    return Tokenizer(document, engine='regex', string_runs=True).match_value()
+
+
+parsers = {
+    'get': _drain_tokens,
+    'match_value': _match_value,
+    'numeric_arrays': _match_numeric_arrays,
+    'string_runs': _match_string_runs,
+    'json.loads': json.loads,
+}
+
+
+def count_tokens(document) -> int:
+    """Returns the number of tokens the regex engine makes of document."""
+    return sum(1 for _ in Tokenizer(document, engine='regex').token_stream)
+
+
+def percentile(sorted_values, fraction):
+    """Returns the value fraction of the way through sorted_values."""
+    return sorted_values[min(len(sorted_values) - 1, int(fraction * len(sorted_values)))]
+
+
+def measure(parse, documents, size, tokens, repeat=3) -> dict:
+    """Times parse on each of documents, repeat times over.
+
+    size and tokens are the bytes and tokens in all of documents.  Returns
+    the throughput of the fastest pass, the latency percentiles of single
+    documents over all passes, and the peak memory traced in a separate
+    pass.
+    """
+    latencies = []
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for document in documents:
+            begin = time.perf_counter()
+            parse(document)
+            latencies.append(time.perf_counter() - begin)
+        best = min(best, time.perf_counter() - start)
+    latencies.sort()
+    tracemalloc.start()
+    try:
+        for document in documents:
+            parse(document)
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {
+        'seconds': best,
+        'mb_per_s': size / 1e6 / best,
+        'tokens_per_s': tokens / best,
+        'latency_ms': {f'p{p}': percentile(latencies, p / 100) * 1e3 for p in (50, 90, 99)},
+        'peak_bytes': peak,
+    }
+
+
+def run_suite(scale=1, repeat=3, label=None) -> dict:
+    """Measures every parser on every corpus and returns the results."""
+    results = {}
+    sizes = {}
+    for name, documents in corpora(scale).items():
+        size = sum(len(document.encode()) for document in documents)
+        tokens = sum(map(count_tokens, documents))
+        sizes[name] = {'documents': len(documents), 'bytes': size, 'tokens': tokens}
+        results[name] = {parser: measure(parse, documents, size, tokens, repeat)
+                         for parser, parse in parsers.items()}
+    return {
+        'label': label,
+        'python': platform.python_version(),
+        'scale': scale,
+        'corpora': sizes,
+        'results': results,
+    }
+
+
+def time_tokenize(document, engine, **options) -> float:
+    """Returns the seconds taken to drain the token stream for document."""
+    inputs = list(document) if engine == 'char' else document
+    start = time.perf_counter()
+    deque(Tokenizer(inputs, engine=engine, **options).token_stream, maxlen=0)
+    return time.perf_counter() - start
+
+
+def compare_engines(documents):
+    """Prints the time each engine takes on each named document.
+
+    The regex engine is timed as it is and with string_runs, whose tokens
+    differ but which give the same values.
+    """
+    for name, document in documents.items():
+        times = {engine: time_tokenize(document, engine) for engine in Tokenizer.engines}
+        times['regex+string_runs'] = time_tokenize(document, 'regex', string_runs=True)
+        print(f"{name}: {len(document) / 1e6:.1f} MB, "
+              + ", ".join(f"{engine} {t:.2f}s" for engine, t in times.items())
+              + ", " + ", ".join(f"{engine} {times['char'] / t:.1f}x faster"
+                                 for engine, t in times.items() if engine != 'char'))
+
+
+def message_stream(n, seed=0) -> bytes:
+    """Returns n small records, one after another, as UTF-8 JSON."""
+    records = json.loads(records_document(n, seed))
+    return ' '.join(json.dumps(record) for record in records).encode()
+
+
+def concurrent_streams(data, streams, segment_size=4096, read_size=16384):
+    """Parses data from each of streams StreamReaders on one event loop.
+
+    Each reader is filled segment_size bytes at a time by its own task,
+    as a connection would be, and drained by aiter_values.
+    """
+    async def produce(reader):
+        for start in range(0, len(data), segment_size):
+            reader.feed_data(data[start:start + segment_size])
+            await asyncio.sleep(0)
+        reader.feed_eof()
+
+    async def consume(reader):
+        async for _ in aiter_values(reader, read_size):
+            pass
+
+    async def run():
+        readers = [asyncio.StreamReader() for _ in range(streams)]
+        producers = [asyncio.create_task(produce(reader)) for reader in readers]
+        await asyncio.gather(*map(consume, readers), *producers)
+
+    asyncio.run(run())
+
+
+def time_concurrent_streams(data, streams) -> float:
+    """Returns the seconds concurrent_streams takes."""
+    start = time.perf_counter()
+    concurrent_streams(data, streams)
+    return time.perf_counter() - start
+
+
+def peak_memory_concurrent_streams(data, streams) -> int:
+    """Returns the peak memory traced while concurrent_streams runs, in bytes.
+
+    Tracing slows the run down, so it is timed separately.
+    """
+    tracemalloc.start()
+    try:
+        concurrent_streams(data, streams)
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def compare_stream_counts(data, counts):
+    """Prints throughput and peak memory per stream for each stream count."""
+    for streams in counts:
+        seconds = time_concurrent_streams(data, streams)
+        peak = peak_memory_concurrent_streams(data, streams)
+        print(f"{streams} streams of {len(data) / 1e3:.0f} kB: {seconds:.2f}s, "
+              f"{streams * len(data) / 1e6 / seconds:.1f} MB/s, "
+              f"peak {peak / streams / 1e3:.0f} kB per stream")
+
+
+def compare_writers(documents, repeat=3):
+    """Prints the time dump and json.dump take to write each named document.
+
+    Both write compact output to a StringIO.
+    """
+    writers = {
+        'dump': dump,
+        'json.dump': lambda value, sink: json.dump(value, sink, ensure_ascii=False, separators=(',', ':')),
+    }
+    for name, document in documents.items():
+        value = json.loads(document)
+        times = {}
+        for writer, write in writers.items():
+            start = time.perf_counter()
+            for _ in range(repeat):
+                write(value, io.StringIO())
+            times[writer] = (time.perf_counter() - start) / repeat
+        print(f"{name}: {len(document) / 1e6:.1f} MB, "
+              + ", ".join(f"{writer} {t:.3f}s" for writer, t in times.items()))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--scale', type=int, default=1, help="multiplies the size of each corpus")
+    parser.add_argument('--repeat', type=int, default=3, help="passes over each corpus")
+    parser.add_argument('--label', help="recorded in the results, e.g. a commit id")
+    parser.add_argument('--output', help="file to write the results to instead of stdout")
+    parser.add_argument('--engines', action='store_true', help="also compare the char and regex engines")
+    parser.add_argument('--streams', action='store_true', help="also parse concurrent asyncio streams")
+    parser.add_argument('--writers', action='store_true', help="also compare dump with json.dump")
+    args = parser.parse_args()
+    if args.engines:
+        compare_engines({
+            'records': records_document(30000),
+            'coordinates': coordinates_document(2000),
+            'base64': base64_document(200),
+        })
+    if args.streams:
+        compare_stream_counts(message_stream(100), [10, 100, 1000])
+    if args.writers:
+        compare_writers({name: documents[0] for name, documents in corpora(args.scale).items()
+                         if name != 'tiny'})
+    report = json.dumps(run_suite(args.scale, args.repeat, args.label), indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(report + '\n')
+    else:
+        print(report)
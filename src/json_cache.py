@@ -0,0 +1,169 @@
+"""Caches parsed JSON by a hash of its content."""
+
+from array import array
+from collections import OrderedDict
+import copy
+import hashlib
+import sys
+from types import MappingProxyType
+
+from json_lines import parse_line
+
+try:
+    import numpy
+except ImportError: # NumPy is optional; only numeric_arrays='numpy' results hold its arrays
+    numpy = None
+
+DEFAULT_BUDGET = 64 << 20
+# What numeric_arrays turns arrays of numbers into.
+_number_array_types = (array,) if numpy is None else (array, numpy.ndarray)
+
+
+class ParseCache:
+    """Parses JSON, reusing the result for content that has been seen before.
+
+    Results are keyed by a BLAKE2b digest of the input's UTF-8 bytes, so a
+    repeated payload costs one hash instead of a parse.  The least
+    recently used results are evicted once their approximate total size
+    goes over budget bytes; a result bigger than the whole budget is not
+    kept at all.
+
+    With immutable set, the default, every caller shares one frozen
+    result, with objects as read-only mappings (types.MappingProxyType)
+    and arrays as tuples, including the array.arrays and NumPy arrays
+    that numeric_arrays makes.  Otherwise each call returns its own copy in
+    plain dicts and lists, which the caller may change freely.
+
+    hits, misses and evictions count what the cache has done, and size is
+    the approximate number of bytes it holds, object keys included.  Each
+    parse interns its keys in a KeyTable of its own, so nothing outlives
+    the entries that are evicted.  A ParseCache is not safe to share
+    between threads.  options are passed on to Tokenizer; engine defaults
+    to 'regex'.
+    """
+
+    def __init__(self, budget=DEFAULT_BUDGET, immutable=True, **options):
+        self.budget = budget
+        self.immutable = immutable
+        self.options = {'engine': 'regex', **options}
+        self.entries = OrderedDict() # digest -> (result, size)
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def parse(self, source):
+        """Returns the one JSON value in source, a str or UTF-8 bytes-like object.
+
+        Raises RuntimeError as parse_line does; failures are not cached.
+        """
+        data = source.encode('utf-8', 'surrogatepass') if isinstance(source, str) else source
+        key = hashlib.blake2b(data, digest_size=16).digest()
+        entry = self.entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            self.entries.move_to_end(key)
+            result = entry[0]
+            return result if self.immutable else _rebuild(result, dict, list, copy.copy)[0]
+        self.misses += 1
+        value = parse_line(source, **self.options)
+        if self.immutable:
+            value, size = _rebuild(value, _frozen_dict, tuple, _frozen_numbers)
+            result = value
+        else:
+            # The parsed value is kept and the caller gets a copy of it.
+            result, (value, size) = value, _rebuild(value, dict, list, copy.copy)
+        if size <= self.budget:
+            self.entries[key] = result, size
+            self.size += size
+            while self.size > self.budget:
+                self.size -= self.entries.popitem(last=False)[1][1]
+                self.evictions += 1
+        return value
+
+    def clear(self):
+        """Drops every cached result; the counts are kept."""
+        self.entries.clear()
+        self.size = 0
+
+    def stats(self) -> dict:
+        """Returns the counts, the entries and size held, and the budget."""
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'evictions': self.evictions,
+            'entries': len(self.entries),
+            'size': self.size,
+            'budget': self.budget,
+        }
+
+
+def _frozen_dict(items):
+    return MappingProxyType(dict(items))
+
+
+def _frozen_numbers(values):
+    return tuple(values.tolist())
+
+
+def _rebuild(value, make_dict, make_list, make_numbers):
+    """Returns a copy of value built with make_dict and make_list, and its size.
+
+    make_dict is called with a list of (key, value) pairs and make_list
+    with a list of elements.  make_numbers is called with each array.array
+    or NumPy array of numbers and returns what replaces it.  The size is the approximate number of bytes
+    in the containers, keys and scalars.  The walk uses an explicit stack,
+    so values of any depth can be rebuilt.
+    """
+    getsizeof = sys.getsizeof
+    size = getsizeof(value)
+    if value.__class__ in _number_array_types:
+        return make_numbers(value), size
+    if value.__class__ is not dict and value.__class__ is not list \
+            and value.__class__ is not tuple and value.__class__ is not MappingProxyType:
+        return value, size
+    # Each frame is an open container: its items, what has been rebuilt
+    # of it so far, and whether it is an object.
+    stack = [(_items(value), [], not _is_array(value))]
+    while True:
+        items, built, is_object = stack[-1]
+        for item in items:
+            if is_object:
+                size += getsizeof(item[0])
+                child = item[1]
+            else:
+                child = item
+            cls = child.__class__
+            if cls is dict or cls is list or cls is tuple or cls is MappingProxyType:
+                size += getsizeof(child)
+                if is_object:
+                    built.append(item[0])
+                stack.append((_items(child), [], not _is_array(child)))
+                break
+            size += getsizeof(child)
+            if cls in _number_array_types:
+                child = make_numbers(child)
+                item = (item[0], child) if is_object else child
+            built.append(item)
+        else:
+            stack.pop()
+            result = make_dict(built) if is_object else make_list(built)
+            if not stack:
+                return result, size
+            parent = stack[-1]
+            if parent[2]:
+                # The child's key went in first; pair it with the child.
+                parent[1][-1] = parent[1][-1], result
+            else:
+                parent[1].append(result)
+
+
+def _is_array(value):
+    return value.__class__ is list or value.__class__ is tuple
+
+
+def _items(value):
+    return iter(value) if _is_array(value) else iter(value.items())
@@ -0,0 +1,111 @@
+"""Unit tests for the parse result cache."""
+
+from array import array
+import gc
+import tracemalloc
+import unittest
+from types import MappingProxyType
+import json_cache
+from json_cache import ParseCache
+
+
+class TestParseCache(unittest.TestCase):
+
+    document = '{"name": "catalogue", "items": [{"id": 1, "tags": ["a"]}, {"id": 2, "tags": []}]}'
+
+    def test_hits_return_the_frozen_result(self):
+        cache = ParseCache()
+        first = cache.parse(self.document)
+        self.assertIs(cache.parse(self.document.encode()), first)
+        self.assertIsInstance(first, MappingProxyType)
+        self.assertEqual(first['items'][0]['tags'], ('a',))
+        with self.assertRaises(TypeError):
+            first['name'] = 'changed'
+        with self.assertRaises(TypeError):
+            first['items'][0]['id'] = 3
+        self.assertEqual(cache.stats(), {
+            'hits': 1, 'misses': 1, 'evictions': 0, 'entries': 1, 'size': cache.size,
+            'budget': cache.budget,
+        })
+
+    def test_copies(self):
+        cache = ParseCache(immutable=False)
+        first = cache.parse(self.document)
+        first['items'][0]['tags'].append('changed')
+        second = cache.parse(self.document)
+        self.assertIsNot(second, first)
+        self.assertEqual(second['items'][0]['tags'], ['a'])
+        self.assertEqual((cache.hits, cache.misses), (1, 1))
+
+    def test_evicts_least_recently_used_within_budget(self):
+        documents = [f'[{i}, "{"x" * 100}"]' for i in range(4)]
+        probe = ParseCache()
+        probe.parse(documents[0])
+        cache = ParseCache(budget=3 * probe.size)
+        for document in documents[:3]:
+            cache.parse(document)
+        cache.parse(documents[0]) # now the most recently used
+        cache.parse(documents[3]) # evicts documents[1]
+        self.assertEqual(cache.evictions, 1)
+        self.assertLessEqual(cache.size, cache.budget)
+        hits = cache.hits
+        cache.parse(documents[0])
+        self.assertEqual(cache.hits, hits + 1)
+        cache.parse(documents[1])
+        self.assertEqual(cache.hits, hits + 1)
+
+    def test_results_over_budget_are_not_kept(self):
+        cache = ParseCache(budget=10)
+        self.assertEqual(cache.parse('[1, 2, 3]'), (1, 2, 3))
+        self.assertEqual((len(cache), cache.size), (0, 0))
+
+    def test_keys_count_toward_the_budget(self):
+        short, long = ParseCache(), ParseCache()
+        short.parse('{"k": 1}')
+        long.parse('{"%s": 1}' % ('k' * 1000))
+        self.assertGreater(long.size, short.size + 900)
+        cache = ParseCache(budget=10000)
+        tracemalloc.start()
+        try:
+            for i in range(1000):
+                cache.parse('{"%s": %d}' % (f'{i:04}' * 250, i))
+            gc.collect()
+            retained = tracemalloc.get_traced_memory()[0]
+        finally:
+            tracemalloc.stop()
+        self.assertLessEqual(cache.size, cache.budget)
+        self.assertLess(retained, 100 * cache.budget)
+
+    def test_number_arrays_are_frozen_or_copied(self):
+        document = '{"a": [1, 2], "b": [[0.5, 1.5]]}'
+        cache = ParseCache(numeric_arrays='array')
+        frozen = cache.parse(document)
+        self.assertEqual((frozen['a'], frozen['b']), ((1, 2), ((0.5, 1.5),)))
+        self.assertEqual(cache.parse('[1, 2]'), (1, 2))
+        cache = ParseCache(immutable=False, numeric_arrays='array')
+        first = cache.parse(document)
+        self.assertEqual(first['a'], array('q', [1, 2]))
+        first['a'][0] = 9
+        self.assertEqual(cache.parse(document)['a'], array('q', [1, 2]))
+
+    @unittest.skipIf(json_cache.numpy is None, "NumPy is not installed")
+    def test_numpy_arrays_are_frozen(self):
+        self.assertEqual(ParseCache(numeric_arrays='numpy').parse('[[1, 2], [0.5]]'), ((1, 2), (0.5,)))
+
+    def test_deep_nesting(self):
+        document = '[' * 5000 + ']' * 5000
+        value = ParseCache().parse(document)
+        for _ in range(4999):
+            value = value[0]
+        self.assertEqual(value, ())
+
+    def test_errors_are_not_cached(self):
+        cache = ParseCache()
+        for _ in range(2):
+            with self.assertRaises(RuntimeError):
+                cache.parse('[1, 2')
+        self.assertEqual((cache.misses, len(cache)), (2, 0))
+
+
+if __name__ == "__main__":
+    unittest.main()
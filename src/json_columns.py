@@ -0,0 +1,241 @@
+"""Reads an array of flat JSON objects straight into columns."""
+
+from array import array
+from collections.abc import Mapping
+
+from json_tokenizer import TokenType, Tokenizer
+
+try:
+    import numpy
+except ImportError: # NumPy is optional; parse_columns only needs it for use_numpy
+    numpy = None
+
+_typecodes = {int: 'q', float: 'd', bool: 'b'}
+_numpy_types = {'q': 'int64', 'd': 'float64', 'b': 'bool'}
+
+
+class Columns(Mapping):
+    """The columns of an array of objects, by key in order of appearance.
+
+    Each column holds one entry per object: an array.array of 'q' for
+    ints, 'd' for floats (ints among floats are converted) or 'b' for
+    bools, or a list for strings and for keys whose values are mixed or
+    nested.  nulls maps the key of each column with a null or missing
+    entry to a bytearray mask, 1 at those entries; they hold 0 in arrays
+    and None in lists.  rows is the number of objects.
+    """
+
+    def __init__(self, columns, nulls, rows):
+        self.columns = columns
+        self.nulls = nulls
+        self.rows = rows
+
+    def __getitem__(self, key):
+        return self.columns[key]
+
+    def __iter__(self):
+        return iter(self.columns)
+
+    def __len__(self):
+        return len(self.columns)
+
+    def __repr__(self):
+        return f"Columns({list(self.columns)}, rows={self.rows})"
+
+
+class _Column:
+    """The entries read so far for one key.
+
+    type is the class the entries have, None until one that is not null
+    has been read and object once they are mixed.
+    """
+
+    __slots__ = ('type', 'values', 'nulls', 'length')
+
+    def __init__(self, length):
+        self.type = None
+        self.values = None
+        self.nulls = bytearray(b'\x01') * length if length else None
+        self.length = length
+
+    def append(self, value):
+        if value.__class__ is self.type:
+            try:
+                self.values.append(value)
+            except OverflowError: # an int too big for 'q'
+                self._make_objects()
+                self.values.append(value)
+            if self.nulls is not None:
+                self.nulls.append(0)
+            self.length += 1
+        elif value is None:
+            self.append_null()
+        else:
+            self._append_other(value)
+
+    def append_null(self):
+        if self.nulls is None:
+            self.nulls = bytearray(self.length)
+        self.nulls.append(1)
+        if self.values is not None:
+            self.values.append(None if self.values.__class__ is list else 0)
+        self.length += 1
+
+    def _append_other(self, value):
+        """Appends a value of another type than the column's, converting it."""
+        cls = value.__class__
+        if self.type is None:
+            self.type = cls
+            typecode = _typecodes.get(cls)
+            if typecode is not None:
+                self.values = array(typecode, [0]) * self.length
+            else:
+                if cls is not str:
+                    self.type = object
+                self.values = [None] * self.length
+            self.append(value)
+            return
+        if self.type is float and cls is int:
+            try:
+                value = float(value)
+            except OverflowError: # an int too big for a double
+                self._make_objects()
+        elif self.type is int and cls is float:
+            self.values = array('d', self.values)
+            self.type = float
+        elif self.type is not object:
+            self._make_objects()
+        self.values.append(value)
+        if self.nulls is not None:
+            self.nulls.append(0)
+        self.length += 1
+
+    def _make_objects(self):
+        """Turns the column into a list of any values."""
+        values = self.values
+        if self.type is bool:
+            values = map(bool, values)
+        values = list(values)
+        if self.nulls is not None:
+            for i, null in enumerate(self.nulls):
+                if null:
+                    values[i] = None
+        self.values = values
+        self.type = object
+
+    def finish(self, use_numpy):
+        """Returns the column's values and null mask, as NumPy arrays with use_numpy."""
+        values = [None] * self.length if self.values is None else self.values
+        nulls = self.nulls
+        if use_numpy:
+            if values.__class__ is array:
+                values = numpy.frombuffer(values, _numpy_types[values.typecode]).copy()
+            if nulls is not None:
+                nulls = numpy.frombuffer(nulls, bool).copy()
+        return values, nulls
+
+
+def parse_columns(source, use_numpy=False, **options) -> Columns:
+    """Returns the top-level array of objects in source as Columns.
+
+    source is any input Tokenizer takes, and options are passed on to it;
+    engine defaults to 'regex'.  The objects are read one at a time and
+    their values appended straight to their columns, so no dict is built
+    for them.  Objects with the same keys in the same order share one
+    layout, looked up through the KeyTable's shapes.  A key first seen
+    part way through gets a column whose earlier entries are null, and a
+    key missing from an object gets a null entry.  Nested values are
+    built as match_value builds them.
+
+    With use_numpy set, the arrays and null masks are NumPy arrays, and the
+    lists stay lists.  Raises RuntimeError if source is not an array of
+    objects.
+    """
+    if use_numpy and numpy is None:
+        raise ValueError("use_numpy needs NumPy installed")
+    t = Tokenizer(source, **{'engine': 'regex', **options})
+    get = t.token_stream.__next__
+    key = t.read_key
+    scalars = t.scalar_readers()
+    push_back = t.push_back
+    match_value = t.match_value
+    keys = t.keys
+    shapes = keys.shapes
+    columns = {}
+    layouts = {} # shape -> (column for each key, columns of the keys missing)
+    rows = 0
+
+    token = t.get()
+    if token[0] is not TokenType.BEGIN_ARRAY:
+        raise RuntimeError(f"Expected an array of objects but got {token[1]}")
+    token = get()
+    if token[0] is TokenType.END_ARRAY:
+        token = None
+    while token is not None:
+        if token[0] is not TokenType.BEGIN_OBJECT:
+            raise RuntimeError(f"Expected an object but got {token[1]}")
+        shape = shapes
+        values = []
+        token = get()
+        if token[0] is not TokenType.END_OBJECT:
+            while True:
+                shape = shape.extend(key(token), keys)
+                token = get()
+                scalar = scalars.get(token[0])
+                if scalar is not None:
+                    values.append(scalar(token))
+                else:
+                    push_back(token)
+                    values.append(match_value())
+                token = get()
+                kind = token[0]
+                if kind is TokenType.VALUE_SEPARATOR:
+                    token = get()
+                elif kind is TokenType.END_OBJECT:
+                    break
+                else:
+                    raise RuntimeError(f"Expected , or }} but got {token[1]}")
+
+        layout = layouts.get(shape)
+        if layout is None:
+            width = len(columns)
+            layout = _layout(shape.keys, columns, rows)
+            # The other layouts lack any new columns, and are kept no
+            # longer than the shapes they are for.
+            if len(columns) > width or len(layouts) >= keys.limit:
+                layouts.clear()
+            layouts[shape] = layout
+        for column, value in zip(layout[0], values):
+            if column is not None:
+                column.append(value)
+        for column in layout[1]:
+            column.append_null()
+        rows += 1
+
+        token = get()
+        kind = token[0]
+        if kind is TokenType.VALUE_SEPARATOR:
+            token = get()
+        elif kind is TokenType.END_ARRAY:
+            token = None
+        else:
+            raise RuntimeError(f"Expected , or ] but got {token[1]}")
+
+    finished = {name: column.finish(use_numpy) for name, column in columns.items()}
+    return Columns({name: values for name, (values, _) in finished.items()},
+                   {name: nulls for name, (_, nulls) in finished.items() if nulls is not None}, rows)
+
+
+def _layout(keys, columns, rows):
+    """Returns the layout of objects with keys, adding any new columns.
+
+    The layout is the column for each key, None for all but the last of
+    a repeated key, and the columns whose keys are missing.
+    """
+    last = {name: i for i, name in enumerate(keys)}
+    for name in last:
+        if name not in columns:
+            columns[name] = _Column(rows)
+    present = [columns[name] if last[name] == i else None for i, name in enumerate(keys)]
+    missing = [column for name, column in columns.items() if name not in last]
+    return present, missing
@@ -0,0 +1,79 @@
+"""Unit tests for reading arrays of objects into columns."""
+
+from array import array
+import unittest
+from json_columns import parse_columns
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestParseColumns(unittest.TestCase):
+
+    document = ('[{"id": 1, "name": "a", "score": 1.5, "ok": true},'
+                ' {"id": 2, "name": "b", "score": 2.5, "ok": false},'
+                ' {"name": "c", "id": 3, "score": 3, "ok": true}]')
+
+    def test_typed_columns(self):
+        columns = parse_columns(self.document)
+        self.assertEqual(list(columns), ['id', 'name', 'score', 'ok'])
+        self.assertEqual(columns.rows, 3)
+        self.assertEqual(columns['id'], array('q', [1, 2, 3]))
+        self.assertEqual(columns['name'], ['a', 'b', 'c'])
+        self.assertEqual(columns['score'], array('d', [1.5, 2.5, 3.0]))
+        self.assertEqual(columns['ok'], array('b', [1, 0, 1]))
+        self.assertEqual(columns.nulls, {})
+
+    def test_binary_input(self):
+        self.assertEqual(dict(parse_columns(self.document.encode())), dict(parse_columns(self.document)))
+
+    def test_missing_and_extra_fields_are_null(self):
+        columns = parse_columns('[{"a": 1}, {"b": "x"}, {"a": null, "b": "y"}, {}]')
+        self.assertEqual(columns['a'], array('q', [1, 0, 0, 0]))
+        self.assertEqual(columns['b'], [None, 'x', 'y', None])
+        self.assertEqual(columns.nulls, {'a': bytearray([0, 1, 1, 1]), 'b': bytearray([1, 0, 0, 1])})
+
+    def test_mixed_columns(self):
+        columns = parse_columns('[{"a": 1, "b": true, "c": null}, {"a": 2.5, "b": "x", "c": null},'
+                                ' {"a": 3, "b": [1, {"d": 2}], "c": null}]')
+        self.assertEqual(columns['a'], array('d', [1.0, 2.5, 3.0]))
+        self.assertEqual(columns['b'], [True, 'x', [1, {'d': 2}]])
+        self.assertEqual(columns['c'], [None, None, None])
+        self.assertEqual(columns.nulls, {'c': bytearray([1, 1, 1])})
+
+    def test_big_ints(self):
+        columns = parse_columns('[{"a": 1}, {"a": null}, {"a": 123456789012345678901234567890}]')
+        self.assertEqual(columns['a'], [1, None, 123456789012345678901234567890])
+
+    def test_ints_too_big_for_floats(self):
+        big = 10 ** 400
+        columns = parse_columns(f'[{{"a": 1.5}}, {{"a": null}}, {{"a": {big}}}]')
+        self.assertEqual(columns['a'], [1.5, None, big])
+
+    def test_repeated_keys_keep_the_last(self):
+        self.assertEqual(parse_columns('[{"a": 1, "a": 2}]')['a'], array('q', [2]))
+
+    def test_empty_array(self):
+        columns = parse_columns(' [ ] ')
+        self.assertEqual((len(columns), columns.rows), (0, 0))
+
+    def test_rejects_other_documents(self):
+        for document in ('{"a": 1}', '[{"a": 1}, 2]', '[{"a": 1} {"a": 2}]', '[{"a": 1}'):
+            with self.assertRaises(RuntimeError, msg=document):
+                parse_columns(document)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy(self):
+        columns = parse_columns('[{"a": 1, "b": 0.5, "c": true, "d": "x"}, {"a": 2, "b": null, "c": false}]',
+                                use_numpy=True)
+        self.assertEqual(columns['a'].dtype, numpy.int64)
+        self.assertEqual(columns['b'].tolist(), [0.5, 0.0])
+        self.assertEqual(columns['c'].tolist(), [True, False])
+        self.assertEqual(columns['d'], ['x', None])
+        self.assertEqual(columns.nulls['b'].tolist(), [False, True])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,95 @@
+"""Reads newline-delimited JSON (JSON Lines) with the json tokenizer."""
+
+from itertools import chain, islice
+
+from json_parallel import ordered_map
+from json_tokenizer import KeyTable, TokenType, Tokenizer
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+class LineError:
+    """A line that could not be parsed, and why."""
+
+    __slots__ = ('lineno', 'line', 'message')
+
+    def __init__(self, lineno, line, message):
+        self.lineno = lineno
+        self.line = line
+        self.message = message
+
+    def __repr__(self):
+        return f"LineError({self.lineno}, {self.line!r}, {self.message!r})"
+
+
+def parse_line(line, **options):
+    """Returns the one JSON value on line.
+
+    options are passed on to Tokenizer.  Raises RuntimeError if line holds
+    anything but a single value.
+    """
+    t = Tokenizer(line, **options)
+    value = t.match_value()
+    if not t.seeing(TokenType.END):
+        raise RuntimeError(f"Unexpected data after value: {t.next_token()[1]!r}")
+    return value
+
+
+def _parse_lines(numbered_lines, options):
+    """Parses (lineno, line) pairs, returning a list of values and LineErrors."""
+    results = []
+    for lineno, line in numbered_lines:
+        try:
+            results.append(parse_line(line, **options))
+        except (RuntimeError, ValueError) as e:
+            results.append(LineError(lineno, line, str(e)))
+    return results
+
+
+class JsonLinesReader:
+    """Iterates over the records of a JSON Lines file, in order.
+
+    source is a text or binary file, or any iterable of lines.  Blank
+    lines are ignored.  A line that fails to parse does not stop the
+    reader: it is skipped and a LineError with its line number is appended
+    to errors.
+
+    With workers set, batches of batch_size raw lines are parsed by that
+    many worker processes.  Only a few batches per worker are in flight at
+    once, so memory stays bounded however long the file is.  Without
+    workers the lines are parsed in this process, sharing one KeyTable.
+
+    options are passed on to Tokenizer; engine defaults to 'regex'.
+    """
+
+    def __init__(self, source, workers=None, batch_size=DEFAULT_BATCH_SIZE, **options):
+        self.source = source
+        self.workers = workers
+        self.batch_size = batch_size
+        self.options = {'engine': 'regex', **options}
+        self.errors = []
+
+    def __iter__(self):
+        if self.workers:
+            batches = ((batch, self.options) for batch in self._batches())
+            results = chain.from_iterable(ordered_map(_parse_lines, batches, self.workers))
+        else:
+            options = {'keys': KeyTable(), **self.options}
+            results = (result for batch in self._batches()
+                       for result in _parse_lines(batch, options))
+        for result in results:
+            if isinstance(result, LineError):
+                self.errors.append(result)
+            else:
+                yield result
+
+    def _batches(self):
+        """Yields lists of up to batch_size (lineno, line) pairs."""
+        numbered = ((lineno, line) for lineno, line in enumerate(self.source, 1)
+                    if line.strip())
+        while True:
+            batch = list(islice(numbered, self.batch_size))
+            if not batch:
+                return
+            yield batch
+
@@ -0,0 +1,47 @@
+"""Unit tests for the JSON Lines reader."""
+
+import io
+import unittest
+from json_lines import JsonLinesReader, parse_line
+
+
+class TestJsonLinesReader(unittest.TestCase):
+
+    lines = [
+        '{"id": 1, "msg": "ok"}\n',
+        '\n',
+        '{"id": 2, "msg": "a\\nb"}\n',
+        '{"id": 3,\n',
+        '[4, 5] 6\n',
+        '7\n',
+    ]
+
+    def test_parse_line(self):
+        self.assertEqual(parse_line('{"a": [1, true]}\n'), {'a': [1, True]})
+        with self.assertRaises(RuntimeError):
+            parse_line('1 2')
+
+    def test_reads_records_and_reports_errors(self):
+        reader = JsonLinesReader(io.StringIO(''.join(self.lines)))
+        self.assertEqual(list(reader), [{'id': 1, 'msg': 'ok'}, {'id': 2, 'msg': 'a\nb'}, 7])
+        self.assertEqual([error.lineno for error in reader.errors], [4, 5])
+        self.assertEqual(reader.errors[0].line, '{"id": 3,\n')
+
+    def test_reads_binary_files(self):
+        reader = JsonLinesReader(io.BytesIO(''.join(self.lines).encode()), batch_size=2)
+        self.assertEqual(list(reader), [{'id': 1, 'msg': 'ok'}, {'id': 2, 'msg': 'a\nb'}, 7])
+        self.assertEqual(len(reader.errors), 2)
+
+    def test_workers_keep_input_order(self):
+        lines = [f'{{"n": {i}}}' if i % 100 else '{' for i in range(1, 2001)]
+        reader = JsonLinesReader(lines, workers=2, batch_size=64)
+        self.assertEqual([record['n'] for record in reader], [i for i in range(1, 2001) if i % 100])
+        self.assertEqual([error.lineno for error in reader.errors], list(range(100, 2001, 100)))
+
+    def test_passes_options_to_tokenizer(self):
+        reader = JsonLinesReader(['1.5'], use_decimal=True)
+        self.assertEqual([str(value) for value in reader], ['1.5'])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,121 @@
+"""Parses the elements of one large top-level JSON array in parallel."""
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import re
+
+from json_tokenizer import KeyTable, Tokenizer
+
+DEFAULT_PIECE_SIZE = 1 << 20
+
+# A whole string, so that its contents are passed over, or one of the
+# characters that change the depth or separate elements.
+structure_pattern = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"|([\[{])|([\]}])|(,)', re.DOTALL)
+structure_bytes_pattern = re.compile(structure_pattern.pattern.encode(), re.DOTALL)
+array_start_pattern = re.compile(r'(?:\ufeff)?\s*\[')
+array_start_bytes_pattern = re.compile(rb'(?:\xef\xbb\xbf)?\s*\[')
+
+
+def ordered_map(function, arguments, workers):
+    """Yields function(*args) for each args in arguments, in order.
+
+    The calls are made by a pool of workers processes, with at most two
+    calls per worker waiting at a time, so arguments is consumed lazily.
+    """
+    with ProcessPoolExecutor(workers) as executor:
+        pending = deque()
+        for args in arguments:
+            pending.append(executor.submit(function, *args))
+            if len(pending) >= 2 * workers:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+def split_array(document, piece_size=DEFAULT_PIECE_SIZE):
+    """Yields (start, end) offsets of pieces of a top-level array's elements.
+
+    document is a str, or bytes, bytearray, memoryview or mmap holding
+    UTF-8.  Each piece is a run of whole elements, cut at the first comma
+    outside any string or nested container at least piece_size characters
+    after the start of the piece, and excludes the brackets and the commas
+    between pieces.  Pieces are yielded as they are found, so they can be
+    parsed while the rest of the array is still being split.  Raises
+    RuntimeError if document does not start with an array or the array is
+    not closed.
+    """
+    if isinstance(document, str):
+        start = array_start_pattern.match(document)
+        pattern = structure_pattern
+    else:
+        start = array_start_bytes_pattern.match(document)
+        pattern = structure_bytes_pattern
+    if start is None:
+        raise RuntimeError("Expected a top-level array")
+    piece_start = start.end()
+    target = piece_start + piece_size
+    depth = 1
+    for m in pattern.finditer(document, piece_start):
+        kind = m.lastindex
+        if kind is None:
+            continue
+        if kind == 1:
+            depth += 1
+        elif kind == 2:
+            depth -= 1
+            if not depth:
+                yield piece_start, m.start()
+                return
+        elif depth == 1 and m.start() >= target:
+            yield piece_start, m.start()
+            piece_start = m.end()
+            target = piece_start + piece_size
+    raise RuntimeError("Input ends inside the array")
+
+
+def _parse_piece(piece, options, alone):
+    """Returns the list of elements in a piece of an array.
+
+    Only a piece that is the whole array may be empty.
+    """
+    if isinstance(piece, str):
+        text = '[' + piece + ']'
+    else:
+        piece = bytes(piece)
+        text = b'[' + piece + b']'
+    if not alone and not piece.strip():
+        raise RuntimeError("Expected a value between commas")
+    return Tokenizer(text, **options).match_array()
+
+
+def _pieces(document, piece_size, options):
+    """Yields the arguments to _parse_piece for each piece of the array."""
+    for i, (start, end) in enumerate(split_array(document, piece_size)):
+        # Only the first piece can end at the closing bracket and be alone.
+        alone = not i and document[end:end + 1] in (']', b']')
+        yield document[start:end], options, alone
+
+
+def iter_array(document, workers=None, piece_size=DEFAULT_PIECE_SIZE, **options):
+    """Yields the elements of the top-level array in document, in order.
+
+    The array is cut into pieces with split_array.  With workers set the
+    pieces are parsed by that many worker processes, otherwise in this
+    process.  Either way the elements are exactly those match_array
+    returns.  options are passed on to Tokenizer; engine defaults to
+    'regex'.
+    """
+    options = {'engine': 'regex', **options}
+    arguments = _pieces(document, piece_size, options)
+    if workers:
+        results = ordered_map(_parse_piece, arguments, workers)
+    else:
+        options.setdefault('keys', KeyTable())
+        results = (_parse_piece(*args) for args in arguments)
+    for elements in results:
+        yield from elements
+
+
+def parse_array(document, workers=None, piece_size=DEFAULT_PIECE_SIZE, **options):
+    """Returns the top-level array in document as a list; see iter_array."""
+    return list(iter_array(document, workers, piece_size, **options))
@@ -0,0 +1,64 @@
+"""Unit tests for parallel parsing of a top-level array."""
+
+import mmap
+import tempfile
+import unittest
+from json_parallel import iter_array, parse_array, split_array
+from json_tokenizer import Tokenizer
+
+
+class TestSplitArray(unittest.TestCase):
+
+    def test_splits_between_top_level_elements(self):
+        document = '[{"a": [1, 2]}, "x,y]", 3, [4, {"b": 5}]]'
+        pieces = [document[start:end] for start, end in split_array(document, 1)]
+        self.assertEqual(pieces, ['{"a": [1, 2]}', ' "x,y]"', ' 3', ' [4, {"b": 5}]'])
+
+    def test_pieces_are_at_least_piece_size(self):
+        document = '[' + ', '.join(['1'] * 100) + ']'
+        pieces = list(split_array(document, 30))
+        self.assertTrue(all(end - start >= 30 for start, end in pieces[:-1]))
+        self.assertEqual(','.join(document[start:end] for start, end in pieces), document[1:-1])
+
+    def test_rejects_other_documents(self):
+        for document in ('{"a": 1}', '[1, [2]', '"["'):
+            with self.assertRaises(RuntimeError, msg=document):
+                list(split_array(document))
+
+
+class TestParseArray(unittest.TestCase):
+
+    document = '[' + ', '.join(f'{{"id": {i}, "tags": ["a,", "]"], "n": null}}' for i in range(500)) + ']'
+
+    def test_matches_match_array(self):
+        expected = Tokenizer(self.document, engine='regex').match_array()
+        self.assertEqual(parse_array(self.document, piece_size=100), expected)
+        self.assertEqual(parse_array(self.document.encode(), piece_size=100), expected)
+
+    def test_workers(self):
+        expected = Tokenizer(self.document, engine='regex').match_array()
+        self.assertEqual(parse_array(self.document, workers=2, piece_size=1000), expected)
+
+    def test_iterates_in_order(self):
+        ids = [element['id'] for element in iter_array(self.document, piece_size=100)]
+        self.assertEqual(ids, list(range(500)))
+
+    def test_mmap(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(b'\xef\xbb\xbf' + self.document.encode())
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                self.assertEqual(len(parse_array(m, piece_size=100)), 500)
+
+    def test_empty_arrays(self):
+        self.assertEqual(parse_array('[]'), [])
+        self.assertEqual(parse_array(' [ ] ', piece_size=0), [])
+
+    def test_rejects_missing_elements(self):
+        for document in ('[1,]', '[1,,2]', '[,1]'):
+            with self.assertRaises(RuntimeError, msg=document):
+                parse_array(document, piece_size=1)
+
+
+if __name__ == "__main__":
+    unittest.main()
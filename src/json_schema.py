@@ -0,0 +1,391 @@
+"""Parses JSON straight into typed records, following a compiled schema."""
+
+import dataclasses
+from decimal import Decimal
+import keyword
+import types
+import typing
+
+from json_tokenizer import TokenType, Tokenizer
+
+_BEGIN_STRING = TokenType.BEGIN_STRING
+_NUMBER = TokenType.NUMBER
+_TRUE = TokenType.TRUE
+_FALSE = TokenType.FALSE
+_NULL = TokenType.NULL
+_BEGIN_ARRAY = TokenType.BEGIN_ARRAY
+_END_ARRAY = TokenType.END_ARRAY
+_BEGIN_OBJECT = TokenType.BEGIN_OBJECT
+_END_OBJECT = TokenType.END_OBJECT
+_VALUE_SEPARATOR = TokenType.VALUE_SEPARATOR
+
+_kind_names = {
+    _BEGIN_STRING: 'a string', _NUMBER: 'a number', _TRUE: 'true', _FALSE: 'false', _NULL: 'null',
+    _BEGIN_ARRAY: 'an array', _BEGIN_OBJECT: 'an object',
+}
+
+
+class SchemaError(RuntimeError):
+    """A value that does not have the type its schema declares.
+
+    path is where the value is, as a list of the keys and indexes that
+    lead to it from the top-level value, and line and column are where it
+    starts when the input was scanned with spans, otherwise None.
+    """
+
+    def __init__(self, message, token):
+        super().__init__(message)
+        self.message = message
+        self.path = []
+        self.line = getattr(token, 'line', None)
+        self.column = getattr(token, 'column', None)
+
+    def __str__(self):
+        where = '$' + ''.join(f'[{step!r}]' for step in self.path)
+        if self.line is not None:
+            where += f" (line {self.line}, column {self.column})"
+        return f"{self.message} at {where}"
+
+
+def _mismatch(expected, token):
+    """Returns the SchemaError for token where expected was wanted."""
+    return SchemaError(f"Expected {expected} but got {_kind_names.get(token[0], repr(token[1]))}", token)
+
+
+class _Node:
+    """A compiled part of a schema, turned into a reader for each parse."""
+
+    def bind(self, t, bound):
+        """Returns a function that reads a value of this type from t.
+
+        It takes the value's first token and reads the rest from t.
+        bound maps the nodes already bound for t to their readers, so a
+        schema that refers to itself is bound only once.
+        """
+        read = bound.get(self)
+        if read is None:
+            # A placeholder, called only by recursive references.
+            bound[self] = lambda token: read(token)
+            read = bound[self] = self._bind(t, bound)
+        return read
+
+
+class _Scalar(_Node):
+    """A str, int, float, Decimal, bool or None."""
+
+    def __init__(self, type):
+        self.type = type
+
+    def _bind(self, t, bound):
+        readers = t.scalar_readers()
+        string = readers[_BEGIN_STRING]
+        number = readers[_NUMBER]
+        if self.type is str:
+            def read(token):
+                if token[0] is not _BEGIN_STRING:
+                    raise _mismatch('a string', token)
+                return string(token)
+        elif self.type is int:
+            def read(token):
+                if token[0] is not _NUMBER:
+                    raise _mismatch('an integer', token)
+                value = number(token)
+                if value.__class__ is not int:
+                    raise SchemaError(f"Expected an integer but got {token[1]}", token)
+                return value
+        elif self.type is float or self.type is Decimal:
+            convert = self.type
+            def read(token):
+                if token[0] is not _NUMBER:
+                    raise _mismatch('a number', token)
+                return convert(token[1])
+        elif self.type is bool:
+            def read(token):
+                kind = token[0]
+                if kind is _TRUE:
+                    return True
+                if kind is _FALSE:
+                    return False
+                raise _mismatch('true or false', token)
+        else:
+            def read(token):
+                if token[0] is not _NULL:
+                    raise _mismatch('null', token)
+        return read
+
+
+class _Optional(_Node):
+    """A value of another type, or null."""
+
+    def __init__(self, node):
+        self.node = node
+
+    def _bind(self, t, bound):
+        read_value = self.node.bind(t, bound)
+
+        def read(token):
+            if token[0] is _NULL:
+                return None
+            return read_value(token)
+        return read
+
+
+class _Any(_Node):
+    """Any value, built as match_value builds it."""
+
+    def _bind(self, t, bound):
+        def read(token):
+            t.push_back(token)
+            return t.match_value()
+        return read
+
+
+class _List(_Node):
+    """An array whose elements all have one type."""
+
+    def __init__(self, node):
+        self.node = node
+
+    def _bind(self, t, bound):
+        read_element = self.node.bind(t, bound)
+        get = t.token_stream.__next__
+
+        def read(token):
+            if token[0] is not _BEGIN_ARRAY:
+                raise _mismatch('an array', token)
+            elements = []
+            append = elements.append
+            token = get()
+            if token[0] is _END_ARRAY:
+                return elements
+            try:
+                while True:
+                    append(read_element(token))
+                    token = get()
+                    kind = token[0]
+                    if kind is _VALUE_SEPARATOR:
+                        token = get()
+                    elif kind is _END_ARRAY:
+                        return elements
+                    else:
+                        raise RuntimeError(f"Expected , or ] but got {token[1]}")
+            except SchemaError as e:
+                e.path.insert(0, len(elements))
+                raise
+        return read
+
+
+class _Object(_Node):
+    """An object: a record with declared fields, or a dict of one type.
+
+    Keys in fields are read with their field's node.  Other keys are read
+    with rest, or skipped unread when there is no rest.  make builds the
+    result from the dict of values read, which is returned as it is when
+    make is None.  required are the keys that must be present.
+    """
+
+    def __init__(self, make=None, fields=None, required=(), rest=None):
+        self.make = make
+        self.fields = {} if fields is None else fields
+        self.required = tuple(required)
+        self.rest = rest
+
+    def _bind(self, t, bound):
+        get = t.token_stream.__next__
+        read_key = t.read_key
+        skip = t.skip
+        intern = t.keys.intern
+        make = self.make
+        required = self.required
+        size = len(self.fields)
+        rest = None if self.rest is None else self.rest.bind(t, bound)
+        readers = {name: (name, node.bind(t, bound)) for name, node in self.fields.items()}
+        # Each field name by the text its key has when scanned as a single
+        # run, a str or undecoded UTF-8 bytes, so such keys are not decoded.
+        raw_names = {}
+        for name in readers:
+            if '\\' not in name:
+                raw_names[name] = raw_names[name.encode()] = name
+
+        def read(token):
+            if token[0] is not _BEGIN_OBJECT:
+                raise _mismatch('an object', token)
+            start = token
+            values = {}
+            token = get()
+            if token[0] is not _END_OBJECT:
+                key = None
+                try:
+                    while True:
+                        key = read_key(token, raw_names)
+                        entry = readers.get(key)
+                        if entry is not None:
+                            key, read_value = entry
+                        elif rest is not None:
+                            key = intern(key)
+                            read_value = rest
+                        else:
+                            read_value = None
+                        token = get()
+                        if read_value is None:
+                            skip(token)
+                        else:
+                            values[key] = read_value(token)
+                        token = get()
+                        kind = token[0]
+                        if kind is _VALUE_SEPARATOR:
+                            token = get()
+                        elif kind is _END_OBJECT:
+                            break
+                        else:
+                            raise RuntimeError(f"Expected , or }} but got {token[1]}")
+                except SchemaError as e:
+                    e.path.insert(0, key)
+                    raise
+            if len(values) < size:
+                for name in required:
+                    if name not in values:
+                        raise SchemaError(f"Missing {name!r}", start)
+            return values if make is None else make(values)
+        return read
+
+
+class SchemaParser:
+    """Parses JSON into the values a schema describes; see compile_schema.
+
+    type is the type of the values parse returns, which for a dict spec is
+    the record class made for it.
+    """
+
+    def __init__(self, node, type):
+        self.node = node
+        self.type = type
+
+    def parse(self, source, **options):
+        """Returns the one value in source, read as the schema's type.
+
+        source is any input Tokenizer takes, and options are passed on to
+        it; engine defaults to 'regex'.  Raises SchemaError as soon as a
+        value does not match the schema, and RuntimeError if source is not
+        JSON or holds more than one value.
+        """
+        t = Tokenizer(source, **{'engine': 'regex', **options})
+        value = self.node.bind(t, {})(t.get())
+        if not t.seeing(TokenType.END):
+            raise RuntimeError(f"Unexpected data after value: {t.next_token()[1]!r}")
+        return value
+
+    def iter_array(self, source, **options):
+        """Yields each element of the top-level array in source, in order.
+
+        Each element is read as the schema's type and only one is held in
+        memory at a time.  source and options are as for parse.
+        """
+        t = Tokenizer(source, **{'engine': 'regex', **options})
+        get = t.token_stream.__next__
+        read = self.node.bind(t, {})
+        token = t.get()
+        if token[0] is not _BEGIN_ARRAY:
+            raise _mismatch('an array', token)
+        token = get()
+        if token[0] is _END_ARRAY:
+            return
+        index = 0
+        while True:
+            try:
+                yield read(token)
+            except SchemaError as e:
+                e.path.insert(0, index)
+                raise
+            index += 1
+            token = get()
+            kind = token[0]
+            if kind is _VALUE_SEPARATOR:
+                token = get()
+            elif kind is _END_ARRAY:
+                return
+            else:
+                raise RuntimeError(f"Expected , or ] but got {token[1]}")
+
+
+def compile_schema(schema, name='Record') -> SchemaParser:
+    """Returns a SchemaParser that reads JSON as schema describes it.
+
+    schema is a type: str, int, float, Decimal, bool, None, typing.Any,
+    Optional[T] (or T | None), list[T], dict[str, T], a dataclass or a
+    TypedDict, nested as deeply as needed.  A dataclass may refer to
+    itself.  schema may also be a dict mapping keys to types, or to nested
+    dicts, for which a dataclass named name is made with __slots__.
+
+    Objects read as a dataclass are built by calling it with their fields
+    as keyword arguments, and those read as a TypedDict are dicts.  The
+    values of keys with no field are skipped without being decoded.  Numbers are
+    converted to the declared type as they are read: an int field rejects
+    numbers with a fraction or exponent, and float and Decimal fields take
+    any number.  Raises ValueError for a schema it cannot compile.
+    """
+    if isinstance(schema, dict):
+        schema = _record_class(schema, name)
+    return SchemaParser(_compile(schema, {}), schema)
+
+
+def _compile(schema, compiled):
+    """Returns the _Node for schema, reusing those in compiled."""
+    if schema in (str, int, float, Decimal, bool):
+        return _Scalar(schema)
+    if schema is None or schema is type(None):
+        return _Scalar(None)
+    if schema is typing.Any or schema is object:
+        return _Any()
+    origin = typing.get_origin(schema)
+    args = typing.get_args(schema)
+    if origin is typing.Union or origin is types.UnionType:
+        others = [arg for arg in args if arg is not type(None)]
+        if len(others) != 1 or len(others) == len(args):
+            raise ValueError(f"Only a union of one type with None is supported, not {schema!r}")
+        return _Optional(_compile(others[0], compiled))
+    if schema is list or origin is list:
+        return _List(_compile(args[0], compiled) if args else _Any())
+    if schema is dict or origin is dict:
+        if args and args[0] is not str:
+            raise ValueError(f"Object keys are str, not {args[0]!r}")
+        return _Object(rest=_compile(args[1], compiled) if args else _Any())
+    if not isinstance(schema, type) or not (dataclasses.is_dataclass(schema) or typing.is_typeddict(schema)):
+        raise ValueError(f"Unsupported type in schema: {schema!r}")
+
+    node = compiled.get(schema)
+    if node is None:
+        # Registered before its fields are compiled, so they can refer to it.
+        node = compiled[schema] = _Object()
+        hints = typing.get_type_hints(schema)
+        if typing.is_typeddict(schema):
+            names = list(hints)
+            node.required = tuple(schema.__required_keys__)
+        else:
+            fields = [field for field in dataclasses.fields(schema) if field.init]
+            names = [field.name for field in fields]
+            node.required = tuple(field.name for field in fields
+                                  if field.default is dataclasses.MISSING
+                                  and field.default_factory is dataclasses.MISSING)
+            node.make = lambda values: schema(**values)
+        node.fields = {name: _compile(hints[name], compiled) for name in names}
+    return node
+
+
+def _record_class(spec, name):
+    """Returns a dataclass with __slots__ for a dict spec.
+
+    Nested specs become classes of their own, named after name and their
+    key.  Optional fields default to None; the rest are required.
+    """
+    fields = []
+    for key, schema in spec.items():
+        if not isinstance(key, str) or not key.isidentifier() or keyword.iskeyword(key):
+            raise ValueError(f"{key!r} cannot be a field name")
+        if isinstance(schema, dict):
+            schema = _record_class(schema, f'{name}_{key}')
+        if type(None) in typing.get_args(schema):
+            fields.append((key, schema, dataclasses.field(default=None)))
+        else:
+            fields.append((key, schema))
+    return dataclasses.make_dataclass(name, fields, slots=True, kw_only=True)
@@ -0,0 +1,110 @@
+"""Unit tests for schema-compiled parsing."""
+
+from dataclasses import dataclass, field
+from decimal import Decimal
+from typing import Any, Optional, TypedDict
+import unittest
+from json_schema import SchemaError, compile_schema
+
+
+@dataclass(slots=True)
+class Item:
+    sku: str
+    price: float
+    qty: int = 1
+    tags: list[str] = field(default_factory=list)
+
+
+@dataclass(slots=True)
+class Order:
+    id: int
+    items: list[Item]
+    note: Optional[str] = None
+    meta: dict[str, Any] = field(default_factory=dict)
+
+
+@dataclass
+class Tree:
+    value: int
+    children: list['Tree']
+
+
+class Totals(TypedDict):
+    count: int
+    amount: Decimal
+
+
+class TestCompileSchema(unittest.TestCase):
+
+    document = ('{"id": 7, "unknown": {"x": [1, "\\"", {"y": null}]}, "items": ['
+                '{"sku": "a\\u00e9", "price": 3, "tags": ["x"]}, {"sku": "b", "price": 2.5, "qty": 4}],'
+                ' "meta": {"k": [1]}}')
+    expected = Order(7, [Item('aé', 3.0, 1, ['x']), Item('b', 2.5, 4)], None, {'k': [1]})
+
+    def test_reads_dataclasses(self):
+        parser = compile_schema(Order)
+        self.assertIs(parser.type, Order)
+        self.assertEqual(parser.parse(self.document), self.expected)
+        self.assertEqual(parser.parse(self.document.encode()), self.expected)
+
+    def test_numbers_take_the_declared_type(self):
+        order = compile_schema(Order).parse(self.document)
+        self.assertIs(type(order.items[0].price), float)
+        totals = compile_schema(Totals).parse('{"count": 2, "amount": 1.10}')
+        self.assertEqual(totals, {'count': 2, 'amount': Decimal('1.10')})
+
+    def test_typed_dicts_are_dicts(self):
+        self.assertEqual(compile_schema(Totals).parse('{"amount": 1, "count": 0, "other": true}'),
+                         {'count': 0, 'amount': Decimal(1)})
+
+    def test_dict_specs_make_slotted_records(self):
+        parser = compile_schema({'name': str, 'at': {'x': float, 'y': float}, 'label': Optional[str]}, 'Point')
+        point = parser.parse('{"at": {"y": 2, "x": 1}, "name": "p"}')
+        self.assertEqual((point.name, point.at.x, point.at.y, point.label), ('p', 1.0, 2.0, None))
+        self.assertEqual(parser.type.__name__, 'Point')
+        self.assertEqual(parser.type.__slots__, ('name', 'at', 'label'))
+        with self.assertRaises(ValueError):
+            compile_schema({'not a name': int})
+
+    def test_recursive_dataclasses(self):
+        tree = compile_schema(Tree).parse('{"value": 1, "children": [{"value": 2, "children": []}]}')
+        self.assertEqual(tree, Tree(1, [Tree(2, [])]))
+
+    def test_iter_array(self):
+        items = compile_schema(Item).iter_array('[{"sku": "a", "price": 1}, {"sku": "b", "price": 2}]')
+        self.assertEqual(list(items), [Item('a', 1.0), Item('b', 2.0)])
+        self.assertEqual(list(compile_schema(Item).iter_array(' [ ] ')), [])
+
+    def test_mismatches_report_their_path(self):
+        parser = compile_schema(Order)
+        cases = {
+            '{"id": 1.5, "items": []}': ("Expected an integer but got 1.5", ['id']),
+            '{"id": 1, "items": [{"sku": "a", "price": 1}, {"sku": "b", "price": "x"}]}':
+                ("Expected a number but got a string", ['items', 1, 'price']),
+            '{"id": 1, "items": {}}': ("Expected an array but got an object", ['items']),
+            '{"items": []}': ("Missing 'id'", []),
+        }
+        for document, (message, path) in cases.items():
+            with self.assertRaises(SchemaError, msg=document) as cm:
+                parser.parse(document)
+            self.assertEqual((cm.exception.message, cm.exception.path), (message, path))
+
+    def test_mismatches_report_lines_with_spans(self):
+        with self.assertRaises(SchemaError) as cm:
+            compile_schema(Order).parse('{\n  "id": 1,\n  "items": [{"sku": 5, "price": 1}]}', spans=True)
+        self.assertEqual((cm.exception.line, cm.exception.column), (3, 21))
+        self.assertEqual(str(cm.exception), "Expected a string but got a number at $['items'][0]['sku'] (line 3, column 21)")
+
+    def test_invalid_json_is_a_runtime_error(self):
+        for document in ('{"id": 1, "items": [}', '{"id": 1 "items": []}', '{"id": 1, "items": []} 2'):
+            with self.assertRaises(RuntimeError, msg=document):
+                compile_schema(Order).parse(document)
+
+    def test_rejects_unsupported_schemas(self):
+        for schema in (set[int], dict[int, str], int | str, complex):
+            with self.assertRaises(ValueError, msg=schema):
+                compile_schema(schema)
+
+
+if __name__ == "__main__":
+    unittest.main()
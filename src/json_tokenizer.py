@@ -1,12 +1,133 @@
-```
+import codecs
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+import cProfile
+from decimal import Decimal
+from array import array
+from bisect import bisect_left
 from enum import Enum
+import mmap
+from itertools import accumulate, chain, islice, repeat
+from operator import add, itemgetter
+import pstats
 import re
+import sys
+import time
+import tracemalloc
 from typing import Tuple
 
-number_pattern = re.compile(r'^[-+]?(\d*\.\d+|\d+(\.\d*)?)$')
-escape_sequence_pattern = re.compile(r'[\\\'"nrtbf]')
+try:
+    import numpy
+except ImportError: # NumPy is optional; structural_index falls back to re
+    numpy = None
+
+number_pattern = re.compile(r'^-?(0|[1-9]\d*)(\.\d+)?([eE][+-]?\d+)?\Z')
+escape_sequence_pattern = re.compile(r'[\\"/nrtbfu]')
 whitespace_pattern = re.compile(r'\s')
 
+# Master patterns for the regex engine.  Outside of strings a single match
+# consumes any leading whitespace together with a structural character, a
+# complete string, a number, a keyword or a run of anything else.  Only
+# trailing whitespace matches with no group set.  badnumber is the longest
+# run that _number_transitions accepts when it does not end in an accepting
+# state, such as '-', '1.', '2e+' or '012'; the (?!\d) guards stop number from
+# backtracking into a shorter valid prefix of one.
+token_pattern = re.compile(r'''
+    \s*
+    (?:
+    (?P<structural>[{}\[\],:])
+  | (?P<number>-?(?:0(?!\d)|[1-9]\d*(?!\d))(?:\.\d+(?!\d)(?:[eE][+-]?\d+(?!\d)|(?![eE]))
+                                   |[eE][+-]?\d+(?!\d)
+                                   |(?![.eE])))
+  | (?P<badnumber>(?=[-\d])-?(?:0\d+|(?:0|[1-9]\d*)(?:\.(?:\d+(?:[eE][+-]?\d*)?)?|[eE][+-]?\d*)?)?)
+  | "(?P<string>[^"\\]*(?:\\.[^"\\]*)*)"
+  | (?P<keyword>true|false|null)
+  | (?P<quote>")
+  | (?P<word>[^\s{}\[\],:"]+)
+    )?
+''', re.VERBOSE | re.DOTALL)
+word_pattern = re.compile(r'[^\s{}\[\],:"]+')
+# token_pattern for numeric_arrays, which first tries to match a whole
+# array of nothing but numbers as numbers.  The repeat is possessive so
+# that a long array that turns out to hold something else fails without
+# backtracking.
+_json_number = r'-?(?:0|[1-9]\d*)(?:\.\d+)?(?:[eE][+-]?\d+)?'
+_number_array = rf'\[\s*{_json_number}(?:\s*,\s*{_json_number})*+\s*\]'
+numeric_token_pattern = re.compile(token_pattern.pattern.replace(
+    '(?:\n', f'(?:\n    (?P<numbers>{_number_array})\n  |', 1), re.VERBOSE | re.DOTALL)
+# For the raw skip in _RegexScanner.skip: everything up to the next bracket
+# outside strings, whole strings included, then the bracket, or the quote
+# of a string that does not close.
+skip_pattern = re.compile(r'''
+    (?:[^"\[\]{}]++|"[^"\\]*+(?:\\.[^"\\]*+)*+")*+
+    (?:(?P<open>[\[{])|(?P<close>[\]}])|(?P<quote>"))?
+''', re.VERBOSE | re.DOTALL)
+# For the bulk scan in _RegexScanner._scan_runs: one whole token with any
+# whitespace before it, or whitespace alone.  Numbers and keywords only
+# match when a delimiter follows, and strings only without a run of over
+# 256 plain characters, which are cheaper to scan with the master pattern.
+# run_pattern takes all the rest from the first place where no piece
+# matches as one last piece.
+piece_pattern = re.compile(r'''
+    \s*+(?:[{}\[\],:]
+      | "[^"\\]{0,256}+(?:\\.[^"\\]{0,256}+)*+"
+      | (?:-?+(?:0|[1-9]\d*+)(?:\.\d++)?+(?:[eE][+-]?+\d++)?+|true|false|null)(?=[\s{}\[\],:"]|\Z))
+  | \s+
+''', re.VERBOSE | re.DOTALL)
+run_pattern = re.compile(piece_pattern.pattern + '| .+', re.VERBOSE | re.DOTALL)
+number_piece_pattern = re.compile(r'\s*+[-\d]')
+# A run of digits that may not fit in 64 bits.
+long_int_pattern = re.compile(r'\d{19}')
+# Inside a string: a run of plain characters, the closing quote or an escape.
+string_pattern = re.compile(r'(?P<run>[^"\\]+)|(?P<end>")|(?P<escape>\\.?)', re.DOTALL)
+
+# The same patterns for scanning undecoded UTF-8.  Every byte of a multi-byte
+# character is >= 0x80, so none can be mistaken for a structural byte.
+token_bytes_pattern = re.compile(token_pattern.pattern.encode(), re.VERBOSE | re.DOTALL)
+word_bytes_pattern = re.compile(word_pattern.pattern.encode())
+string_bytes_pattern = re.compile(string_pattern.pattern.encode(), re.DOTALL)
+escape_sequence_bytes_pattern = re.compile(escape_sequence_pattern.pattern.encode())
+numeric_token_bytes_pattern = re.compile(numeric_token_pattern.pattern.encode(), re.VERBOSE | re.DOTALL)
+piece_bytes_pattern = re.compile(piece_pattern.pattern.encode(), re.VERBOSE | re.DOTALL)
+run_bytes_pattern = re.compile(run_pattern.pattern.encode(), re.VERBOSE | re.DOTALL)
+number_piece_bytes_pattern = re.compile(number_piece_pattern.pattern.encode())
+skip_bytes_pattern = re.compile(skip_pattern.pattern.encode(), re.VERBOSE | re.DOTALL)
+newline_pattern = re.compile('\n')
+
+# The JSON number grammar as a state machine, so that a number can be read
+# one character at a time without re-matching what has been read so far.
+_digits = '0123456789'
+_number_start = {'-': 'sign', '0': 'zero', **dict.fromkeys(_digits[1:], 'int')}
+_number_transitions = {
+    'sign': {'0': 'zero', **dict.fromkeys(_digits[1:], 'int')},
+    'zero': {**dict.fromkeys(_digits, 'leading_zero'), '.': 'point', 'e': 'exponent', 'E': 'exponent'},
+    'leading_zero': dict.fromkeys(_digits, 'leading_zero'),
+    'int': {**dict.fromkeys(_digits, 'int'), '.': 'point', 'e': 'exponent', 'E': 'exponent'},
+    'point': dict.fromkeys(_digits, 'fraction'),
+    'fraction': {**dict.fromkeys(_digits, 'fraction'), 'e': 'exponent', 'E': 'exponent'},
+    'exponent': {**dict.fromkeys(_digits, 'power'), '+': 'exponent_sign', '-': 'exponent_sign'},
+    'exponent_sign': dict.fromkeys(_digits, 'power'),
+    'power': dict.fromkeys(_digits, 'power'),
+}
+_number_accepting = frozenset(('zero', 'int', 'fraction', 'power'))
+newline_bytes_pattern = re.compile(b'\n')
+
+# Escapes in the raw contents of a string.  A \u escape is followed by its
+# four hex digits as ordinary string characters, and a surrogate pair is
+# decoded as one match.
+string_escape_pattern = re.compile(r'''
+    \\(?:
+      u(?P<high>[dD][89abAB][0-9a-fA-F]{2})\\u(?P<low>[dD][c-fC-F][0-9a-fA-F]{2})
+    | u(?P<code>[0-9a-fA-F]{4})
+    | (?P<char>.)
+    )
+''', re.VERBOSE | re.DOTALL)
+_escaped_chars = {
+    '"': '"', '\\': '\\', '/': '/',
+    'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t',
+}
+
 class TokenType(Enum):
     BEGIN_OBJECT = 1
     BEGIN_ARRAY = 2
@@ -24,17 +145,504 @@ class TokenType(Enum):
     STRING_CHAR = 14
     ERROR = 15
     END = 16
+    NUMBER_ARRAY = 17 # a whole array of numbers, only scanned with numeric_arrays
+
+    # Members are singletons, so hash them by identity in C rather than by
+    # name in Python; token types are looked up in dicts and sets per token.
+    __hash__ = object.__hash__
+
+_structural_tokens = {
+    '{': (TokenType.BEGIN_OBJECT, '{'),
+    '[': (TokenType.BEGIN_ARRAY, '['),
+    '}': (TokenType.END_OBJECT, '}'),
+    ']': (TokenType.END_ARRAY, ']'),
+    ',': (TokenType.VALUE_SEPARATOR, ','),
+    ':': (TokenType.NAME_SEPARATOR, ':'),
+}
+_keyword_tokens = {
+    'true': (TokenType.TRUE, 'true'),
+    'false': (TokenType.FALSE, 'false'),
+    'null': (TokenType.NULL, 'null'),
+}
+_BEGIN_STRING = (TokenType.BEGIN_STRING, '"')
+_END_STRING = (TokenType.END_STRING, '"')
+_END = (TokenType.END, '')
+# Groups of token_pattern whose match could continue into the next chunk.
+_extensible = frozenset(('number', 'badnumber', 'keyword', 'word'))
+
+
+class _RegexScanner:
+    """Scans whole runs of input with one master pattern per step.
+
+    Produces exactly the same tokens as Tokenizer._tokenizer, but dispatches
+    on the name of the matched group instead of looking at every character.
+    Stretches of plain tokens are first split up in bulk by _scan_runs.
+    Tokens are handed out in batches so that chain.from_iterable can flatten
+    them without resuming a generator per token.
+    """
+
+    batch_size = 4096
+    token_pattern = token_pattern
+    word_pattern = word_pattern
+    string_pattern = string_pattern
+    escape_sequence_pattern = escape_sequence_pattern
+    numeric_token_pattern = numeric_token_pattern
+    skip_pattern = skip_pattern
+    piece_pattern = piece_pattern
+    run_pattern = run_pattern
+    number_piece_pattern = number_piece_pattern
+    structural_tokens = _structural_tokens
+    keyword_tokens = _keyword_tokens
+    empty = ''
+    backslash = '\\'
+    quote = '"'
+    closers = (',', ']', '}') # the characters a run for _scan_runs may end with
+    runs = False # whether a run of string characters is one token
+    run_size = 1 << 14 # the most text _scan_runs takes at once
+
+    def __init__(self, numeric_arrays=False, string_runs=False):
+        self.numeric_arrays = numeric_arrays # whether arrays of numbers are one NUMBER_ARRAY token
+        if string_runs:
+            self.runs = True
+        self.reading_string = False
+        self.buffer = '' # unrecognised characters carried between words
+        self.tail = self.empty # end of the last chunk, which the next one may extend
+        self.text = None # the text feed is paused in between batches, if any
+        self.pos = 0 # where in text the next batch starts
+
+    def feed(self, text, final=False):
+        """Yields lists of the tokens in text.
+
+        Unless final is set, a number, keyword, word or escape that runs up
+        to the end of text is held back and scanned again with the next
+        chunk, so tokens split across chunk boundaries come out whole.
+
+        While feed is paused after a batch part way through text, text and
+        pos say where it will go on from; skip may move pos on.
+        """
+        if self.tail:
+            text = self.empty.join((self.tail, text))
+            self.tail = self.empty
+        pos = 0
+        end = len(text)
+        batch_size = self.batch_size
+        structural_tokens = self.structural_tokens
+        number_text = self.number_text
+        pattern = self.numeric_token_pattern if self.numeric_arrays else self.token_pattern
+        bulk = not self.numeric_arrays and text.__class__ in (str, bytes)
+        retry = 0 # where to try _scan_runs again after text it could not take
+        runs = self.runs
+        STRING_CHAR = TokenType.STRING_CHAR
+        NUMBER = TokenType.NUMBER
+        batch = []
+        append = batch.append
+        extend = batch.extend
+        while pos < end:
+            if self.reading_string:
+                pos = self._scan_string(text, pos, batch, final)
+                continue
+            if bulk and pos >= retry and not self.buffer:
+                # Up to run_size characters, to the last closer among them,
+                # are scanned in bulk if they can be; the rest of a chunk
+                # may run on into the next one.
+                limit = pos + self.run_size
+                if final and limit >= end:
+                    stop = end
+                else:
+                    stop = max(text.rfind(c, pos, limit) for c in self.closers) + 1
+                if stop > pos:
+                    scanned, batch = yield from self._scan_runs(text, pos, stop, batch)
+                    append = batch.append
+                    extend = batch.extend
+                    if scanned != pos:
+                        pos = scanned
+                        continue
+                retry = pos + 1 # after at least one batch from the master pattern
+
+            for m in pattern.finditer(text, pos):
+                if len(batch) >= batch_size:
+                    self.text = text
+                    self.pos = pos = m.start()
+                    yield batch
+                    self.text = None
+                    batch = []
+                    append = batch.append
+                    extend = batch.extend
+                    if self.pos != pos:
+                        pos = self.pos # skip moved on; scan again from there
+                        break
+                    if bulk and pos >= retry:
+                        break
+                kind = m.lastgroup
+                if kind == 'structural':
+                    append(structural_tokens[m.group(kind)])
+                    continue
+                if not final and m.end() == end and kind in _extensible:
+                    self.tail = text[m.start(kind):]
+                    pos = end
+                    break
+                if self.buffer and (kind == 'keyword' or kind == 'number' or kind == 'badnumber'):
+                    # Characters carried over from an earlier word change
+                    # how this one is read, so it takes the slow path whole.
+                    start = m.start(kind)
+                    pos = self.word_pattern.match(text, start).end()
+                    if not final and pos == end:
+                        self.tail = text[start:]
+                    else:
+                        self.buffer = self._scan_word(text[start:pos], batch)
+                    break
+                elif kind == 'number':
+                    append((NUMBER, number_text(m.group(kind))))
+                elif kind == 'numbers':
+                    append((TokenType.NUMBER_ARRAY, number_text(m.group(kind)[1:-1])))
+                elif kind == 'string':
+                    append(_BEGIN_STRING)
+                    content = m.group(kind)
+                    if self.backslash in content:
+                        self._scan_string(content, 0, batch, True)
+                    elif runs:
+                        if content:
+                            append((STRING_CHAR, content))
+                    else:
+                        extend(zip(repeat(STRING_CHAR), content))
+                    append(_END_STRING)
+                elif kind == 'keyword':
+                    append(self.keyword_tokens[m.group(kind)])
+                elif kind == 'quote':
+                    self.reading_string = True
+                    append(_BEGIN_STRING)
+                    pos = m.end()
+                    break
+                elif kind == 'word':
+                    self.buffer = self._scan_word(m.group(kind), batch)
+                elif kind == 'badnumber':
+                    append((TokenType.ERROR, number_text(m.group(kind))))
+            else:
+                pos = end
+        if batch:
+            yield batch
+
+    def close(self):
+        """Yields lists of the tokens held back by feed, then END."""
+        yield from self.feed(self.empty, final=True)
+        yield [_END]
+
+    def skip(self, depth):
+        """Skips the ends of depth open containers in the raw text.
+
+        Only possible while feed is paused between batches, when the
+        containers are those of the tokens handed out so far.  Brackets are
+        counted, outside strings, without any tokens being made, and
+        nothing else is checked.  Returns how many containers are still
+        open: 0 once the last has closed.  Otherwise the text ran out first,
+        and pos is left after the last bracket passed, or at a string that
+        does not close in text, for feed to scan the rest.
+        """
+        text = self.text
+        if text is None or self.buffer:
+            return depth
+        for m in self.skip_pattern.finditer(text, self.pos):
+            kind = m.lastgroup
+            if kind == 'open':
+                depth += 1
+            elif kind == 'close':
+                depth -= 1
+                if not depth:
+                    self.pos = m.end()
+                    return 0
+            else:
+                if kind == 'quote':
+                    self.pos = m.start(kind)
+                return depth
+            self.pos = m.end()
+        return depth
+
+    @staticmethod
+    def number_text(number):
+        return number
+
+    def _scan_runs(self, text, pos, stop, batch):
+        """Scans text from pos towards stop in bulk, as far as piece_pattern goes.
+
+        The text is split into pieces with run_pattern in one call, and the
+        tokens of each distinct piece are made once and looked up for the
+        rest, so a batch is built without a step per match.  Yields full
+        batches as feed does.  Returns where it stopped, which is where the
+        master pattern is needed if that is short of stop, or wherever skip
+        moved on to, and the batch being filled.
+        """
+        pieces = self.run_pattern.findall(text, pos, stop)
+        if not self.piece_pattern.fullmatch(pieces[-1]):
+            stop -= len(pieces.pop())
+        distinct = set(pieces)
+        # Numbers, most often all different, have their tokens made in C.
+        numbers = list(filter(self.number_piece_pattern.match, distinct))
+        texts = map(self.number_text, map(self.empty.__class__.lstrip, numbers))
+        tokens = dict(zip(numbers, zip(zip(repeat(TokenType.NUMBER), texts))))
+        distinct.difference_update(numbers)
+        tokens.update(zip(distinct, map(self._piece_tokens, distinct)))
+        lookup = tokens.__getitem__
+        batch_size = self.batch_size
+        step = max(batch_size // 4, 1)
+        for start in range(0, len(pieces), step):
+            part = pieces[start:start + step]
+            batch.extend(chain.from_iterable(map(lookup, part)))
+            pos += sum(map(len, part))
+            if len(batch) >= batch_size and pos < stop:
+                self.text = text
+                self.pos = pos
+                yield batch
+                self.text = None
+                batch = []
+                if self.pos != pos:
+                    return self.pos, batch # skip moved on
+        return pos, batch
+
+    def _piece_tokens(self, piece):
+        """Returns the tokens of a piece matched by run_pattern, as a tuple.
+
+        Pieces that are numbers are left to _scan_runs.
+        """
+        piece = piece.lstrip()
+        if piece[:1] == self.quote:
+            content = piece[1:-1]
+            tokens = [_BEGIN_STRING]
+            if self.backslash in content:
+                self._scan_string(content, 0, tokens, True)
+            elif self.runs:
+                if content:
+                    tokens.append((TokenType.STRING_CHAR, content))
+            else:
+                tokens.extend(zip(repeat(TokenType.STRING_CHAR), content))
+            tokens.append(_END_STRING)
+            return tuple(tokens)
+        if not piece:
+            return ()
+        token = self.structural_tokens.get(piece) or self.keyword_tokens[piece]
+        return (token,)
+
+    def _scan_string(self, text, pos, batch, final):
+        """Scans string contents from pos, returning where it stopped.
+
+        Stops after the closing quote, if there is one.
+        """
+        STRING_CHAR = TokenType.STRING_CHAR
+        for m in self.string_pattern.finditer(text, pos):
+            kind = m.lastgroup
+            if kind == 'run':
+                if self.runs:
+                    batch.append((STRING_CHAR, m.group()))
+                else:
+                    batch.extend(zip(repeat(STRING_CHAR), m.group()))
+            elif kind == 'end':
+                self.reading_string = False
+                batch.append(_END_STRING)
+                return m.end()
+            else:
+                escape = m.group()
+                if len(escape) == 1:
+                    if not final:
+                        self.tail = escape
+                    break # input ends inside an escape
+                if self.escape_sequence_pattern.match(escape, 1):
+                    batch.append((STRING_CHAR, escape))
+                else:
+                    batch.append((TokenType.ERROR, escape))
+        return len(text)
+
+    def _scan_word(self, word, batch):
+        """Slow path for text the master pattern could not classify.
+
+        Feeds the characters one at a time through the same buffer logic as
+        Tokenizer._tokenizer, appending tokens to batch, and returns whatever
+        is left in the buffer.
+        """
+        if not isinstance(word, str):
+            word = str(word, 'utf-8', 'replace')
+        buffer = self.buffer
+        number_state = None
+        for char in word:
+            if number_state:
+                next_state = _number_transitions[number_state].get(char)
+                if next_state:
+                    number_state = next_state
+                    buffer += char
+                    continue
+                token_type = TokenType.NUMBER if number_state in _number_accepting else TokenType.ERROR
+                batch.append((token_type, buffer))
+                buffer = ''
+                number_state = None
+            if not buffer and char in _number_start:
+                number_state = _number_start[char]
+                buffer = char
+                continue
+            buffer += char
+            if buffer in _keyword_tokens:
+                batch.append(_keyword_tokens[buffer])
+                buffer = ''
+            elif len(buffer) > 5:
+                batch.append((TokenType.ERROR, buffer))
+                buffer = ''
+        if number_state:
+            token_type = TokenType.NUMBER if number_state in _number_accepting else TokenType.ERROR
+            batch.append((token_type, buffer))
+            buffer = ''
+        return buffer
+
+
+class _BytesScanner(_RegexScanner):
+    """Scans undecoded UTF-8 input with the bytes versions of the patterns.
+
+    Structural characters, numbers and keywords come out as str, just as
+    they do for text input.  Inside strings each run of plain bytes is one
+    STRING_CHAR token and the run, escapes and errors are left as bytes, so
+    only the strings a caller actually materialises are ever decoded.  A
+    leading UTF-8 byte order mark is skipped.
+    """
+
+    token_pattern = token_bytes_pattern
+    word_pattern = word_bytes_pattern
+    string_pattern = string_bytes_pattern
+    escape_sequence_pattern = escape_sequence_bytes_pattern
+    numeric_token_pattern = numeric_token_bytes_pattern
+    skip_pattern = skip_bytes_pattern
+    piece_pattern = piece_bytes_pattern
+    run_pattern = run_bytes_pattern
+    number_piece_pattern = number_piece_bytes_pattern
+    structural_tokens = {k.encode(): v for k, v in _structural_tokens.items()}
+    keyword_tokens = {k.encode(): v for k, v in _keyword_tokens.items()}
+    empty = b''
+    backslash = b'\\'
+    quote = b'"'
+    closers = (b',', b']', b'}')
+    runs = True
+
+    def __init__(self, numeric_arrays=False, string_runs=False):
+        super().__init__(numeric_arrays, string_runs)
+        self.started = False # whether the start of input has been checked for a BOM
+
+    def feed(self, text, final=False):
+        if not self.started:
+            if self.tail:
+                text = self.empty.join((self.tail, text))
+                self.tail = self.empty
+            if not final and len(text) < len(codecs.BOM_UTF8) and codecs.BOM_UTF8.startswith(text):
+                self.tail = bytes(text)
+                return
+            self.started = True
+            if text[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8:
+                text = memoryview(text)[len(codecs.BOM_UTF8):]
+        yield from super().feed(text, final)
+
+    @staticmethod
+    def number_text(number):
+        return number.decode('ascii')
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+
+# Integers common enough to look up rather than convert.
+_small_ints = {str(i): i for i in range(-256, 1025)}
+binary_types = (bytes, bytearray, memoryview, mmap.mmap)
+
 
 class Tokenizer:
 
-    def __init__(self, inputs):
-        """Initializes tokenizer with input stream inputs."""
+    engines = ('char', 'regex')
+
+    def __init__(self, inputs, engine='char', chunk_size=DEFAULT_CHUNK_SIZE, spans=False,
+                 use_decimal=False, keys=None, intern_values=0, stats=None, numeric_arrays=None,
+                 string_runs=False):
+        """Initializes tokenizer with input stream inputs.
+
+        inputs may be a str, a text file object or stream with a read method,
+        or any iterable of characters.  Files and iterables are read
+        chunk_size characters at a time, so only about one chunk of input is
+        held in memory.
+
+        inputs may also be UTF-8 in bytes, a bytearray, a memoryview, an mmap
+        or a binary file.  The 'regex' engine scans these without decoding
+        them and hands out the contents of each string as runs of raw bytes,
+        which match_string decodes; the 'char' engine decodes them first.
+
+        inputs may also be a TokenTape, whose tokens are walked again
+        without scanning.
+
+        With spans set the tokens are Span objects, which record where they
+        are in the input and their line and column, and only slice out
+        their text when asked.  Spans are always scanned in runs, like a
+        TokenTape, whichever engine is chosen.
+
+        engine selects the scanner: 'char' looks at one character at a time,
+        'regex' consumes whole runs of input with a compiled master pattern.
+        Both produce the same token sequence.  lineno and charno are only
+        maintained by the 'char' engine.
+
+        match_number and match_value return numbers as int, or as float when
+        they have a fraction or exponent; with use_decimal set those are
+        returned as decimal.Decimal instead, so that no precision is lost.
+
+        Object keys are interned in keys, a KeyTable, so that each distinct
+        key is one str however many objects use it.  Pass the same KeyTable
+        to several Tokenizers to share it between parses.  String values of
+        at most intern_values characters are interned in the same table.
+
+        With stats, a ParseStats, every token is counted and timed on its
+        way out of the scanner.  Without it the token stream is not wrapped
+        at all, so there is nothing to pay.
+
+        With numeric_arrays set, the 'regex' engine scans each array that
+        holds only numbers, and is whole within a chunk, as a single
+        NUMBER_ARRAY token, which match_value converts in one go: to an
+        array.array of 'q' if the numbers are all integers, else of 'd', for
+        numeric_arrays='array', or to a NumPy array for 'numpy'.  NumPy
+        does the conversion whenever it is installed.  Arrays with integers
+        too big for 64 bits, and fractions with use_decimal set, come out
+        as a list, so no number loses precision.
+
+        With string_runs set, the 'regex' engine hands out each run of
+        plain characters inside a string as one STRING_CHAR token for str
+        input too, as it always does for binary input, rather than one per
+        character.  Values come out the same, but there are far fewer
+        tokens to make for documents heavy in strings.
+        """
+        if engine not in self.engines:
+            raise ValueError(f"Unknown engine {engine!r}, expected one of {self.engines}")
+        if numeric_arrays not in (None, 'array', 'numpy'):
+            raise ValueError(f"Unknown numeric_arrays {numeric_arrays!r}, expected 'array' or 'numpy'")
+        if numeric_arrays and (engine != 'regex' or spans or isinstance(inputs, TokenTape)):
+            raise ValueError("numeric_arrays needs the 'regex' engine, without spans or a TokenTape")
+        if numeric_arrays == 'numpy' and numpy is None:
+            raise ValueError("numeric_arrays='numpy' needs NumPy installed")
+        if string_runs and engine != 'regex':
+            raise ValueError("string_runs needs the 'regex' engine")
         self.inputs = inputs
+        self.engine = engine
+        self.chunk_size = chunk_size
+        self.use_decimal = use_decimal
+        self.keys = KeyTable() if keys is None else keys
+        self.intern_values = intern_values
+        self.stats = stats
+        self.numeric_arrays = numeric_arrays
+        self.string_runs = string_runs
         self.lineno = 1  # current line being parsed
         self.charno = 1  # current character being parsed
         self.current_line = "" # characters read so far on current line.
         self.buffer = None # token read from input that has not yet been parsed
-        self.token_stream = self._tokenizer(inputs)
+        self.scanner = None # the regex engine's scanner, which _skip may move on
+        self.batch = None # the iterator over the scanner's batch of tokens in use
+        if isinstance(inputs, TokenTape):
+            self.token_stream = iter(inputs)
+            if stats is not None and len(inputs):
+                stats.consumed += inputs.span(len(inputs) - 1)[1] - inputs.span(0)[0]
+        elif spans:
+            self.token_stream = chain.from_iterable(self._span_tokenizer(inputs))
+        elif engine == 'regex':
+            self.token_stream = self._regex_tokenizer(inputs)
+        else:
+            self.token_stream = self._tokenizer(inputs)
+        if stats is not None:
+            self.token_stream = stats.watch(self.token_stream)
 
     def seeing(self, token_type) -> bool:
         """Returns True if next token in the input stream is of the given type."""
@@ -59,61 +667,403 @@ class Tokenizer:
         return t[1]
 
     def match_string(self) -> str:
-        """Matches a string token, e.g., "char*". """
+        """Matches a string token, e.g., "char*", and returns its value.
+
+        Escapes are decoded, including \\u escapes and surrogate pairs.
+        Strings scanned from binary input are decoded here, from UTF-8.  A
+        string read as a single run without escapes is returned as it is.
+        """
         self.match(TokenType.BEGIN_STRING)
-        s = ""
-        while not self.seeing(TokenType.END_STRING):
-            s = s + self.get()[1]
-        self.match(TokenType.END_STRING)
-        return s
-    
-    def match_number(self) -> str:
-        """Matches a number token, e.g., 123.45"""
-        return self.match(TokenType.NUMBER)
+        return self._string(self.get())
+
+    def match_number(self):
+        """Matches a number token, e.g., 123.45, and returns its value.
+
+        The value is an int, or a float (a Decimal with use_decimal set) if
+        the number has a fraction or an exponent.
+        """
+        return self._number(self.match(TokenType.NUMBER))
 
     def match_value(self):
-        if self.seeing(TokenType.BEGIN_OBJECT):
-            return self.match_object()
-        elif self.seeing(TokenType.BEGIN_ARRAY):
-            return self.match_array()
-        elif self.seeing(TokenType.BEGIN_STRING):
-            return self.match_string()
-        elif self.seeing(TokenType.NUMBER):
-            return self.get()
-        elif self.seeing(TokenType.NULL):
-            return self.get()
-        elif self.seeing(TokenType.TRUE):
-            return self.get()
-        elif self.seeing(TokenType.FALSE):
-            return self.get()
-        else:
-            raise RuntimeError(f"Invalid token in match_value: {self.next_token()}")
+        """Matches any value and returns it as a Python object.
 
-    def match_object(self):
-        """Matches a an object."""
-        self.match(TokenType.BEGIN_OBJECT)
-        d = {}
+        true, false and null are returned as True, False and None.  Nested
+        containers are built on an explicit stack rather than by recursion,
+        so there is no limit on how deeply they may nest.
+        """
+        token = self.get()
+        # Nothing is ever pushed back while a value is read, so the tokens
+        # after the first come straight from the stream.
+        get = self.token_stream.__next__
+        scalars = self.scalar_readers()
+        shapes = self.keys.shapes
+        keys = self.keys
+        stack = [] # the lists and _ObjectFrames of the open containers
         while True:
-            key = self.match_string()
-            self.match(TokenType.NAME_SEPARATOR)
-            value = self.match_value()
-            d[key] = value
-            if self.seeing(TokenType.END_OBJECT):
-                break
-            self.match(TokenType.VALUE_SEPARATOR)
-        self.match(TokenType.END_OBJECT)
-        return d
+            kind = token[0]
+            scalar = scalars.get(kind)
+            if scalar is not None:
+                value = scalar(token)
+            elif kind is TokenType.BEGIN_ARRAY:
+                token = get()
+                if token[0] is not TokenType.END_ARRAY:
+                    stack.append([])
+                    continue
+                value = []
+            elif kind is TokenType.BEGIN_OBJECT:
+                token = get()
+                if token[0] is not TokenType.END_OBJECT:
+                    # Keys are looked up in the shape cache as they are
+                    # read, and the dict is built from the cached key tuple.
+                    stack.append(_ObjectFrame(shapes.extend(self.read_key(token), keys)))
+                    token = get()
+                    continue
+                value = {}
+            else:
+                raise RuntimeError(f"Invalid token in match_value: {token}")
+
+            # Add the finished value to its container, closing containers
+            # until one expects another value.  This is _next_member, inline
+            # since it runs after every value.
+            while stack:
+                frame = stack[-1]
+                token = get()
+                kind = token[0]
+                if frame.__class__ is list:
+                    frame.append(value)
+                    if kind is TokenType.VALUE_SEPARATOR:
+                        token = get()
+                        break
+                    if kind is not TokenType.END_ARRAY:
+                        raise RuntimeError(f"Expected , or ] but got {token[1]}")
+                    value = stack.pop()
+                else:
+                    frame.values.append(value)
+                    if kind is TokenType.VALUE_SEPARATOR:
+                        frame.shape = frame.shape.extend(self.read_key(get()), keys)
+                        token = get()
+                        break
+                    if kind is not TokenType.END_OBJECT:
+                        raise RuntimeError(f"Expected , or }} but got {token[1]}")
+                    stack.pop()
+                    value = dict(zip(frame.shape.keys, frame.values))
+            else:
+                return value
+
+    def match_object(self):
+        """Matches an object; match_value builds it."""
+        if not self.seeing(TokenType.BEGIN_OBJECT):
+            self.match(TokenType.BEGIN_OBJECT)
+        return self.match_value()
 
     def match_array(self):
-        self.match(TokenType.BEGIN_ARRAY)
-        l = []
+        """Matches an array; match_value builds it."""
+        if not self.seeing(TokenType.BEGIN_ARRAY) and not self.seeing(TokenType.NUMBER_ARRAY):
+            self.match(TokenType.BEGIN_ARRAY)
+        return self.match_value()
+
+    def events(self):
+        """Yields a (prefix, event, value) triple for each parse event.
+
+        The events are those of ijson: start_map, map_key, end_map,
+        start_array, end_array, string, number, boolean and null.  value is
+        the key for map_key, the scalar for the scalar events and None
+        otherwise.  prefix is the path of the value the event belongs to,
+        its keys and 'item' for array elements joined by dots, e.g.
+        'items.item.price', and '' at the top level.  Successive top-level
+        values are all reported, up to the end of the input.
+
+        Only the open containers are held in memory, so inputs of any size
+        can be processed.
+        """
+        return self._events(None)
+
+    def items(self, prefix):
+        """Yields each value at prefix, as match_value would build it.
+
+        prefix is a path as given by events, e.g. 'items.item' for each
+        element of the array under the top-level key 'items'.  Only one
+        value is held in memory at a time.
+        """
+        for _, event, value in self._events(prefix):
+            if event is None:
+                yield value
+
+    def skip_value(self):
+        """Consumes the next value without building it.
+
+        Only the opening and closing tokens of containers and strings are
+        looked at, so nothing inside a skipped value is decoded or checked.
+        With the 'regex' engine, once the tokens already scanned run out,
+        the rest of a container is skipped in the raw input without making
+        tokens for it, as far as the chunk in hand goes.
+        """
+        self.skip(self.get())
+
+    def skip(self, token):
+        """Skips the rest of the value whose first token is token.
+
+        token has been read from the stream already, e.g. by get.  Raises
+        RuntimeError if it cannot start a value.
+        """
+        kind = token[0]
+        if kind is TokenType.BEGIN_STRING:
+            skip_types = _string_end_types
+            depth = 1
+        elif kind is TokenType.BEGIN_OBJECT or kind is TokenType.BEGIN_ARRAY:
+            skip_types = _bracket_types
+            depth = 1
+        elif kind in _scalar_types:
+            return
+        else:
+            raise RuntimeError(f"Invalid token in skip_value: {kind}")
+        scanner = self.scanner if skip_types is _bracket_types else None
+        tokens = self.token_stream if scanner is None else self.batch
         while True:
-            l.append(self.match_value())
-            if self.seeing(TokenType.END_ARRAY):
-                break
-            self.match(TokenType.VALUE_SEPARATOR)
-        self.match(TokenType.END_ARRAY)
-        return l
+            for kind in filter(skip_types.__contains__, map(_first, tokens)):
+                if kind is TokenType.END:
+                    raise RuntimeError("Input ends inside a value")
+                depth += _depth_changes[kind]
+                if not depth:
+                    return
+            if scanner is None:
+                return
+            # The batch is used up, so the scanner is paused where the next
+            # one starts and can skip from there.
+            depth = scanner.skip(depth)
+            if not depth:
+                return
+            token = next(self.token_stream) # starts the next batch
+            tokens = chain((token,), self.batch)
+
+    def select(self, paths):
+        """Yields a (path, value) pair for each value matching one of paths.
+
+        paths are JSONPath-like: '$' for the next value, then '.name' or
+        "['name']" for a key, '[3]' for an array index and '.*' or '[*]'
+        for every key or element, e.g. '$.items[*].sku'.  Only the values
+        that match are built; everything else is skipped with skip_value.
+        Pairs come in document order, except that the matches inside a
+        matched value come after it, path by path.
+        """
+        queries = tuple((path, _parse_path(path)) for path in paths)
+        token = self.get()
+        get = self.token_stream.__next__
+        skip = self.skip
+        next_member = self._next_member
+        steps_taken = {} # (id(queries), key or index) -> (queries, complete)
+        stack = [] # [is_object, queries alive in it, index] per open container
+        alive = queries
+        complete = any(not steps for _, steps in queries)
+        while True:
+            kind = token[0]
+            if complete:
+                self.buffer = token
+                value = self.match_value()
+                depth = len(stack)
+                for path, steps in alive:
+                    yield from _select_from(path, steps[depth:], value)
+            elif not alive:
+                if kind not in _scalar_types:
+                    skip(token)
+            elif kind is TokenType.NUMBER_ARRAY:
+                value = self._number_array(token[1])
+                depth = len(stack)
+                for path, steps in alive:
+                    yield from _select_from(path, steps[depth:], value)
+            elif kind is TokenType.BEGIN_ARRAY:
+                token = get()
+                if token[0] is not TokenType.END_ARRAY:
+                    stack.append([False, alive, 0])
+                    alive, complete = _select_step(steps_taken, alive, len(stack) - 1, 0)
+                    continue
+            elif kind is TokenType.BEGIN_OBJECT:
+                token = get()
+                if token[0] is not TokenType.END_OBJECT:
+                    stack.append([True, alive, None])
+                    alive, complete = _select_step(steps_taken, alive, len(stack) - 1, self.read_key(token))
+                    token = get()
+                    continue
+            else:
+                skip(token)
+
+            while stack:
+                frame = stack[-1]
+                is_object, container_alive, index = frame
+                if next_member(is_object):
+                    if is_object:
+                        selector = self.read_key(get())
+                    else:
+                        selector = frame[2] = index + 1
+                    alive, complete = _select_step(steps_taken, container_alive, len(stack) - 1, selector)
+                    token = get()
+                    break
+                stack.pop()
+            else:
+                return
+
+    def _events(self, target):
+        """Yields the parse events, built values in place of those at target.
+
+        A value at target is built by match_value and reported as a
+        (target, None, value) triple instead of as events.
+        """
+        token = self.get()
+        get = self.token_stream.__next__
+        number = self._number
+        string = self._string
+        next_member = self._next_member
+        stack = [] # (is_object, prefix) for each open container
+        prefix = ''
+        while True:
+            kind = token[0]
+            if prefix == target and kind is not TokenType.END:
+                self.buffer = token
+                yield prefix, None, self.match_value()
+            elif kind is TokenType.BEGIN_STRING:
+                yield prefix, 'string', string(get())
+            elif kind is TokenType.NUMBER:
+                yield prefix, 'number', number(token[1])
+            elif kind is TokenType.NUMBER_ARRAY:
+                yield prefix, 'start_array', None
+                item = f'{prefix}.item' if prefix else 'item'
+                for text in token[1].split(','):
+                    yield item, 'number', number(text.strip())
+                yield prefix, 'end_array', None
+            elif kind is TokenType.TRUE:
+                yield prefix, 'boolean', True
+            elif kind is TokenType.FALSE:
+                yield prefix, 'boolean', False
+            elif kind is TokenType.NULL:
+                yield prefix, 'null', None
+            elif kind is TokenType.BEGIN_ARRAY:
+                yield prefix, 'start_array', None
+                token = get()
+                if token[0] is not TokenType.END_ARRAY:
+                    stack.append((False, prefix))
+                    prefix = f'{prefix}.item' if prefix else 'item'
+                    continue
+                yield prefix, 'end_array', None
+            elif kind is TokenType.BEGIN_OBJECT:
+                yield prefix, 'start_map', None
+                token = get()
+                if token[0] is not TokenType.END_OBJECT:
+                    key = self.read_key(token)
+                    yield prefix, 'map_key', key
+                    stack.append((True, prefix))
+                    prefix = f'{prefix}.{key}' if prefix else key
+                    token = get()
+                    continue
+                yield prefix, 'end_map', None
+            elif kind is TokenType.END and not stack:
+                return
+            else:
+                raise RuntimeError(f"Invalid token in events: {token}")
+
+            while stack:
+                is_object, container = stack[-1]
+                if next_member(is_object):
+                    if is_object:
+                        key = self.read_key(get())
+                        yield container, 'map_key', key
+                        prefix = f'{container}.{key}' if container else key
+                    token = get()
+                    break
+                stack.pop()
+                prefix = container
+                yield prefix, 'end_map' if is_object else 'end_array', None
+            else:
+                token = get()
+
+    def scalar_readers(self):
+        """Returns the functions that read a scalar value, by token type.
+
+        Each takes the value's first token, already read from the stream,
+        and reads the rest of the value, so a string's reader reads up to
+        its closing quote.  Strings are interned as match_value interns
+        them.
+        """
+        intern_values = self.intern_values
+        intern = self.keys.intern
+        string = self._string
+        get = self.token_stream.__next__
+
+        def string_value(token):
+            value = string(get())
+            if len(value) <= intern_values:
+                return intern(value)
+            return value
+
+        return {
+            TokenType.BEGIN_STRING: string_value,
+            TokenType.NUMBER: lambda token: self._number(token[1]),
+            TokenType.NUMBER_ARRAY: lambda token: self._number_array(token[1]),
+            TokenType.TRUE: lambda token: True,
+            TokenType.FALSE: lambda token: False,
+            TokenType.NULL: lambda token: None,
+        }
+
+    def read_key(self, token, known=None):
+        """Reads an object key and its colon, token being its opening quote.
+
+        token has been read from the stream already.  known, if given,
+        maps the texts of keys scanned as a single run, as they were scanned
+        (so undecoded UTF-8 from binary input), to their values, which are
+        then looked up instead of decoded.
+        """
+        if token[0] is not TokenType.BEGIN_STRING:
+            raise RuntimeError(f"Expected token of type {TokenType.BEGIN_STRING} but got {token[0]}")
+        get = self.token_stream.__next__
+        key = self._string(get(), known)
+        token = get()
+        if token[0] is not TokenType.NAME_SEPARATOR:
+            raise RuntimeError(f"Expected token of type {TokenType.NAME_SEPARATOR} but got {token[0]}")
+        return key
+
+    def _next_member(self, is_object):
+        """Reads what follows a member of an open object or array.
+
+        Returns True after a comma, when another member comes next, and
+        False after the closing bracket.
+        """
+        token = next(self.token_stream)
+        kind = token[0]
+        if kind is TokenType.VALUE_SEPARATOR:
+            return True
+        if kind is not (TokenType.END_OBJECT if is_object else TokenType.END_ARRAY):
+            raise RuntimeError(f"Expected , or {'}' if is_object else ']'} but got {token[1]}")
+        return False
+
+    def _string(self, token, known=None):
+        """Reads the contents of a string up to its closing quote.
+
+        token is the one after the opening quote.  known, if given, maps the
+        texts of strings scanned as a single run, as they were scanned (so
+        undecoded UTF-8 from binary input), to their values, which are then
+        looked up instead of decoded.
+        """
+        STRING_CHAR = TokenType.STRING_CHAR
+        parts = []
+        append = parts.append
+        stream = self.token_stream
+        while token[0] is STRING_CHAR:
+            append(token[1])
+            token = next(stream)
+        if token[0] is not TokenType.END_STRING:
+            raise RuntimeError(f"Invalid token in string: {token[1]!r}")
+        if known is not None and len(parts) == 1:
+            value = known.get(parts[0])
+            if value is not None:
+                return value
+        return _string_value(parts)
+
+    def _number(self, text):
+        """Converts the text of a number token to its value."""
+        return _number_value(text, self.use_decimal)
+
+    def _number_array(self, text):
+        """Converts the text of a NUMBER_ARRAY token to its array."""
+        return _number_array_value(text, self.numeric_arrays, self.use_decimal)
 
     def get(self) -> Tuple[TokenType, str]:
         """Consumes next token and returns it."""
@@ -124,6 +1074,15 @@ class Tokenizer:
             token = next(self.token_stream)
         return token
 
+    def push_back(self, token):
+        """Returns token to the stream, to be the next one get reads.
+
+        Only one token can be pushed back at a time.
+        """
+        if self.buffer:
+            raise ValueError("A token has already been pushed back")
+        self.buffer = token
+
     def get_str(self) -> str:
         """Consumes next token and returns string component of it."""
         return self.get()[1]
@@ -134,20 +1093,75 @@ class Tokenizer:
             self.buffer = next(self.token_stream)
         return self.buffer
 
+    def _chunks(self, inputs):
+        """Yields the input as strings of at most chunk_size characters.
+
+        A str or binary buffer is already in memory and is yielded whole.
+        Binary files yield bytes.
+        """
+        chunks = self._read_chunks(inputs)
+        if self.stats is not None:
+            chunks = self.stats.measure_input(chunks)
+        yield from chunks
+
+    def _read_chunks(self, inputs):
+        """Yields the chunks _chunks describes."""
+        if isinstance(inputs, (str,) + binary_types):
+            if len(inputs):
+                yield inputs
+        elif hasattr(inputs, 'read'):
+            while True:
+                chunk = inputs.read(self.chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+        else:
+            characters = iter(inputs)
+            while True:
+                chunk = ''.join(islice(characters, self.chunk_size))
+                if not chunk:
+                    break
+                yield chunk
+
+    def _text_chunks(self, inputs):
+        """Yields the chunks of the input, decoding any binary ones."""
+        decoder = None
+        for chunk in self._chunks(inputs):
+            if not isinstance(chunk, str):
+                if decoder is None:
+                    decoder = codecs.getincrementaldecoder('utf-8-sig')()
+                chunk = decoder.decode(chunk)
+            yield chunk
+        if decoder is not None:
+            yield decoder.decode(b'', final=True)
+
     def _tokenizer(self, inputs):
 
+        if hasattr(inputs, 'read') or isinstance(inputs, binary_types) or self.stats is not None:
+            # With stats, characters are read through _chunks to be counted.
+            inputs = chain.from_iterable(self._text_chunks(inputs))
+
         reading_string = False
         buffer = ''
         escaped = False
-        reading_number = False
+        number_state = None # state of the number being read, if any
 
         for char in inputs:
 
-            if reading_number and not number_pattern.match(buffer + char):
+            if number_state:
+                next_state = _number_transitions[number_state].get(char)
+                if next_state:
+                    number_state = next_state
+                    buffer += char
+                    self.charno += 1
+                    continue
                 number = buffer
                 buffer = ''
-                reading_number = False
-                yield (TokenType.NUMBER, number)
+                if number_state in _number_accepting:
+                    yield (TokenType.NUMBER, number)
+                else:
+                    yield (TokenType.ERROR, number)
+                number_state = None
             
             if not reading_string:
                 if char == '\n':
@@ -174,6 +1188,9 @@ class Tokenizer:
                 elif whitespace_pattern.match(char):
                     continue
                     # yield (TokenType.WHITESPACE, char)
+                elif not buffer and char in _number_start:
+                    number_state = _number_start[char]
+                    buffer = char
                 else:
                     buffer += char
                     if buffer == 'false':
@@ -188,8 +1205,6 @@ class Tokenizer:
                         old_buffer = buffer
                         buffer = ''
                         yield (TokenType.TRUE, old_buffer)
-                    elif number_pattern.match(buffer):
-                        reading_number = True
                     else:
                         if len(buffer) > 5:
                             old_buffer = buffer
@@ -215,20 +1230,1866 @@ class Tokenizer:
                     else:
                         yield (TokenType.STRING_CHAR, char)
         
-        if reading_number:
-            number = buffer
-            buffer = ''
-            reading_number = False
-            yield (TokenType.NUMBER, number)
+        if number_state in _number_accepting:
+            yield (TokenType.NUMBER, buffer)
+        elif number_state:
+            yield (TokenType.ERROR, buffer)
 
         yield (TokenType.END, '')
 
+    def _regex_tokenizer(self, inputs):
+        def batches():
+            scanner = None
+            for chunk in self._chunks(inputs):
+                if scanner is None:
+                    scanner_class = _RegexScanner if isinstance(chunk, str) else _BytesScanner
+                    scanner = scanner_class(self.numeric_arrays is not None, self.string_runs)
+                    if self.stats is None: # skipped text would not be counted
+                        self.scanner = scanner
+                for tokens in map(iter, scanner.feed(chunk)):
+                    self.batch = tokens
+                    yield tokens
+            yield from (scanner or _RegexScanner()).close()
+
+        return chain.from_iterable(batches())
+
+    def _span_tokenizer(self, inputs):
+        """Yields iterators over Span tokens, the last ending with END.
+
+        The tokens are scanned a chunk at a time onto compact arrays and the
+        Span objects are only created as they are consumed.
+        """
+        if isinstance(inputs, (str,) + binary_types):
+            chunks = [inputs]  # already in memory, so scan it all at once
+            if self.stats is not None:
+                chunks = self.stats.measure_input(chunks)
+        else:
+            chunks = self._chunks(inputs)
+        scanner = None
+        source = _SpanSource('', 0, 1, 0, False)
+        tail = ''
+        for chunk in chain(chunks, [None]):
+            final = chunk is None
+            if scanner is None:
+                binary = not final and not isinstance(chunk, str)
+                scanner = _TapeScanner(binary)
+                tail = b'' if binary else ''
+            if final:
+                text = tail
+            elif tail:
+                text = tail[:0].join((tail, chunk))
+            else:
+                text = chunk
+            final = final or chunk is inputs
+            types = array('B')
+            starts = array('Q')
+            lengths = array('Q')
+            stop = scanner.scan(text, types, starts, lengths, final)
+            base = source.base + len(source.text) - len(tail)
+            line, line_start = source.count_lines(len(source.text) - len(tail))
+            source = _SpanSource(text, base, line, line_start, scanner.binary)
+            starts = array('Q', map(base.__add__, starts))
+            yield map(Span, map(_token_types.__getitem__, types), starts,
+                      map(add, starts, lengths), repeat(source))
+            if final:
+                break
+            tail = text[stop:]
+        end = source.base + len(source.text)
+        yield [Span(TokenType.END, end, end, source)]
+
+
+class ParseStats:
+    """Counts and timings of one or more Tokenizer runs.
+
+    Pass a ParseStats to Tokenizer as stats to fill it in:
+
+    counts: a Counter of the tokens of each TokenType.
+    consumed: the characters of input read, or bytes for binary input.
+        For a TokenTape, the source from its first token to its last.
+    scan_time: seconds spent scanning the tokens.
+    build_time: seconds spent by the caller between tokens, by the match_*
+        methods building values for instance.
+    max_depth: the deepest nesting of containers.
+    longest_string: the most input characters inside one string's quotes.
+    longest_number: the most characters in one number.
+
+    sample, if given, is called with the ParseStats after every
+    sample_every tokens, e.g. to log progress or watch a long parse.
+    """
+
+    def __init__(self, sample=None, sample_every=10000):
+        self.sample = sample
+        self.sample_every = sample_every
+        self.counts = Counter()
+        self.consumed = 0
+        self.scan_time = 0.0
+        self.build_time = 0.0
+        self.max_depth = 0
+        self.longest_string = 0
+        self.longest_number = 0
+
+    @property
+    def tokens(self) -> int:
+        return sum(self.counts.values())
+
+    def as_dict(self) -> dict:
+        """Returns the statistics as a dict of plain values, e.g. for JSON."""
+        return {
+            'tokens': self.tokens,
+            'counts': {token_type.name: n for token_type, n in self.counts.items()},
+            'consumed': self.consumed,
+            'scan_time': self.scan_time,
+            'build_time': self.build_time,
+            'max_depth': self.max_depth,
+            'longest_string': self.longest_string,
+            'longest_number': self.longest_number,
+        }
+
+    def measure_input(self, chunks):
+        """Yields chunks, adding their lengths to consumed."""
+        for chunk in chunks:
+            self.consumed += len(chunk)
+            yield chunk
+
+    def watch(self, tokens):
+        """Yields tokens, recording each one and the time around it."""
+        clock = time.perf_counter
+        counts = self.counts
+        sample = self.sample
+        sample_every = self.sample_every
+        countdown = sample_every
+        STRING_CHAR = TokenType.STRING_CHAR
+        tokens = iter(tokens)
+        depth = 0
+        string_length = 0
+        resumed = clock()
+        while True:
+            token = next(tokens, None)
+            scanned = clock()
+            self.scan_time += scanned - resumed
+            if token is None:
+                return
+            kind = token[0]
+            counts[kind] += 1
+            if kind is STRING_CHAR:
+                string_length += len(token[1])
+            elif kind is TokenType.END_STRING:
+                self.longest_string = max(self.longest_string, string_length)
+                string_length = 0
+            elif kind is TokenType.NUMBER:
+                self.longest_number = max(self.longest_number, len(token[1]))
+            elif kind is TokenType.BEGIN_OBJECT or kind is TokenType.BEGIN_ARRAY:
+                depth += 1
+                self.max_depth = max(self.max_depth, depth)
+            elif kind is TokenType.END_OBJECT or kind is TokenType.END_ARRAY:
+                depth -= 1
+            if sample is not None:
+                countdown -= 1
+                if not countdown:
+                    countdown = sample_every
+                    sample(self)
+            yielded = clock()
+            yield token
+            resumed = clock()
+            self.build_time += resumed - yielded
+
+
+@contextmanager
+def profile_parse(stream=None, sort='cumulative', limit=20, memory=True):
+    """Profiles the with block and writes a report to stream on leaving it.
+
+    The report lists the limit functions that rank highest by sort under
+    cProfile and, with memory set, the peak memory traced by tracemalloc
+    and the limit lines that allocated the most.  stream defaults to
+    sys.stderr.  The cProfile.Profile is bound by as.
+    """
+    stream = sys.stderr if stream is None else stream
+    tracing = memory and not tracemalloc.is_tracing()
+    if tracing:
+        tracemalloc.start()
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+        pstats.Stats(profiler, stream=stream).sort_stats(sort).print_stats(limit)
+        if memory:
+            snapshot = tracemalloc.take_snapshot()
+            peak = tracemalloc.get_traced_memory()[1]
+            if tracing:
+                tracemalloc.stop()
+            print(f"Peak traced memory: {peak} bytes", file=stream)
+            for statistic in snapshot.statistics('lineno')[:limit]:
+                print(statistic, file=stream)
+
+
+# What a PushParser expects next.
+_PUSH_VALUE = 0 # a value, or at the top level the end of the input
+_PUSH_FIRST_VALUE = 1 # a value, or ] closing an empty array
+_PUSH_KEY = 2 # the opening quote of a key
+_PUSH_FIRST_KEY = 3 # the opening quote of a key, or } closing an empty object
+_PUSH_COLON = 4
+_PUSH_AFTER_VALUE = 5 # a comma, or the bracket closing the container
+_PUSH_STRING = 6 # more of a string, or its closing quote
+_PUSH_CLOSED = 7
+
+
+class PushParser:
+    """Parses JSON that is handed over in fragments of any size.
+
+    feed(chunk) parses as much as it can and returns the top-level values
+    completed so far, or with events set the (prefix, event, value) triples
+    that Tokenizer.events would yield.  Whatever is unfinished, a partial
+    number or keyword, an open string or escape and the open containers,
+    is kept until the next call, so a value may be split anywhere.  close()
+    ends the input.  Several top-level values may follow one another.
+
+    The chunks must be all str or all UTF-8 bytes-like objects.  The other
+    options are as for Tokenizer.
+    """
+
+    def __init__(self, events=False, use_decimal=False, keys=None, intern_values=0):
+        self.events = events
+        self.use_decimal = use_decimal
+        self.keys = KeyTable() if keys is None else keys
+        self.intern_values = intern_values
+        self.scanner = None
+        self.state = _PUSH_VALUE
+        self.stack = [] # (is_object, prefix) for each open container
+        self.prefix = ''
+        self.parts = [] # the STRING_CHAR texts of an open string
+        self.reading_key = False
+        self.frames = [] # the lists and _ObjectFrames of the values being built
+
+    def feed(self, chunk):
+        """Parses chunk and returns what it completes; see PushParser."""
+        if self.state == _PUSH_CLOSED:
+            raise ValueError("feed called after close")
+        if self.scanner is None:
+            self.scanner = _RegexScanner() if isinstance(chunk, str) else _BytesScanner()
+        return self._parse(self.scanner.feed(chunk))
+
+    def close(self):
+        """Ends the input and returns what that completes.
+
+        Raises RuntimeError if the input ends inside a value.
+        """
+        if self.scanner is None:
+            self.scanner = _RegexScanner()
+        return self._parse(self.scanner.close())
+
+    def _parse(self, batches):
+        """Runs tokens through the parser, returning the events or values."""
+        events = []
+        emit = events.append
+        state = self.state
+        stack = self.stack
+        prefix = self.prefix
+        parts = self.parts
+        use_decimal = self.use_decimal
+        STRING_CHAR = TokenType.STRING_CHAR
+        kind = None
+        for token in chain.from_iterable(batches):
+            kind = token[0]
+            if state == _PUSH_STRING:
+                if kind is STRING_CHAR:
+                    parts.append(token[1])
+                    continue
+                if kind is not TokenType.END_STRING:
+                    raise RuntimeError(f"Invalid token in string: {token[1]!r}")
+                text = _string_value(parts)
+                parts.clear()
+                if self.reading_key:
+                    emit((prefix, 'map_key', text))
+                    prefix = f'{prefix}.{text}' if prefix else text
+                    state = _PUSH_COLON
+                    continue
+                emit((prefix, 'string', text))
+            elif state <= _PUSH_FIRST_VALUE:
+                if kind is TokenType.BEGIN_STRING:
+                    self.reading_key = False
+                    state = _PUSH_STRING
+                    continue
+                elif kind is TokenType.NUMBER:
+                    emit((prefix, 'number', _number_value(token[1], use_decimal)))
+                elif kind is TokenType.TRUE:
+                    emit((prefix, 'boolean', True))
+                elif kind is TokenType.FALSE:
+                    emit((prefix, 'boolean', False))
+                elif kind is TokenType.NULL:
+                    emit((prefix, 'null', None))
+                elif kind is TokenType.BEGIN_ARRAY:
+                    emit((prefix, 'start_array', None))
+                    stack.append((False, prefix))
+                    prefix = f'{prefix}.item' if prefix else 'item'
+                    state = _PUSH_FIRST_VALUE
+                    continue
+                elif kind is TokenType.BEGIN_OBJECT:
+                    emit((prefix, 'start_map', None))
+                    stack.append((True, prefix))
+                    state = _PUSH_FIRST_KEY
+                    continue
+                elif kind is TokenType.END_ARRAY and state == _PUSH_FIRST_VALUE:
+                    prefix = stack.pop()[1]
+                    emit((prefix, 'end_array', None))
+                elif kind is TokenType.END and not stack:
+                    state = _PUSH_CLOSED
+                    continue
+                else:
+                    raise RuntimeError(f"Invalid token in value: {token}")
+            elif state == _PUSH_AFTER_VALUE:
+                is_object, container = stack[-1]
+                if kind is TokenType.VALUE_SEPARATOR:
+                    if is_object:
+                        prefix = container
+                        state = _PUSH_KEY
+                    else:
+                        state = _PUSH_VALUE
+                    continue
+                if kind is not (TokenType.END_OBJECT if is_object else TokenType.END_ARRAY):
+                    raise RuntimeError(f"Expected , or {'}' if is_object else ']'} but got {token[1]}")
+                stack.pop()
+                prefix = container
+                emit((prefix, 'end_map' if is_object else 'end_array', None))
+            elif state == _PUSH_COLON:
+                if kind is not TokenType.NAME_SEPARATOR:
+                    raise RuntimeError(f"Expected token of type {TokenType.NAME_SEPARATOR} but got {kind}")
+                state = _PUSH_VALUE
+                continue
+            elif state <= _PUSH_FIRST_KEY:
+                if kind is TokenType.BEGIN_STRING:
+                    self.reading_key = True
+                    state = _PUSH_STRING
+                    continue
+                if kind is not TokenType.END_OBJECT or state != _PUSH_FIRST_KEY:
+                    raise RuntimeError(f"Expected token of type {TokenType.BEGIN_STRING} but got {kind}")
+                prefix = stack.pop()[1]
+                emit((prefix, 'end_map', None))
+            else:
+                raise RuntimeError(f"Unexpected token after close: {token}")
+            # A value is finished.
+            state = _PUSH_AFTER_VALUE if stack else _PUSH_VALUE
+        if kind is TokenType.END and state != _PUSH_CLOSED:
+            raise RuntimeError("Input ends inside a value")
+        self.state = state
+        self.prefix = prefix
+        return events if self.events else self._build(events)
+
+    def _build(self, events):
+        """Returns the top-level values that events complete.
+
+        Values still open are kept in frames for the next call.
+        """
+        values = []
+        frames = self.frames
+        shapes = self.keys.shapes
+        keys = self.keys
+        intern_values = self.intern_values
+        for _, event, value in events:
+            if event == 'map_key':
+                frame = frames[-1]
+                frame.shape = frame.shape.extend(value, keys)
+                continue
+            if event == 'start_map':
+                frames.append(_ObjectFrame(shapes))
+                continue
+            if event == 'start_array':
+                frames.append([])
+                continue
+            if event == 'end_map':
+                frame = frames.pop()
+                value = dict(zip(frame.shape.keys, frame.values))
+            elif event == 'end_array':
+                value = frames.pop()
+            elif event == 'string' and len(value) <= intern_values:
+                value = keys.intern(value)
+            if not frames:
+                values.append(value)
+            elif frames[-1].__class__ is list:
+                frames[-1].append(value)
+            else:
+                frames[-1].values.append(value)
+        return values
+
+
+class _TapeScanner:
+    """Scans text onto parallel arrays of type codes, offsets and lengths.
+
+    Used by TokenTape and for span tokens.  Each run of plain characters
+    inside a string is one STRING_CHAR token, and each run the master
+    pattern cannot classify is one ERROR token.  Like _RegexScanner.feed,
+    unless final is set scanning stops before a number, keyword, word or
+    escape that runs up to the end of the text, so that it can be scanned
+    again together with more input.
+    """
+
+    def __init__(self, binary):
+        self.binary = binary
+        self.reading_string = False
+        self.started = not binary # whether the start has been checked for a BOM
+        if binary:
+            self.token_pattern = token_bytes_pattern
+            self.string_pattern = string_bytes_pattern
+            self.escape_sequence_pattern = escape_sequence_bytes_pattern
+            self.backslash = b'\\'
+            self.structural_codes = _structural_codes_bytes
+        else:
+            self.token_pattern = token_pattern
+            self.string_pattern = string_pattern
+            self.escape_sequence_pattern = escape_sequence_pattern
+            self.backslash = '\\'
+            self.structural_codes = _structural_codes
+
+    def scan(self, text, types, starts, lengths, final) -> int:
+        """Appends the tokens in text to the arrays.
+
+        Returns the offset of the first character that was not scanned.
+        """
+        pos = 0
+        end = len(text)
+        if not self.started:
+            if not final and end < len(codecs.BOM_UTF8) and codecs.BOM_UTF8.startswith(text):
+                return 0
+            self.started = True
+            if text[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8:
+                pos = len(codecs.BOM_UTF8)
+        structural_codes = self.structural_codes
+        backslash = self.backslash
+        add_type = types.append
+        add_start = starts.append
+        add_length = lengths.append
+        while pos < end:
+            if self.reading_string:
+                pos = self._scan_string(text, pos, end, final, types, starts, lengths)
+                if self.reading_string:
+                    return pos
+                continue
+
+            for m in self.token_pattern.finditer(text, pos):
+                kind = m.lastgroup
+                if kind is None:
+                    continue
+                start = m.start(kind)
+                stop = m.end(kind)
+                if kind == 'structural':
+                    add_type(structural_codes[m.group(kind)])
+                elif not final and stop == end and kind in _extensible:
+                    return start
+                elif kind == 'string':
+                    add_type(_BEGIN_STRING_CODE)
+                    add_start(start - 1)
+                    add_length(1)
+                    if backslash in m.group(kind):
+                        self._scan_string(text, start, stop, True, types, starts, lengths)
+                    elif stop > start:
+                        add_type(_STRING_CHAR)
+                        add_start(start)
+                        add_length(stop - start)
+                    add_type(_END_STRING_CODE)
+                    start = stop
+                    stop += 1
+                elif kind == 'number':
+                    add_type(_NUMBER)
+                elif kind == 'keyword':
+                    add_type(_keyword_codes[text[start]])
+                elif kind == 'quote':
+                    add_type(_BEGIN_STRING_CODE)
+                    add_start(start)
+                    add_length(1)
+                    self.reading_string = True
+                    pos = stop
+                    break
+                else:
+                    add_type(_ERROR)
+                add_start(start)
+                add_length(stop - start)
+            else:
+                pos = end
+        return end
+
+    def _scan_string(self, text, pos, end, final, types, starts, lengths):
+        """Appends the contents of a string up to end and its closing quote.
+
+        Returns the offset after the closing quote, of an escape held back
+        for more input, or end.
+        """
+        for m in self.string_pattern.finditer(text, pos, end):
+            kind = m.lastgroup
+            start = m.start()
+            stop = m.end()
+            if kind == 'run':
+                types.append(_STRING_CHAR)
+            elif kind == 'end':
+                self.reading_string = False
+                types.append(_END_STRING_CODE)
+                starts.append(start)
+                lengths.append(1)
+                return stop
+            elif stop - start == 1:
+                return end if final else start # input ends inside an escape
+            elif self.escape_sequence_pattern.match(text, start + 1, stop):
+                types.append(_STRING_CHAR)
+            else:
+                types.append(_ERROR)
+            starts.append(start)
+            lengths.append(stop - start)
+        return end
+
+
+# The types of the tokens that are whole values on their own.
+_scalar_types = frozenset((TokenType.NUMBER, TokenType.TRUE, TokenType.FALSE, TokenType.NULL,
+                           TokenType.NUMBER_ARRAY))
+# The tokens skip_value counts, and what each does to the nesting depth.
+# Strings never contain brackets, so their contents need no attention.
+_depth_changes = {
+    TokenType.BEGIN_OBJECT: 1,
+    TokenType.BEGIN_ARRAY: 1,
+    TokenType.END_OBJECT: -1,
+    TokenType.END_ARRAY: -1,
+    TokenType.END_STRING: -1,
+}
+_bracket_types = frozenset((TokenType.BEGIN_OBJECT, TokenType.BEGIN_ARRAY,
+                            TokenType.END_OBJECT, TokenType.END_ARRAY, TokenType.END))
+_string_end_types = frozenset((TokenType.END_STRING, TokenType.END))
+_first = itemgetter(0)
+# The types match_value builds arrays as, including those of numeric_arrays.
+_array_types = (list, array) if numpy is None else (list, array, numpy.ndarray)
+
+# A step of a select path: .name, ['name'], [index], .* or [*].
+path_step_pattern = re.compile(r"""
+    \.(?P<name>[^.\[\]]+)
+  | \[(?P<index>\d+|\*)\]
+  | \['(?P<quoted>[^']*)'\]
+  | \["(?P<double_quoted>[^"]*)"\]
+""", re.VERBOSE)
+_ANY = object() # the step of a select path that matches every key or index
+
+
+def _parse_path(path):
+    """Returns the steps of a select path: keys, indexes and _ANY."""
+    if not path.startswith('$'):
+        raise ValueError(f"Path must start with $: {path!r}")
+    steps = []
+    pos = 1
+    while pos < len(path):
+        m = path_step_pattern.match(path, pos)
+        if m is None:
+            raise ValueError(f"Invalid path {path!r} at offset {pos}")
+        kind = m.lastgroup
+        step = m.group(kind)
+        if step == '*' and kind in ('name', 'index'):
+            steps.append(_ANY)
+        elif kind == 'index':
+            steps.append(int(step))
+        else:
+            steps.append(step)
+        pos = m.end()
+    return tuple(steps)
+
+
+def _select_step(steps_taken, queries, depth, selector):
+    """Returns the queries whose step at depth matches a key or index.
+
+    Also returns whether one of them ends there.  Results are remembered in
+    steps_taken, as the same steps are taken for every element of an array.
+    """
+    named = steps_taken.get(id(queries))
+    if named is None:
+        # The keys and indexes queries name at depth; all others select the
+        # same queries.  Keep queries alive so that its id is not reused.
+        named = steps_taken[id(queries)] = (
+            {steps[depth] for _, steps in queries if steps[depth] is not _ANY}, queries)
+    if selector not in named[0]:
+        selector = _ANY
+    key = (id(queries), selector)
+    result = steps_taken.get(key)
+    if result is None:
+        matched = tuple((path, steps) for path, steps in queries
+                        if steps[depth] is _ANY or steps[depth] == selector)
+        complete = any(len(steps) == depth + 1 for _, steps in matched)
+        result = steps_taken[key] = (matched, complete)
+    return result
+
+
+def _select_from(path, steps, value):
+    """Yields (path, match) for the matches of steps within a built value."""
+    if not steps:
+        yield path, value
+        return
+    step, rest = steps[0], steps[1:]
+    if isinstance(value, dict):
+        if step is _ANY:
+            for item in value.values():
+                yield from _select_from(path, rest, item)
+        elif isinstance(step, str) and step in value:
+            yield from _select_from(path, rest, value[step])
+    elif isinstance(value, _array_types):
+        if step is _ANY:
+            for item in value:
+                yield from _select_from(path, rest, item)
+        elif isinstance(step, int) and step < len(value):
+            yield from _select_from(path, rest, value[step])
+
+
+class KeyTable:
+    """Interned object keys and the shapes of the objects built from them.
+
+    strings maps each key to the one str used for it.  shapes is the root
+    of a tree of _Shape objects, one for every sequence of keys that has
+    started an object, so an object whose keys have been seen before in
+    that order reuses their tuple.  Only the first _Shape.max_keys keys of
+    an object are cached this way.
+
+    size counts the shapes.  Once size or the number of strings reaches
+    limit the table is emptied and starts over, so a table shared by many
+    records with different keys holds a bounded amount of memory.
+    """
+
+    __slots__ = ('strings', 'shapes', 'size', 'limit')
+
+    def __init__(self, limit=16384):
+        self.strings = {}
+        self.shapes = _Shape(())
+        self.size = 0
+        self.limit = limit
+
+    def __len__(self):
+        return len(self.strings)
+
+    def clear(self):
+        """Forgets every key and shape, keeping the root shape."""
+        self.strings.clear()
+        self.shapes.next.clear()
+        self.size = 0
+
+    def intern(self, key):
+        """Returns the one str used for key, adding key if it is new."""
+        strings = self.strings
+        if len(strings) >= self.limit:
+            self.clear()
+        return strings.setdefault(key, key)
+
+
+class _ObjectFrame:
+    """An object being built by match_value: its shape so far and values."""
+
+    __slots__ = ('shape', 'values')
+
+    def __init__(self, shape):
+        self.shape = shape
+        self.values = []
+
+
+class _Shape:
+    """A sequence of object keys and the shapes that extend it by one."""
+
+    __slots__ = ('keys', 'next')
+
+    # Objects with more keys go on as a _KeyList, so that a wide object
+    # costs memory linear in its keys rather than a tuple for each prefix.
+    max_keys = 64
+
+    def __init__(self, keys):
+        self.keys = keys
+        self.next = {}
+
+    def extend(self, key, table):
+        """Returns the shape with key appended, interning key in table."""
+        shape = self.next.get(key)
+        if shape is None:
+            if len(self.keys) >= _Shape.max_keys:
+                return _KeyList(self.keys, table.intern(key))
+            if table.size >= table.limit:
+                table.clear()
+            key = table.intern(key)
+            shape = self.next[key] = _Shape(self.keys + (key,))
+            table.size += 1
+        return shape
+
+
+class _KeyList:
+    """The keys of an object too wide for the shape cache, in a list."""
+
+    __slots__ = ('keys',)
+
+    def __init__(self, keys, key):
+        self.keys = [*keys, key]
+
+    def extend(self, key, table):
+        """Appends key, interned in table, and returns self."""
+        self.keys.append(table.intern(key))
+        return self
+
+
+def _string_value(parts):
+    """Joins the STRING_CHAR texts of a string and decodes its escapes."""
+    if len(parts) == 1:
+        raw = parts[0]
+    elif not parts:
+        return ''
+    elif isinstance(parts[0], str):
+        raw = ''.join(parts)
+    else:
+        raw = b''.join(parts)
+    if not isinstance(raw, str):
+        raw = str(raw, 'utf-8')
+    if '\\' in raw:
+        return string_escape_pattern.sub(_decode_escape, raw)
+    return raw
+
+
+def _number_value(text, use_decimal):
+    """Converts the text of a number token to its value."""
+    value = _small_ints.get(text)
+    if value is not None:
+        return value
+    if '.' in text or 'e' in text or 'E' in text:
+        return Decimal(text) if use_decimal else float(text)
+    return int(text)
+
+
+# The length of the text of a NUMBER_ARRAY from which NumPy converts it
+# faster than float or int do one number at a time.
+NUMPY_ARRAY_THRESHOLD = 1 << 9
+
+
+def _number_array_value(text, kind, use_decimal):
+    """Converts the numbers of a NUMBER_ARRAY token, as kind says."""
+    fraction = '.' in text or 'e' in text or 'E' in text
+    if fraction and use_decimal or long_int_pattern.search(text):
+        # Decimals, and integers that may not fit in 64 bits or a double,
+        # are kept exact.
+        return [_number_value(number.strip(), use_decimal) for number in text.split(',')]
+    typecode = 'd' if fraction else 'q'
+    if numpy is None or kind == 'array' and len(text) < NUMPY_ARRAY_THRESHOLD:
+        return array(typecode, map(float if fraction else int, text.split(',')))
+    values = numpy.fromstring(text, numpy.float64 if fraction else numpy.int64, sep=',')
+    if kind == 'numpy':
+        return values
+    numbers = array(typecode)
+    numbers.frombytes(values.tobytes())
+    return numbers
+
+
+def _decode_escape(m):
+    """Returns the character an escape in string_escape_pattern stands for."""
+    char = m.group('char')
+    if char is not None:
+        if char not in _escaped_chars:
+            raise RuntimeError(f"Invalid escape: \\{char}")
+        return _escaped_chars[char]
+    code = m.group('code')
+    if code is not None:
+        return chr(int(code, 16))
+    high = int(m.group('high'), 16) - 0xD800
+    low = int(m.group('low'), 16) - 0xDC00
+    return chr(0x10000 + (high << 10) + low)
+
+
+class TokenTape:
+    """The whole token stream of a document, stored compactly.
+
+    Each token is a type code (the TokenType value) plus the offset and
+    length of its text in the source, kept in parallel array.array buffers
+    of a few bytes per token.  Indexing and iterating give the usual
+    (TokenType, str) tuples, slicing gives another TokenTape over the same
+    source, and Tokenizer(tape) walks the tokens again without re-scanning.
+
+    Like the bytes scanner, each run of plain characters inside a string is
+    one STRING_CHAR token, and each run the master pattern cannot classify
+    is one ERROR token.  For binary sources numbers are decoded and the
+    text of strings and errors is left as bytes.
+    """
+
+    def __init__(self, source, indexed=False):
+        """Scans source, a str, bytes-like object or file, onto the tape.
+
+        With indexed set and NumPy installed, the tokens are built from the
+        structural_index of source with whole-array operations instead of
+        being scanned one by one.  The tape is the same either way.
+        """
+        if not isinstance(source, (str,) + binary_types) and hasattr(source, 'read'):
+            source = source.read()
+        self.source = source
+        self.binary = not isinstance(source, str)
+        offset_type = 'I' if len(source) < 2 ** 32 else 'Q'
+        self.types = array('B')
+        self.starts = array(offset_type)
+        self.lengths = array(offset_type)
+        tokens = _index_tape(source) if indexed and numpy is not None else None
+        if tokens is not None:
+            for tape_array, values in zip((self.types, self.starts, self.lengths), tokens):
+                tape_array.frombytes(values.astype(tape_array.typecode).tobytes())
+        else:
+            _TapeScanner(self.binary).scan(source, self.types, self.starts, self.lengths, True)
+        self.types.append(TokenType.END.value)
+        self.starts.append(len(source))
+        self.lengths.append(0)
+
+    def __len__(self):
+        return len(self.types)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            tape = TokenTape.__new__(TokenTape)
+            tape.source = self.source
+            tape.binary = self.binary
+            tape.types = self.types[index]
+            tape.starts = self.starts[index]
+            tape.lengths = self.lengths[index]
+            return tape
+        return self._token(self.types[index], self.starts[index], self.lengths[index])
+
+    def __iter__(self):
+        return map(self._token, self.types, self.starts, self.lengths)
+
+    def type(self, index) -> TokenType:
+        """Returns the type of the token at index, without slicing its text."""
+        return _token_types[self.types[index]]
+
+    def span(self, index) -> Tuple[int, int]:
+        """Returns the (start, end) offsets of the token at index."""
+        start = self.starts[index]
+        return start, start + self.lengths[index]
+
+    def text(self, index):
+        """Returns the source text of the token at index."""
+        start = self.starts[index]
+        return self.source[start:start + self.lengths[index]]
+
+    def edit(self, offset, deleted, inserted) -> Tuple[int, int, int]:
+        """Applies an edit to the source and rescans only what it changed.
+
+        deleted characters (bytes for a binary source) at offset are
+        replaced by inserted.  Scanning restarts at a token before the
+        edit where the scanner is outside any string, and stops at the
+        first structural token after the edit that matches an old one at
+        the same place, as the old tokens from there on are still right
+        once their offsets are shifted.  Returns (first, old_stop,
+        new_stop): the old tokens first to old_stop have been replaced by
+        the new ones first to new_stop.
+        """
+        return self._edit(offset, deleted, inserted)[:3]
+
+    def _edit(self, offset, deleted, inserted):
+        """As edit, but also returns the type codes of the old tokens replaced."""
+        source = self.source
+        if offset < 0 or deleted < 0 or offset + deleted > len(source):
+            raise ValueError(f"Edit of {deleted} at {offset} is outside the source")
+        if self.binary and not isinstance(source, bytes):
+            source = bytes(source)
+        self.source = source = source[:offset] + inserted + source[offset + deleted:]
+        if len(source) >= 2 ** 32 and self.starts.typecode == 'I':
+            self.starts = array('Q', self.starts)
+            self.lengths = array('Q', self.lengths)
+        shift = len(inserted) - deleted
+        edit_end = offset + len(inserted)
+
+        # Back up to the token that may run into the edit, then out of any
+        # string it is in.
+        first = max(bisect_left(self.starts, offset) - 1, 0)
+        while first and self.types[first] in _string_part_codes:
+            first -= 1
+        restart = min(self.starts[first], offset)
+
+        scanner = _TapeScanner(self.binary)
+        scanner.started = scanner.started or restart > 0
+        types = array('B')
+        starts = array(self.starts.typecode)
+        lengths = array(self.lengths.typecode)
+        old_types = self.types
+        old_starts = self.starts
+        old_end = len(old_types) - 1 # the END token
+        pos = restart
+        window = EDIT_WINDOW
+        resync = None
+        while resync is None:
+            base = pos
+            stop = min(max(base, edit_end) + window, len(source))
+            final = stop == len(source)
+            scanned = len(types)
+            pos = base + scanner.scan(source[base:stop], types, starts, lengths, final)
+            if (scanned and scanned < len(types) and types[scanned] == _STRING_CHAR
+                    and types[scanned - 1] == _STRING_CHAR and starts[scanned] == 0
+                    and starts[scanned - 1] + lengths[scanned - 1] == base
+                    and source[base:base + 1] not in ('\\', b'\\')
+                    and source[starts[scanned - 1]:starts[scanned - 1] + 1] not in ('\\', b'\\')):
+                # A run of string characters cut by the end of the window.
+                lengths[scanned - 1] += lengths[scanned]
+                del types[scanned], starts[scanned], lengths[scanned]
+            for i in range(scanned, len(types)):
+                start = starts[i] = starts[i] + base
+                if start >= edit_end and types[i] in _resync_codes:
+                    k = bisect_left(old_starts, start - shift, first, old_end)
+                    if k < old_end and old_starts[k] == start - shift and old_types[k] == types[i]:
+                        resync = i, k
+                        break
+            if final:
+                break
+            window *= 2
+        new, old_stop = resync or (len(types), old_end)
+        removed = self.types[first:old_stop]
+        self.types[first:old_stop] = types[:new]
+        self.starts[first:old_stop] = starts[:new]
+        self.lengths[first:old_stop] = lengths[:new]
+        new_stop = first + new
+        _shift_offsets(self.starts, new_stop, shift)
+        return first, old_stop, new_stop, removed
+
+    def _token(self, code, start, length):
+        token = _constant_tokens.get(code)
+        if token is not None:
+            return token
+        text = self.source[start:start + length]
+        if self.binary and code == _NUMBER:
+            text = str(text, 'ascii')
+        return (_token_types[code], text)
+
+
+# Characters scanned past an edit before TokenTape.edit first looks for a
+# token at which the old tokens can be picked up again.
+EDIT_WINDOW = 1 << 12
+
+
+def _shift_offsets(offsets, start, shift):
+    """Adds shift to offsets[start:], in an array.array."""
+    if not shift or start >= len(offsets):
+        return
+    if numpy is not None:
+        view = numpy.frombuffer(offsets, offsets.typecode)
+        if shift > 0:
+            view[start:] += shift
+        else:
+            view[start:] -= -shift
+    else:
+        offsets[start:] = array(offsets.typecode, map(shift.__add__, offsets[start:]))
+
+
+def _tape_depths(types):
+    """Returns the depth of nesting after each of the type codes of a tape.
+
+    The depths are in an array.array of 'i', so that they can be updated
+    in place as the tape is edited.
+    """
+    depths = array('i')
+    if numpy is not None:
+        steps = _depth_step_table[numpy.frombuffer(types, numpy.uint8)]
+        depths.frombytes(numpy.cumsum(steps, dtype=numpy.intc).tobytes())
+    else:
+        depths.extend(accumulate(map(_depth_steps.__getitem__, types)))
+    return depths
+
+
+def _open_containers(types, depths, stop):
+    """Returns the tokens before stop that open containers still open there.
+
+    They are in order, outermost first.
+    """
+    found = []
+    level = depths[stop - 1] if stop else 0
+    position = stop - 1
+    if numpy is not None:
+        depths = numpy.frombuffer(depths, numpy.intc)
+    while level > 0:
+        # The container at this level opens just after the last token
+        # before position at which the depth is lower.
+        if numpy is not None:
+            lower = numpy.flatnonzero(depths[:position] < level)
+            position = int(lower[-1]) + 1 if len(lower) else 0
+        else:
+            while position and depths[position - 1] >= level:
+                position -= 1
+        found.append(position)
+        level = depths[position] - 1
+    found.reverse()
+    return found
+
+
+def _container_end(depths, start):
+    """Returns the token that closes the container opened by token start."""
+    level = depths[start]
+    if numpy is not None:
+        depths = numpy.frombuffer(depths, numpy.intc)
+        low = start + 1
+        window = EDIT_WINDOW
+        while low < len(depths):
+            closed = numpy.flatnonzero(depths[low:low + window] < level)
+            if len(closed):
+                return low + int(closed[0])
+            low += window
+            window *= 2
+    else:
+        for position in range(start + 1, len(depths)):
+            if depths[position] < level:
+                return position
+    return len(depths) - 1
+
+
+def _member_commas(types, depths, start, end):
+    """Returns the commas between the members of a container, as a list.
+
+    The container is opened by token start and closed by token end.
+    """
+    level = depths[start]
+    if numpy is not None:
+        codes = numpy.frombuffer(types, numpy.uint8)[start + 1:end]
+        levels = numpy.frombuffer(depths, numpy.intc)[start + 1:end]
+        return (numpy.flatnonzero((codes == _VALUE_SEPARATOR) & (levels == level)) + (start + 1)).tolist()
+    return [position for position in range(start + 1, end)
+            if types[position] == _VALUE_SEPARATOR and depths[position] == level]
+
+
+def _changed_members(types, depths, start, end, first, stop, removed, old_depths):
+    """Returns which members of a container an edit replaced.
+
+    The container is opened by token start and closed by token end, and
+    its members are separated by its own commas.  Tokens first to stop
+    replaced old tokens with the type codes removed and the depths
+    old_depths.  Returns (lo, hi, index, count, old_count, old_total): the
+    count members between tokens lo and hi replaced old_count old ones,
+    after the first index members, and the old container had old_total
+    members.
+    """
+    level = depths[start]
+    commas = _member_commas(types, depths, start, end) if end > start + 1 else []
+    total = len(commas) + 1 if end > start + 1 else 0
+    below = bisect_left(commas, first)
+    above = bisect_left(commas, stop)
+    if first == start + 1 and stop == end and not removed:
+        old_total = 0
+    else:
+        old_total = len(commas) - (above - below) + 1 + sum(
+            1 for code, depth in zip(removed, old_depths) if code == _VALUE_SEPARATOR and depth == level)
+    # The members before first and after stop are as they were, and so is
+    # one ended or begun by a comma that was rescanned as it was.
+    comma = (_VALUE_SEPARATOR, level)
+    index = below
+    if first < stop and removed and (types[first], depths[first]) == (removed[0], old_depths[0]) == comma:
+        index += 1
+    after = len(commas) - above
+    new_last = (types[stop - 1], depths[stop - 1]) if stop > first else (types[first - 1], depths[first - 1])
+    old_last = (removed[-1], old_depths[-1]) if removed else (types[first - 1], depths[first - 1])
+    if new_last == old_last == comma:
+        after += 1
+    bounds = [start, *commas, end] if total else [start]
+    return bounds[index], bounds[total - after], index, total - index - after, old_total - index - after, old_total
+
+
+class IncrementalDocument:
+    """A parsed document kept up to date through edits.
+
+    tape is its TokenTape and value the value match_value builds from the
+    tape.  edit rescans only around the edit, with TokenTape.edit, and
+    finds the innermost container enclosing every changed token.  Only the
+    members of it that hold changed tokens are built again, and they are
+    spliced into its list or dict in place of the old ones.  depths, the
+    depth of nesting after each token, is updated in place the same way.
+    If an edit leaves the document invalid, edit raises RuntimeError (or
+    ValueError for bad UTF-8) and value is None until an edit makes it
+    valid again, when it is built again in full.  use_decimal and keys are
+    as for Tokenizer.
+    """
+
+    def __init__(self, source, use_decimal=False, keys=None):
+        self.tape = TokenTape(source)
+        self.use_decimal = use_decimal
+        self.keys = KeyTable() if keys is None else keys
+        self.depths = _tape_depths(self.tape.types)
+        self.value = None
+        self.value = self._parse()
+
+    @property
+    def source(self):
+        return self.tape.source
+
+    def edit(self, offset, deleted, inserted):
+        """Replaces deleted characters at offset with inserted; returns value."""
+        first, old_stop, new_stop, removed = self.tape._edit(offset, deleted, inserted)
+        depths = self.depths
+        before = depths[first - 1] if first else 0
+        old_depths = depths[first:old_stop]
+        new_depths = array('i', accumulate(map(_depth_steps.__getitem__, self.tape.types[first:new_stop]),
+                                           initial=before))
+        depths[first:old_stop] = new_depths[1:]
+        _shift_offsets(depths, new_stop, new_depths[-1] - (old_depths[-1] if old_depths else before))
+        try:
+            if self.value is None:
+                self.value = self._parse()
+            else:
+                self._splice(removed, old_depths, first, new_stop)
+        except (RuntimeError, ValueError):
+            self.value = None
+            raise
+        return self.value
+
+    def _splice(self, removed, old_depths, first, stop):
+        """Builds again the members that hold the changed tokens.
+
+        The new tokens are first to stop; the old ones had the type codes
+        removed and the depths old_depths.
+        """
+        types = self.tape.types
+        depths = self.depths
+        before = depths[first - 1] if first else 0
+        lowest = min(before, min(old_depths, default=before))
+        old_end = old_depths[-1] if old_depths else before
+        new_end = depths[stop - 1] if stop > first else before
+        containers = _open_containers(types, depths, first)
+        for i in range(len(containers) - 1, -1, -1):
+            start = containers[i]
+            end = _container_end(depths, start)
+            # The old container must have run over the changed tokens and
+            # closed at the same token, for everything around to be as it was.
+            if end >= stop and lowest >= depths[start] and old_end == new_end:
+                break
+        else:
+            self.value = self._parse()
+            return
+        container = self.value
+        for position, step in zip(containers, self._path(depths, containers[:i + 1])):
+            if (container.__class__ is dict and len(container)
+                    != len(_member_commas(types, depths, position, _container_end(depths, position))) + 1):
+                # A repeated key may hide the changed tokens from value.
+                self.value = self._parse()
+                return
+            container = container[step]
+        lo, hi, index, count, old_count, old_total = _changed_members(
+            types, depths, start, end, first, stop, removed, old_depths)
+        is_object = types[start] == TokenType.BEGIN_OBJECT.value
+        members = self._members(lo, hi, count, is_object)
+        if not is_object:
+            container[index:index + old_count] = members
+            return
+        old_names = list(islice(container, index, index + old_count))
+        names = [name for name, _ in members]
+        if (len(container) != old_total or len(set(names)) < count
+                or any(name in container for name in set(names).difference(old_names))):
+            # With a key repeated, members and dict entries no longer
+            # correspond, so the whole object is built again.
+            value = Tokenizer(self.tape[start:end + 1], use_decimal=self.use_decimal, keys=self.keys).match_value()
+            container.clear()
+            container.update(value)
+        elif names == old_names:
+            container.update(members)
+        elif index + old_count == len(container):
+            for name in old_names:
+                del container[name]
+            container.update(members)
+        else:
+            # Keys and values go in separate lists rather than as items,
+            # to make no tuple per entry.
+            all_names = list(container)
+            values = list(container.values())
+            all_names[index:index + old_count] = names
+            values[index:index + old_count] = [value for _, value in members]
+            container.clear()
+            container.update(zip(all_names, values))
+
+    def _members(self, lo, hi, count, is_object):
+        """Builds the count members of a container between tokens lo and hi.
+
+        They are values, or (key, value) pairs for an object.
+        """
+        t = Tokenizer(self.tape[lo + 1:hi + 1], use_decimal=self.use_decimal, keys=self.keys)
+        intern = self.keys.intern
+        closing = TokenType.END_OBJECT if is_object else TokenType.END_ARRAY
+        members = []
+        while len(members) < count:
+            if is_object:
+                name = intern(t.read_key(t.get()))
+                members.append((name, t.match_value()))
+            else:
+                members.append(t.match_value())
+            token = t.get()
+            if token[0] is not TokenType.VALUE_SEPARATOR and (len(members) < count or token[0] is not closing):
+                raise RuntimeError(f"Expected , or {'}' if is_object else ']'} but got {token[1]}")
+        return members
+
+    def _path(self, depths, containers):
+        """Returns the key or index of each of containers in the one before it."""
+        tape = self.tape
+        steps = []
+        if numpy is not None:
+            depths = numpy.frombuffer(depths, numpy.intc)
+        for parent, child in zip(containers, containers[1:]):
+            if tape.types[parent] == TokenType.BEGIN_ARRAY.value:
+                # The index is the count of the array's own commas before child.
+                level = depths[parent]
+                if numpy is not None:
+                    codes = numpy.frombuffer(tape.types, numpy.uint8)[parent + 1:child]
+                    steps.append(int(numpy.count_nonzero(
+                        (codes == _VALUE_SEPARATOR) & (depths[parent + 1:child] == level))))
+                else:
+                    steps.append(sum(1 for i in range(parent + 1, child)
+                                     if tape.types[i] == _VALUE_SEPARATOR and depths[i] == level))
+            else:
+                # The key's tokens run back from the colon before child.
+                position = child - 3
+                parts = []
+                while tape.types[position] != _BEGIN_STRING_CODE:
+                    parts.append(tape.text(position))
+                    position -= 1
+                parts.reverse()
+                steps.append(_string_value(parts))
+        return steps
+
+    def _parse(self):
+        """Builds the whole document from the tape."""
+        t = Tokenizer(self.tape, use_decimal=self.use_decimal, keys=self.keys)
+        value = t.match_value()
+        if not t.seeing(TokenType.END):
+            raise RuntimeError(f"Unexpected data after value: {t.next_token()[1]!r}")
+        return value
+
+
+# Stage 1 of an indexed TokenTape: the offsets of the structural characters,
+# of both quotes of each string and of the first character of each other
+# run outside strings.  A backslash outside a string escapes a following
+# quote, as inside one, so that the NumPy version can find escapes without
+# knowing where strings are.
+index_pattern = re.compile(r'''
+    "[^"\\]*(?:\\.?[^"\\]*)*(?P<close>"?)
+  | [{}\[\],:]
+  | (?:[^\x20\t\n\r{}\[\],:"\\]|\\[\\"]?)+
+''', re.VERBOSE | re.DOTALL)
+index_bytes_pattern = re.compile(index_pattern.pattern.encode(), re.VERBOSE | re.DOTALL)
+INDEX_BLOCK_SIZE = 1 << 20
+
+
+def structural_index(source):
+    """Returns the offsets of the structure of source, in order.
+
+    These are the offsets of each of {}[],: outside strings, of the
+    opening and closing quote of each string, and of the first character
+    of each other run of characters outside strings, such as a number.
+    source is a str, whose offsets are in characters, or UTF-8 in a
+    bytes-like object, whose offsets are in bytes and whose byte order mark
+    is skipped.
+
+    With NumPy installed the offsets are found with whole-array operations
+    a block at a time, in the style of simdjson, and returned as a NumPy
+    array; otherwise they are found with index_pattern and returned as an
+    array.array.
+    """
+    if numpy is not None:
+        return _index_blocks(source)[0]
+    start = _index_start(source)
+    pattern = index_pattern if isinstance(source, str) else index_bytes_pattern
+    offsets = array('q')
+    add_offset = offsets.append
+    for m in pattern.finditer(source, start):
+        add_offset(m.start())
+        if m.group('close'):
+            add_offset(m.end() - 1)
+    return offsets
+
+
+def _index_start(source):
+    """Returns the offset after a UTF-8 byte order mark at the start of source."""
+    if not isinstance(source, str) and source[:len(codecs.BOM_UTF8)] == codecs.BOM_UTF8:
+        return len(codecs.BOM_UTF8)
+    return 0
+
+
+def _codes(source):
+    """Returns source as a NumPy array of byte or character codes."""
+    if isinstance(source, str):
+        return numpy.frombuffer(source.encode('utf-32-le'), numpy.uint32)
+    return numpy.frombuffer(source, numpy.uint8)
+
+
+def _index_blocks(source):
+    """Computes the structural index of source with NumPy.
+
+    Returns the offsets, the offset just after each run that is not a
+    string (in the order of the runs), the count of backslashes inside
+    strings before each quote in the offsets, and whether any backslash is
+    outside a string or any string is unclosed.
+    """
+    codes = _codes(source)
+    offsets, run_ends, quote_backslashes = [], [], []
+    escape_run = 0 # backslashes at the end of the last block
+    inside = 0 # whether the last block ended inside a string
+    in_run = False # whether the last block ended in a run
+    string_backslashes = 0
+    stray_backslash = False
+    for block_start in range(_index_start(source), len(codes), INDEX_BLOCK_SIZE):
+        block = codes[block_start:block_start + INDEX_BLOCK_SIZE]
+        positions = numpy.arange(len(block))
+        backslash = block == 92
+        # A character is escaped if an odd number of backslashes precede it.
+        last_plain = numpy.maximum.accumulate(numpy.where(backslash, -1, positions))
+        run = positions - last_plain
+        run[last_plain < 0] += escape_run
+        escaped = numpy.empty(len(block), bool)
+        escaped[0] = escape_run & 1
+        escaped[1:] = run[:-1] & 1
+        escape_run = int(run[-1])
+        quote = (block == 34) & ~escaped
+        # Within a string, or at its opening quote, an odd number of quotes
+        # have been seen: a prefix XOR of the quotes.
+        in_string = ((numpy.cumsum(quote) + inside) & 1).astype(bool)
+        inside = int(in_string[-1])
+        special = numpy.isin(block, _structural_ords)
+        whitespace = numpy.isin(block, _whitespace_ords)
+        structural = special & ~in_string
+        plain = ~(in_string | special | whitespace | quote)
+        previous = numpy.empty(len(block), bool)
+        previous[0] = in_run
+        previous[1:] = plain[:-1]
+        in_run = bool(plain[-1])
+        found = numpy.flatnonzero(structural | quote | (plain & ~previous))
+        offsets.append(found + block_start)
+        run_ends.append(numpy.flatnonzero(previous & ~plain) + block_start)
+        counted = numpy.cumsum(backslash & in_string) + string_backslashes
+        quote_backslashes.append(counted[found[quote[found]]])
+        string_backslashes = int(counted[-1])
+        stray_backslash = stray_backslash or bool((backslash & ~in_string).any())
+    if in_run:
+        run_ends.append(numpy.array([len(codes)]))
+    join = lambda parts: numpy.concatenate(parts) if parts else numpy.zeros(0, numpy.int64)
+    return (join(offsets), join(run_ends), join(quote_backslashes),
+            not stray_backslash and not inside)
+
+
+def _index_tape(source):
+    """Returns the types, starts and lengths of the tokens in source.
+
+    Stage 2 of an indexed TokenTape: the tokens are built from the index
+    with whole-array operations, except that strings with escapes are
+    scanned with _TapeScanner.  Returns None if source is not plain JSON,
+    when only _TapeScanner produces the right tokens.
+    """
+    offsets, run_ends, quote_backslashes, regular = _index_blocks(source)
+    if not regular:
+        return None
+    codes = _codes(source)
+    chars = codes[offsets]
+    is_quote = chars == 34
+    is_structural = numpy.isin(chars, _structural_ords)
+    runs = offsets[~(is_quote | is_structural)]
+    if len(runs) != len(run_ends):
+        return None
+    run_types = _run_types(codes, runs, run_ends - runs)
+    if run_types is None:
+        return None
+
+    quotes = offsets[is_quote]
+    opens, closes = quotes[0::2], quotes[1::2]
+    escapes = quote_backslashes[1::2] > quote_backslashes[0::2]
+    plain_opens, plain_closes = opens[~escapes], closes[~escapes]
+    filled = plain_closes - plain_opens > 1
+    ones = lambda n: numpy.ones(n, numpy.int64)
+    parts = [
+        (_structural_table[chars[is_structural]], offsets[is_structural], ones(is_structural.sum())),
+        (numpy.full(len(opens), _BEGIN_STRING_CODE), opens, ones(len(opens))),
+        (numpy.full(len(plain_closes), _END_STRING_CODE), plain_closes, ones(len(plain_closes))),
+        (numpy.full(filled.sum(), _STRING_CHAR), plain_opens[filled] + 1,
+         (plain_closes - plain_opens - 1)[filled]),
+        (run_types, runs, run_ends - runs),
+    ]
+    if escapes.any():
+        # Strings with escapes, up to and including their closing quotes.
+        types, starts, lengths = array('B'), array('q'), array('q')
+        scanner = _TapeScanner(not isinstance(source, str))
+        for start, end in zip(opens[escapes].tolist(), closes[escapes].tolist()):
+            scanner._scan_string(source, start + 1, end + 1, True, types, starts, lengths)
+        parts.append(tuple(numpy.array(part, numpy.int64) for part in (types, starts, lengths)))
+    types, starts, lengths = (numpy.concatenate([part[i] for part in parts]) for i in range(3))
+    order = numpy.argsort(starts, kind='stable')
+    return types[order], starts[order], lengths[order]
+
+
+def _run_types(codes, starts, lengths):
+    """Returns the type code of each run, or None unless all are numbers or keywords.
+
+    Numbers are checked by stepping _number_transitions over all of them
+    at once, a character position at a time.
+    """
+    types = numpy.full(len(starts), _NUMBER, numpy.int64)
+    last = len(codes) - 1
+    for keyword, code in _keyword_tokens.items():
+        chosen = codes[starts] == ord(keyword[0])
+        match = chosen & (lengths == len(keyword))
+        for i, char in enumerate(keyword[1:], 1):
+            match &= codes[numpy.minimum(starts + i, last)] == ord(char)
+        if (chosen != match).any():
+            return None
+        types[chosen] = code[0].value
+    numbers = types == _NUMBER
+    starts, lengths = starts[numbers], lengths[numbers]
+    if not len(starts):
+        return types
+    width = int(lengths.max())
+    if width > 64:
+        return None
+    columns = numpy.arange(width)
+    chars = codes[numpy.minimum(starts[:, None] + columns, last)]
+    classes = _number_classes[numpy.minimum(chars, 127)]
+    classes[chars > 127] = _OTHER_CLASS
+    classes[columns >= lengths[:, None]] = _END_CLASS
+    states = numpy.full(len(starts), _START_STATE)
+    for column in classes.T:
+        states = _number_table[states, column]
+    if not _accepting_states[states].all():
+        return None
+    return types
+
+
+# Each value or structural character outside strings, with the whitespace
+# after it, so that findall cuts the whole input into its structure.  A
+# string is one match, which ends early if the string is never closed.
+lazy_token_pattern = re.compile(r'''
+    (?: "[^"\\]*(?:\\.[^"\\]*)*"?
+      | [{}\[\],:]
+      | [^\x20\t\n\r{}\[\],:"]+
+    )[\x20\t\n\r]*
+''', re.VERBOSE | re.DOTALL)
+lazy_token_bytes_pattern = re.compile(lazy_token_pattern.pattern.encode(), re.VERBOSE | re.DOTALL)
+leading_whitespace_pattern = re.compile(r'[\x20\t\n\r]*')
+leading_whitespace_bytes_pattern = re.compile(rb'[\x20\t\n\r]*')
+closed_string_pattern = re.compile(r'"[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+closed_string_bytes_pattern = re.compile(closed_string_pattern.pattern.encode(), re.DOTALL)
+bracket_pattern = re.compile(r'[\[\]{}]')
+# Sources at least this long are indexed with structural_index when NumPy
+# is installed; for shorter ones findall is quicker.
+LAZY_NUMPY_THRESHOLD = 1 << 20
+_scalar_words = {'true': True, 'false': False, 'null': None}
+
+
+def parse_lazy(source, use_decimal=False, keys=None):
+    """Returns the value in source, parsing only the parts that are used.
+
+    An object or array is returned as a LazyObject or LazyArray, which
+    parses its members from source when they are first asked for, making
+    containers within it lazy in turn, and caches them.  Nothing is built
+    for members that are never looked at, so reading a few fields of a
+    document costs little more than finding its structure.
+
+    source is a str or a UTF-8 bytes-like object, which the proxies keep.
+    Its structure is found up front, as one offset and one character per
+    value or structural character outside strings plus where each
+    container ends.  Brackets must balance and the value must fill source,
+    but members are only checked when they are read.  use_decimal and keys
+    are as for Tokenizer; object keys are interned in the KeyTable.
+    """
+    if not isinstance(source, (str,) + binary_types) and hasattr(source, 'read'):
+        source = source.read()
+    document = _LazyDocument(source, use_decimal, keys)
+    if not document.kinds:
+        raise RuntimeError("Expected a value")
+    end = document.end(0)
+    if end != len(document.kinds) - 1:
+        raise RuntimeError(f"Unexpected data after value at offset {document.offsets[end + 1]}")
+    return document.value(0)
+
+
+class _LazyDocument:
+    """The source of lazy proxies and its structure.
+
+    offsets holds the offset of each value and structural character
+    outside strings, then the length of source, and kinds the character
+    at each offset (a string is one entry, at its opening quote).  ends maps the position in offsets
+    of each opening bracket to that of its closing bracket.
+    """
+
+    __slots__ = ('source', 'binary', 'use_decimal', 'keys', 'offsets', 'kinds', 'ends')
+
+    def __init__(self, source, use_decimal, keys):
+        self.source = source
+        self.binary = not isinstance(source, str)
+        self.use_decimal = use_decimal
+        self.keys = KeyTable() if keys is None else keys
+        if numpy is not None and len(source) >= LAZY_NUMPY_THRESHOLD:
+            self._index_arrays()
+        else:
+            self._index_scan()
+
+    def _index_scan(self):
+        """Finds the structure with findall, matching brackets one by one."""
+        source = self.source
+        if self.binary:
+            start = leading_whitespace_bytes_pattern.match(source, _index_start(source)).end()
+            tokens = lazy_token_bytes_pattern.findall(source, start)
+            self.kinds = bytes(map(_first, tokens)).decode('latin-1')
+        else:
+            start = leading_whitespace_pattern.match(source).end()
+            tokens = lazy_token_pattern.findall(source, start)
+            self.kinds = ''.join(map(_first, tokens))
+        self.offsets = array('I' if len(source) < 2 ** 32 else 'Q', accumulate(map(len, tokens), initial=start))
+        ends = {}
+        opened = []
+        for m in bracket_pattern.finditer(self.kinds):
+            kind = m.group()
+            if kind == '[' or kind == '{':
+                opened.append(m.start())
+            elif not opened or self.kinds[opened[-1]] != _opening_brackets[kind]:
+                raise RuntimeError(f"Unbalanced {kind} at offset {self.offsets[m.start()]}")
+            else:
+                ends[opened.pop()] = m.start()
+        if opened:
+            raise RuntimeError("Input ends inside a container")
+        self.ends = ends
+
+    def _index_arrays(self):
+        """Finds the structure from the structural_index, with NumPy."""
+        offsets = structural_index(self.source)
+        codes = _codes(self.source)[offsets]
+        # Keep only the opening quote of each string.
+        closing_quotes = numpy.flatnonzero(codes == 34)[1::2]
+        offsets = numpy.delete(offsets, closing_quotes)
+        codes = numpy.delete(codes, closing_quotes)
+        self.kinds = numpy.where(codes < 128, codes, 63).astype(numpy.uint8).tobytes().decode('ascii')
+        opens = (codes == 91) | (codes == 123)
+        closes = (codes == 93) | (codes == 125)
+        depth = numpy.cumsum(opens.astype(numpy.int64) - closes)
+        if len(depth) and (depth.min() < 0 or depth[-1]):
+            raise RuntimeError("Unbalanced brackets")
+        # A bracket's level is the depth just inside it.  On each level the
+        # brackets, in order, pair off into an opening and a closing one.
+        brackets = numpy.flatnonzero(opens | closes)
+        levels = numpy.where(opens, depth, depth + 1)[brackets]
+        paired = brackets[numpy.lexsort((brackets, levels))]
+        starts, stops = paired[0::2], paired[1::2]
+        if not opens[starts].all() or (codes[stops] - codes[starts] != 2).any():
+            raise RuntimeError("Unbalanced brackets")
+        offset_type = 'I' if len(self.source) < 2 ** 32 else 'Q'
+        self.offsets = array(offset_type, offsets.astype(offset_type).tobytes())
+        self.offsets.append(len(self.source))
+        self.ends = dict(zip(starts.tolist(), stops.tolist()))
+
+    def end(self, position):
+        """Returns the position in offsets of the last entry of the value at position."""
+        kind = self.kinds[position]
+        if kind == '[' or kind == '{':
+            return self.ends[position]
+        if kind in ',:]}':
+            raise RuntimeError(f"Expected a value at offset {self.offsets[position]} but got {kind}")
+        return position
+
+    def text(self, position):
+        """Returns the source text of the value at position, without whitespace after it."""
+        text = self.source[self.offsets[position]:self.offsets[position + 1]]
+        if self.binary:
+            return bytes(text).rstrip(b' \t\n\r')
+        return text.rstrip(' \t\n\r')
+
+    def value(self, position):
+        """Returns the value at position, lazily if it is a container."""
+        kind = self.kinds[position]
+        if kind == '{':
+            return LazyObject(self, position)
+        if kind == '[':
+            return LazyArray(self, position)
+        if kind == '"':
+            return self.string(position)
+        self.end(position)
+        text = self.text(position)
+        if self.binary:
+            text = str(text, 'utf-8', 'replace')
+        if text in _scalar_words:
+            return _scalar_words[text]
+        if not number_pattern.match(text):
+            raise RuntimeError(f"Invalid value at offset {self.offsets[position]}: {text!r}")
+        return _number_value(text, self.use_decimal)
+
+    def string(self, position):
+        """Returns the string whose opening quote is at position."""
+        text = self.text(position)
+        # Only a string at the end of the input can be unclosed.
+        if len(text) < 2 or text[-1:] not in ('"', b'"') or (
+                position == len(self.kinds) - 1
+                and not (closed_string_bytes_pattern if self.binary else closed_string_pattern).fullmatch(text)):
+            raise RuntimeError(f"Unclosed string at offset {self.offsets[position]}")
+        return _string_value([text[1:-1]])
+
+    def materialize(self, position):
+        """Returns the value at position built in full by match_value."""
+        start = self.offsets[position]
+        stop = self.offsets[self.end(position)] + 1
+        return Tokenizer(self.source[start:stop], engine='regex', use_decimal=self.use_decimal,
+                         keys=self.keys).match_value()
+
+
+_opening_brackets = {']': '[', '}': '{'}
+_MISSING = object()
+
+
+class LazyObject(Mapping):
+    """A JSON object whose members are parsed when first read; see parse_lazy.
+
+    It is a read-only Mapping, so it has get, keys, items and the rest as
+    well as [], len and iteration.  Keys are found, all at once, the first
+    time any is needed.
+    """
+
+    __slots__ = ('_document', '_position', '_fields', '_values')
+
+    def __init__(self, document, position):
+        self._document = document
+        self._position = position
+        self._fields = None # key -> position of its value
+        self._values = {}
+
+    def __getitem__(self, key):
+        value = self._values.get(key, _MISSING)
+        if value is _MISSING:
+            value = self._values[key] = self._document.value(self._members()[key])
+        return value
+
+    def __iter__(self):
+        return iter(self._members())
+
+    def __len__(self):
+        return len(self._members())
+
+    def __repr__(self):
+        return f"LazyObject(<{len(self)} keys at offset {self._document.offsets[self._position]}>)"
+
+    def materialize(self) -> dict:
+        """Returns the object as a plain dict, nested values included."""
+        return self._document.materialize(self._position)
+
+    def _members(self):
+        """Returns the dict from each key to the position of its value."""
+        if self._fields is None:
+            document = self._document
+            kinds = document.kinds
+            intern = document.keys.intern
+            fields = {}
+            position = self._position + 1
+            if kinds[position] != '}':
+                while True:
+                    if kinds[position] != '"':
+                        raise RuntimeError(f"Expected a key at offset {document.offsets[position]}")
+                    key = document.string(position)
+                    if kinds[position + 1] != ':':
+                        raise RuntimeError(f"Expected : at offset {document.offsets[position + 1]}")
+                    fields[intern(key)] = position + 2
+                    position = document.end(position + 2) + 1
+                    kind = kinds[position]
+                    if kind == '}':
+                        break
+                    if kind != ',':
+                        raise RuntimeError(f"Expected , or }} at offset {document.offsets[position]}")
+                    position += 1
+            self._fields = fields
+        return self._fields
+
+
+class LazyArray(Sequence):
+    """A JSON array whose elements are parsed when first read; see parse_lazy.
+
+    It is a read-only Sequence: it supports [], slicing (to a list), len,
+    iteration, in, index and count, and compares equal to a list or
+    LazyArray with equal elements.
+    """
+
+    __slots__ = ('_document', '_position', '_elements', '_values')
+
+    def __init__(self, document, position):
+        self._document = document
+        self._position = position
+        self._elements = None # the position of each element
+        self._values = None
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        elements = self._members()
+        value = self._values[index]
+        if value is _MISSING:
+            value = self._values[index] = self._document.value(elements[index])
+        return value
+
+    def __len__(self):
+        return len(self._members())
+
+    def __eq__(self, other):
+        if isinstance(other, (list, LazyArray)):
+            return len(self) == len(other) and all(a == b for a, b in zip(self, other))
+        return NotImplemented
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"LazyArray(<{len(self)} elements at offset {self._document.offsets[self._position]}>)"
+
+    def materialize(self) -> list:
+        """Returns the array as a plain list, nested values included."""
+        return self._document.materialize(self._position)
+
+    def _members(self):
+        """Returns the list of the positions of the elements."""
+        if self._elements is None:
+            document = self._document
+            kinds = document.kinds
+            elements = []
+            position = self._position + 1
+            if kinds[position] != ']':
+                while True:
+                    elements.append(position)
+                    position = document.end(position) + 1
+                    kind = kinds[position]
+                    if kind == ']':
+                        break
+                    if kind != ',':
+                        raise RuntimeError(f"Expected , or ] at offset {document.offsets[position]}")
+                    position += 1
+            self._elements = elements
+            self._values = [_MISSING] * len(elements)
+        return self._elements
+
+
+class _SpanSource:
+    """A piece of the input that span tokens slice their text from.
+
+    base is the offset of text in the whole input, line the line number at
+    base and line_start the offset at which that line begins.
+    """
+
+    __slots__ = ('text', 'base', 'line', 'line_start', 'binary', '_newlines')
+
+    def __init__(self, text, base, line, line_start, binary):
+        self.text = text
+        self.base = base
+        self.line = line
+        self.line_start = line_start
+        self.binary = binary
+        self._newlines = None
+
+    def value(self, token_type, start, end):
+        """Returns what a (TokenType, str) tuple would hold for the token."""
+        text = self.text[start - self.base:end - self.base]
+        if self.binary and token_type is not TokenType.STRING_CHAR and token_type is not TokenType.ERROR:
+            text = str(text, 'ascii')
+        return text
+
+    def position(self, offset) -> Tuple[int, int]:
+        """Returns the line and column of offset, both counting from 1."""
+        if self._newlines is None:
+            pattern = newline_bytes_pattern if self.binary else newline_pattern
+            self._newlines = array('Q', (m.start() for m in pattern.finditer(self.text)))
+        lines = bisect_left(self._newlines, offset - self.base)
+        if lines:
+            line_start = self.base + self._newlines[lines - 1] + 1
+        else:
+            line_start = self.line_start
+        return self.line + lines, offset - line_start + 1
+
+    def count_lines(self, stop) -> Tuple[int, int]:
+        """Returns the line number and line start at base + stop."""
+        newline = b'\n' if self.binary else '\n'
+        lines = self.text.count(newline, 0, stop)
+        if not lines:
+            return self.line, self.line_start
+        return self.line + lines, self.base + self.text.rfind(newline, 0, stop) + 1
+
+
+class Span:
+    """A token that records where its text is instead of copying it.
+
+    start and end are offsets into the whole input; the text is only sliced
+    out when text is read.  span[0] and span[1] give the token type and the
+    same value a (TokenType, str) token would hold, so a Span can stand in
+    for one.
+    """
+
+    __slots__ = ('type', 'start', 'end', '_source')
+
+    def __init__(self, type, start, end, source):
+        self.type = type
+        self.start = start
+        self.end = end
+        self._source = source
+
+    @property
+    def text(self):
+        """The source text of the token."""
+        base = self._source.base
+        return self._source.text[self.start - base:self.end - base]
+
+    @property
+    def line(self) -> int:
+        """The line the token begins on, counting from 1."""
+        return self._source.position(self.start)[0]
+
+    @property
+    def column(self) -> int:
+        """The column the token begins at, counting from 1."""
+        return self._source.position(self.start)[1]
+
+    def __getitem__(self, index):
+        if index == 0 or index == -2:
+            return self.type
+        if index == 1 or index == -1:
+            return self._source.value(self.type, self.start, self.end)
+        raise IndexError("Span index out of range")
+
+    def __repr__(self):
+        return f"Span({self.type}, {self.start}, {self.end})"
+
+
+_token_types = {token_type.value: token_type for token_type in TokenType}
+_constant_tokens = {
+    token[0].value: token
+    for token in list(_structural_tokens.values()) + list(_keyword_tokens.values())
+        + [_BEGIN_STRING, _END_STRING, _END]
+}
+_structural_codes = {char: token[0].value for char, token in _structural_tokens.items()}
+_structural_codes_bytes = {char.encode(): code for char, code in _structural_codes.items()}
+_keyword_codes = {
+    't': TokenType.TRUE.value, 'f': TokenType.FALSE.value, 'n': TokenType.NULL.value,
+    ord('t'): TokenType.TRUE.value, ord('f'): TokenType.FALSE.value, ord('n'): TokenType.NULL.value,
+}
+_BEGIN_STRING_CODE = TokenType.BEGIN_STRING.value
+_END_STRING_CODE = TokenType.END_STRING.value
+_STRING_CHAR = TokenType.STRING_CHAR.value
+_NUMBER = TokenType.NUMBER.value
+_ERROR = TokenType.ERROR.value
+_VALUE_SEPARATOR = TokenType.VALUE_SEPARATOR.value
+# Tokens inside a string, and those after which the scanner's state is
+# known from the token alone.
+_string_part_codes = frozenset((_STRING_CHAR, _END_STRING_CODE, _ERROR))
+_resync_codes = frozenset(list(_structural_codes.values()) + [_BEGIN_STRING_CODE, _END_STRING_CODE])
+_depth_steps = [0] * 256
+for token_type, step in _depth_changes.items():
+    if token_type is not TokenType.END_STRING:
+        _depth_steps[token_type.value] = step
+
+# Tables for building tokens from a structural index with NumPy.
+_structural_ords = [ord(char) for char in _structural_codes]
+_whitespace_ords = [ord(char) for char in ' \t\n\r']
+_number_states = ['start', 'dead'] + list(_number_transitions)
+_number_class_chars = '01-+.e' # one character of each class but the last two
+_OTHER_CLASS = len(_number_class_chars)
+_END_CLASS = _OTHER_CLASS + 1
+_START_STATE = 0
+if numpy is not None:
+    _structural_table = numpy.zeros(128, numpy.int64)
+    for char, code in _structural_codes.items():
+        _structural_table[ord(char)] = code
+    _number_classes = numpy.full(128, _OTHER_CLASS, numpy.int64)
+    for char in '0123456789-+.eE':
+        _number_classes[ord(char)] = _number_class_chars.index(
+            '1' if char in '123456789' else 'e' if char == 'E' else char)
+    _number_table = numpy.empty((len(_number_states), _END_CLASS + 1), numpy.int64)
+    for state, name in enumerate(_number_states):
+        transitions = _number_start if name == 'start' else _number_transitions.get(name, {})
+        for cls, char in enumerate(_number_class_chars):
+            _number_table[state, cls] = _number_states.index(transitions.get(char, 'dead'))
+        _number_table[state, _OTHER_CLASS] = _number_states.index('dead')
+        _number_table[state, _END_CLASS] = state
+    _accepting_states = numpy.array([name in _number_accepting for name in _number_states])
+    _depth_step_table = numpy.array(_depth_steps, numpy.int8)
+
 
 if __name__ == "__main__":
     print("Enter some JSON code to tokenize:")
     while True:
         s = input()
-        t = Tokenizer(list(s))
+        t = Tokenizer(s)
         while True:
             token = t.get()
             print(token)
@@ -1,7 +1,16 @@
 """Unit tests for the json tokenizer."""
 
+from array import array
+from decimal import Decimal
+import io
+from itertools import chain
+import mmap
+import tempfile
 import unittest
-from json_tokenizer import TokenType, Tokenizer
+from unittest import mock
+import json_tokenizer
+from json_tokenizer import (IncrementalDocument, KeyTable, LazyArray, LazyObject, ParseStats, PushParser,
+                            TokenTape, TokenType, Tokenizer, parse_lazy, profile_parse, structural_index)
 
 class TestJsonTokenizer(unittest.TestCase):
 
@@ -273,6 +282,994 @@ class TestJsonTokenizer(unittest.TestCase):
         self.assertEqual(t.next_token(), (TokenType.END, ''))
 
 
+class TestRegexEngine(unittest.TestCase):
+
+    samples = [
+        '',
+        '1.23',
+        '"Hello World!"',
+        '"\\t\\n\\\\\\""',
+        '"bad \\x escape"',
+        '["a", "b", 0]',
+        '{"Name": "John", "Age": 50}',
+        '{ {"A"}, {} }',
+        '[["a", "b"], ["c"]]',
+        '{null} {true} {false}',
+        '-1 +2 .5 5. 1.2.3 12abc',
+        'truefalse nul,l tr{ue',
+        'garbage1 "unterminated',
+        '1\n2',
+        '1e10 6.02E+23 -0.5e-3 1. - 2e+ 012 -x 1e5x',
+    ]
+
+    def assertSameTokens(self, s):
+        expected = list(Tokenizer(list(s)).token_stream)
+        actual = list(Tokenizer(s, engine='regex').token_stream)
+        self.assertEqual(actual, expected, s)
+
+    def test_matches_char_engine(self):
+        for s in self.samples:
+            self.assertSameTokens(s)
+
+    def test_accepts_character_lists(self):
+        t = Tokenizer(list('[1]'), engine='regex')
+        self.assertEqual(t.get(), (TokenType.BEGIN_ARRAY, '['))
+        self.assertEqual(t.get(), (TokenType.NUMBER, '1'))
+        self.assertEqual(t.get(), (TokenType.END_ARRAY, ']'))
+        self.assertEqual(t.get(), (TokenType.END, ''))
+
+    def test_matches_char_engine_across_batches(self):
+        s = '[' + ', '.join(['{"key": "value", "n": -12.5}'] * 1000) + ']'
+        self.assertSameTokens(s)
+
+    def test_matches_char_engine_around_bulk_scans(self):
+        # Long strings and words are left to the master pattern part way
+        # through text that is otherwise scanned in bulk.
+        record = '{"key": "v\\u00e9", "n": [-1.5e3, 0, true, null], "s": "%s"}'
+        s = '[' + ',\n '.join([record % ('x' * 300), record % 'y', 'nul', '12abc', record % ''] * 300) + ']'
+        self.assertSameTokens(s)
+        t = Tokenizer(io.StringIO(s), engine='regex', chunk_size=1000)
+        self.assertEqual(list(t.token_stream), list(Tokenizer(s, engine='regex').token_stream))
+
+    def test_numbers_end_at_newlines(self):
+        t = Tokenizer(list('1\n2'))
+        self.assertEqual(t.get(), (TokenType.NUMBER, '1'))
+        self.assertEqual(t.get(), (TokenType.NUMBER, '2'))
+
+    def test_rejects_unknown_engine(self):
+        with self.assertRaises(ValueError):
+            Tokenizer('', engine='simd')
+
+    def test_string_runs(self):
+        t = Tokenizer('["Hello", "a\\nb", ""]', engine='regex', string_runs=True)
+        self.assertEqual(list(t.token_stream)[:9], [
+            (TokenType.BEGIN_ARRAY, '['),
+            (TokenType.BEGIN_STRING, '"'),
+            (TokenType.STRING_CHAR, 'Hello'),
+            (TokenType.END_STRING, '"'),
+            (TokenType.VALUE_SEPARATOR, ','),
+            (TokenType.BEGIN_STRING, '"'),
+            (TokenType.STRING_CHAR, 'a'),
+            (TokenType.STRING_CHAR, '\\n'),
+            (TokenType.STRING_CHAR, 'b'),
+        ])
+        document = '{"k\\u00e9y": ["plain", "tab\\there", "café"]}'
+        for source in (document, io.StringIO(document)):
+            t = Tokenizer(source, engine='regex', string_runs=True, chunk_size=4)
+            self.assertEqual(t.match_value(), {'kéy': ['plain', 'tab\there', 'café']})
+        with self.assertRaises(ValueError):
+            Tokenizer('""', string_runs=True)
+
+
+class TestNumbers(unittest.TestCase):
+
+    def tokens(self, s, engine):
+        return list(Tokenizer(s, engine=engine).token_stream)[:-1]
+
+    def test_parses_exponents(self):
+        for engine in Tokenizer.engines:
+            self.assertEqual(self.tokens('[1e10, 6.02E+23, -2.5e-3]', engine), [
+                (TokenType.BEGIN_ARRAY, '['),
+                (TokenType.NUMBER, '1e10'),
+                (TokenType.VALUE_SEPARATOR, ','),
+                (TokenType.NUMBER, '6.02E+23'),
+                (TokenType.VALUE_SEPARATOR, ','),
+                (TokenType.NUMBER, '-2.5e-3'),
+                (TokenType.END_ARRAY, ']'),
+            ])
+
+    def test_incomplete_numbers_are_errors(self):
+        for engine in Tokenizer.engines:
+            for s in ('1.', '-', '2e+', '3.5E', '012'):
+                self.assertEqual(self.tokens(s, engine), [(TokenType.ERROR, s)])
+
+    def test_long_numbers(self):
+        digits = '9' * 100000
+        for engine in Tokenizer.engines:
+            self.assertEqual(self.tokens(digits, engine), [(TokenType.NUMBER, digits)])
+
+    def test_match_number_converts(self):
+        self.assertEqual(Tokenizer('42').match_number(), 42)
+        self.assertIs(type(Tokenizer('-7').match_number()), int)
+        self.assertEqual(Tokenizer('12345678901234567890').match_number(), 12345678901234567890)
+        self.assertEqual(Tokenizer('2.5').match_number(), 2.5)
+        self.assertEqual(Tokenizer('1E3').match_number(), 1000.0)
+        self.assertIs(type(Tokenizer('1E3').match_number()), float)
+
+    def test_use_decimal(self):
+        t = Tokenizer('0.1', use_decimal=True)
+        self.assertEqual(t.match_number(), Decimal('0.1'))
+        self.assertEqual(Tokenizer('10', use_decimal=True).match_number(), 10)
+
+    def test_match_value_converts(self):
+        t = Tokenizer('[1, -0.5, true, false, null]', engine='regex')
+        self.assertEqual(t.match_value(), [1, -0.5, True, False, None])
+
+
+class TestMatchString(unittest.TestCase):
+
+    def tokenizers(self, s):
+        yield Tokenizer(list(s))
+        yield Tokenizer(s, engine='regex')
+        yield Tokenizer(s.encode(), engine='regex')
+        yield Tokenizer(io.StringIO(s), engine='regex', chunk_size=3)
+        yield Tokenizer(s, spans=True)
+        yield Tokenizer(TokenTape(s))
+
+    def assertDecodes(self, s, expected):
+        for t in self.tokenizers(s):
+            self.assertEqual(t.match_string(), expected, s)
+
+    def test_decodes_escapes(self):
+        self.assertDecodes('"a\\nb\\t\\"q\\" \\\\ \\/ \\b\\f\\r"', 'a\nb\t"q" \\ / \b\f\r')
+
+    def test_decodes_unicode_escapes(self):
+        self.assertDecodes('"caf\\u00e9 \\u20AC"', 'caf\u00e9 \u20ac')
+
+    def test_decodes_surrogate_pairs(self):
+        self.assertDecodes('"\\ud83d\\ude00!"', '\U0001f600!')
+
+    def test_empty_string(self):
+        self.assertDecodes('""', '')
+
+    def test_run_without_escapes_is_returned_whole(self):
+        s = 'x' * 100000
+        self.assertDecodes(f'"{s}"', s)
+
+    def test_rejects_invalid_escapes(self):
+        for s in ('"\\x"', '"\\\'"', '"\\u12"', '"open'):
+            for t in self.tokenizers(s):
+                with self.assertRaises(RuntimeError):
+                    t.match_string()
+
+
+class TestKeyInterning(unittest.TestCase):
+
+    document = '[{"id": 1, "status": "OK"}, {"id": 2, "status": "OK"}, {"status": "ERROR", "id": 3}]'
+
+    def test_keys_are_shared(self):
+        records = Tokenizer(self.document, engine='regex').match_value()
+        self.assertEqual(records[2], {'status': 'ERROR', 'id': 3})
+        first, second, third = (list(record) for record in records)
+        self.assertIs(first[0], second[0])
+        self.assertIs(first[1], third[0])
+
+    def test_key_table_is_shared_between_parses(self):
+        keys = KeyTable()
+        a = Tokenizer('{"name": 1}', keys=keys).match_value()
+        b = Tokenizer('{"name": 2}', engine='regex', keys=keys).match_value()
+        self.assertIs(next(iter(a)), next(iter(b)))
+        self.assertEqual(len(keys), 1)
+
+    def test_wide_object(self):
+        document = '{' + ', '.join(f'"k{i}": {i}' for i in range(20000)) + '}'
+        keys = KeyTable()
+        for engine in ('char', 'regex'):
+            value = Tokenizer(document, engine=engine, keys=keys).match_value()
+            self.assertEqual(value, {f'k{i}': i for i in range(20000)})
+            # Only the first keys are cached as shapes.
+            self.assertLessEqual(keys.size, 64)
+
+    def test_key_table_is_bounded(self):
+        keys = KeyTable(limit=100)
+        for i in range(1000):
+            value = Tokenizer(f'{{"a{i}": 1, "b{i}": [{{"c{i}": 2}}]}}', keys=keys).match_value()
+            self.assertEqual(value, {f'a{i}': 1, f'b{i}': [{f'c{i}': 2}]})
+            self.assertLessEqual(keys.size, 100)
+            self.assertLessEqual(len(keys), 100)
+
+    def test_interns_short_values(self):
+        records = Tokenizer(self.document, engine='regex', intern_values=5).match_value()
+        self.assertIs(records[0]['status'], records[1]['status'])
+        records = Tokenizer(self.document, engine='regex').match_value()
+        self.assertIsNot(records[0]['status'], records[1]['status'])
+
+    def test_later_duplicate_key_wins(self):
+        self.assertEqual(Tokenizer('{"a": 1, "a": 2}').match_value(), {'a': 2})
+
+
+class TestMatchValue(unittest.TestCase):
+
+    def test_builds_nested_values(self):
+        document = '{"a": [1, {"b": null}, [], {}], "c": {"d": [true, "e"]}}'
+        for t in (Tokenizer(list(document)), Tokenizer(document, engine='regex'), Tokenizer(document, spans=True)):
+            self.assertEqual(t.match_value(), {'a': [1, {'b': None}, [], {}], 'c': {'d': [True, 'e']}})
+
+    def test_empty_containers(self):
+        self.assertEqual(Tokenizer('[]').match_array(), [])
+        self.assertEqual(Tokenizer('{}').match_object(), {})
+
+    def test_deep_nesting(self):
+        depth = 100000
+        value = Tokenizer('[' * depth + ']' * depth, engine='regex').match_value()
+        for _ in range(depth - 1):
+            value, = value
+        self.assertEqual(value, [])
+        value = Tokenizer('{"a": ' * depth + '0' + '}' * depth, engine='regex').match_value()
+        for _ in range(depth):
+            value = value['a']
+        self.assertEqual(value, 0)
+
+    def test_leaves_following_tokens(self):
+        t = Tokenizer('[1, 2] {"a": 3}', engine='regex')
+        self.assertEqual(t.match_array(), [1, 2])
+        self.assertEqual(t.match_object(), {'a': 3})
+        self.assertTrue(t.seeing(TokenType.END))
+
+    def test_rejects_malformed_containers(self):
+        for document in ('[1, 2', '[1,]', '[1 2]', '{"a" 1}', '{"a": 1,}', '{1: 2}', '{"a": 1]', ']'):
+            with self.assertRaises(RuntimeError, msg=document):
+                Tokenizer(document, engine='regex').match_value()
+
+    def test_wrappers_check_container_type(self):
+        with self.assertRaises(RuntimeError):
+            Tokenizer('[1]').match_object()
+        with self.assertRaises(RuntimeError):
+            Tokenizer('{}').match_array()
+
+
+class TestEvents(unittest.TestCase):
+
+    document = '{"items": [{"price": 1.5, "tags": ["a"]}, {"price": 2, "x": {}}], "ok": false, "n": null}'
+
+    def test_events_with_prefixes(self):
+        self.assertEqual(list(Tokenizer(self.document, engine='regex').events()), [
+            ('', 'start_map', None),
+            ('', 'map_key', 'items'),
+            ('items', 'start_array', None),
+            ('items.item', 'start_map', None),
+            ('items.item', 'map_key', 'price'),
+            ('items.item.price', 'number', 1.5),
+            ('items.item', 'map_key', 'tags'),
+            ('items.item.tags', 'start_array', None),
+            ('items.item.tags.item', 'string', 'a'),
+            ('items.item.tags', 'end_array', None),
+            ('items.item', 'end_map', None),
+            ('items.item', 'start_map', None),
+            ('items.item', 'map_key', 'price'),
+            ('items.item.price', 'number', 2),
+            ('items.item', 'map_key', 'x'),
+            ('items.item.x', 'start_map', None),
+            ('items.item.x', 'end_map', None),
+            ('items.item', 'end_map', None),
+            ('items', 'end_array', None),
+            ('', 'map_key', 'ok'),
+            ('ok', 'boolean', False),
+            ('', 'map_key', 'n'),
+            ('n', 'null', None),
+            ('', 'end_map', None),
+        ])
+
+    def test_items(self):
+        t = Tokenizer(self.document, engine='regex')
+        self.assertEqual(list(t.items('items.item')), [{'price': 1.5, 'tags': ['a']}, {'price': 2, 'x': {}}])
+        t = Tokenizer(self.document, engine='regex')
+        self.assertEqual(list(t.items('items.item.price')), [1.5, 2])
+        t = Tokenizer('[1] [2]')
+        self.assertEqual(list(t.items('')), [[1], [2]])
+
+    def test_items_from_a_stream(self):
+        document = '{"rows": [' + ', '.join(f'{{"id": {i}}}' for i in range(1000)) + ']}'
+        t = Tokenizer(io.StringIO(document), engine='regex', chunk_size=100)
+        self.assertEqual([row['id'] for row in t.items('rows.item')], list(range(1000)))
+
+    def test_rejects_malformed_input(self):
+        for document in ('[1,', '{"a": 1]', '[1 2]'):
+            with self.assertRaises(RuntimeError, msg=document):
+                list(Tokenizer(document, engine='regex').events())
+
+
+class TestParseStats(unittest.TestCase):
+
+    document = '{"a": [1, -2.5e10, "hello"], "b": [[{}]], "c": "\\n"}'
+
+    def test_counts_tokens_and_input(self):
+        for engine in Tokenizer.engines:
+            stats = ParseStats()
+            t = Tokenizer(io.StringIO(self.document), engine=engine, chunk_size=7, stats=stats)
+            self.assertEqual(t.match_value(), {'a': [1, -2.5e10, 'hello'], 'b': [[{}]], 'c': '\n'})
+            self.assertEqual(stats.consumed, len(self.document))
+            self.assertEqual(stats.counts[TokenType.NUMBER], 2)
+            self.assertEqual(stats.counts[TokenType.BEGIN_STRING], 5)
+            self.assertEqual(stats.max_depth, 4)
+            self.assertEqual(stats.longest_string, 5)
+            self.assertEqual(stats.longest_number, 7)
+            self.assertGreater(stats.scan_time, 0)
+            self.assertGreater(stats.build_time, 0)
+
+    def test_counts_in_memory_input(self):
+        inputs = {
+            'char': list(self.document),
+            'char str': self.document,
+            'regex': self.document,
+            'regex bytes': self.document.encode(),
+            'spans': self.document,
+            'spans bytes': self.document.encode(),
+        }
+        for name, source in inputs.items():
+            stats = ParseStats()
+            options = {'spans': True} if name.startswith('spans') else {'engine': name.split()[0]}
+            Tokenizer(source, stats=stats, **options).match_value()
+            self.assertEqual(stats.consumed, len(source), msg=name)
+        stats = ParseStats()
+        Tokenizer(TokenTape(self.document), stats=stats).match_value()
+        self.assertEqual(stats.consumed, len(self.document))
+
+    def test_samples(self):
+        seen = []
+        stats = ParseStats(sample=lambda stats: seen.append(stats.tokens), sample_every=10)
+        Tokenizer('[' + ', '.join(['1'] * 20) + ']', engine='regex', stats=stats).match_value()
+        self.assertEqual(seen, [10, 20, 30, 40])
+        self.assertEqual(stats.as_dict()['counts']['NUMBER'], 20)
+
+    def test_disabled_stats_leave_the_stream_alone(self):
+        t = Tokenizer('[1]', engine='regex')
+        self.assertIs(t.stats, None)
+        self.assertIsInstance(t.token_stream, chain)
+
+    def test_profile_parse(self):
+        report = io.StringIO()
+        with profile_parse(stream=report, limit=5):
+            Tokenizer(self.document, engine='regex').match_value()
+        self.assertIn('match_value', report.getvalue())
+        self.assertIn('Peak traced memory', report.getvalue())
+
+
+class TestParseLazy(unittest.TestCase):
+
+    document = '{"id": 7, "user": {"name": "a\\u00e9", "tags": ["x", 2.5]}, "ok": true, "none": null}'
+    expected = {'id': 7, 'user': {'name': 'aé', 'tags': ['x', 2.5]}, 'ok': True, 'none': None}
+
+    def test_proxies(self):
+        for source in (self.document, self.document.encode(), memoryview(self.document.encode())):
+            d = parse_lazy(source)
+            self.assertIsInstance(d, LazyObject)
+            self.assertEqual(d['id'], 7)
+            self.assertEqual(d.get('missing', 'default'), 'default')
+            self.assertEqual(len(d), 4)
+            self.assertEqual(list(d.keys()), ['id', 'user', 'ok', 'none'])
+            self.assertIsInstance(d['user']['tags'], LazyArray)
+            self.assertEqual(d['user']['tags'][-1], 2.5)
+            self.assertEqual(list(d['user']['tags']), ['x', 2.5])
+            self.assertEqual(d['user']['tags'][:1], ['x'])
+            self.assertEqual(d, self.expected)
+            self.assertEqual(parse_lazy(' 12 '), 12)
+
+    def test_children_are_cached(self):
+        d = parse_lazy(self.document)
+        self.assertIs(d['user'], d['user'])
+        self.assertIs(d['user']['tags'], d['user']['tags'])
+
+    def test_keeps_mmap_sources(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(self.document.encode())
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                d = parse_lazy(m)
+                self.assertEqual(m.tell(), 0)
+                self.assertEqual(d.materialize(), self.expected)
+                self.assertEqual(parse_lazy(m).materialize(), self.expected)
+
+    def test_materialize(self):
+        d = parse_lazy(self.document)
+        self.assertEqual(d.materialize(), self.expected)
+        self.assertIs(type(d['user'].materialize()), dict)
+        self.assertEqual(d['user']['tags'].materialize(), ['x', 2.5])
+
+    def test_only_read_members_are_checked(self):
+        d = parse_lazy('{"good": [1], "bad": [1 2], "worse": tru}')
+        self.assertEqual(d['good'], [1])
+        with self.assertRaises(RuntimeError):
+            list(d['bad'])
+        with self.assertRaises(RuntimeError):
+            d['worse']
+
+    def test_rejects_broken_structure(self):
+        for document in ('', '[1, 2', '{"a": 1]', '[] 1', '"abc', '"ab\\"', '{"a" 1}'):
+            with self.assertRaises(RuntimeError, msg=document):
+                d = parse_lazy(document)
+                dict(d)
+
+    @unittest.skipIf(json_tokenizer.numpy is None, "NumPy is not installed")
+    def test_numpy_index_matches_scan(self):
+        document = '[' + ', '.join([self.document, '"\\""', '[[], {}]'] * 50) + ']'
+        with mock.patch.object(json_tokenizer, 'LAZY_NUMPY_THRESHOLD', 0):
+            indexed = parse_lazy(document)
+            self.assertEqual(indexed[0]['user']['name'], 'aé')
+            self.assertEqual(indexed, parse_lazy(document).materialize())
+
+
+class TestIncrementalEdits(unittest.TestCase):
+
+    document = '{"name": "config", "items": [' + ', '.join(
+        f'{{"id": {i}, "tags": ["a", "b\\n"], "on": true}}' for i in range(200)) + '], "n": null}'
+
+    def assertSameTape(self, tape, source):
+        fresh = TokenTape(source)
+        self.assertEqual(tape.source, source)
+        self.assertEqual((tape.types, tape.starts, tape.lengths), (fresh.types, fresh.starts, fresh.lengths))
+
+    def test_tape_edits_match_a_fresh_scan(self):
+        edits = [
+            (10, 0, 'x'), # inside a string
+            (9, 0, '"'), # opens a string that runs on
+            (9, 1, ''), # and closes it again
+            (len('{"name": "config", "items": [{"id": 0'), 0, '12'), # extends a number
+            (0, 1, '['),
+            (len(self.document) - 1, 1, ''),
+        ]
+        for binary in (False, True):
+            source = self.document.encode() if binary else self.document
+            tape = TokenTape(source)
+            for offset, deleted, inserted in edits:
+                if binary:
+                    inserted = inserted.encode()
+                source = source[:offset] + inserted + source[offset + deleted:]
+                tape.edit(offset, deleted, inserted)
+                self.assertSameTape(tape, source)
+
+    def test_only_nearby_tokens_are_rescanned(self):
+        tape = TokenTape(self.document)
+        offset = self.document.index('"id": 150') + 6
+        first, old_stop, new_stop = tape.edit(offset, 3, '7')
+        self.assertLess(old_stop - first, 10)
+        self.assertEqual(new_stop - first, old_stop - first)
+        with self.assertRaises(ValueError):
+            tape.edit(len(self.document), 1, '')
+
+    def test_document_follows_edits(self):
+        for numpy in (json_tokenizer.numpy, None):
+            with mock.patch.object(json_tokenizer, 'numpy', numpy):
+                d = IncrementalDocument(self.document)
+                offset = d.source.index('"id": 150') + 6
+                items = d.value['items']
+                self.assertEqual(d.edit(offset, 3, '7')['items'][150]['id'], 7)
+                self.assertIs(d.value['items'], items) # only the record was rebuilt
+                offset = d.source.index('"b\\n"', offset)
+                d.edit(offset, 0, '"x", ')
+                self.assertEqual(d.value['items'][150]['tags'], ['a', 'x', 'b\n'])
+                self.assertEqual(d.edit(0, len(d.source), '[1, {"a": 2}]'), [1, {'a': 2}])
+
+    def test_members_are_spliced_in_place(self):
+        for numpy in (json_tokenizer.numpy, None):
+            with mock.patch.object(json_tokenizer, 'numpy', numpy):
+                d = IncrementalDocument(self.document)
+                value, items = d.value, d.value['items']
+                first, last = items[0], items[-1]
+                offset = d.source.index('{"id": 100')
+                d.edit(offset, 0, '7, ')
+                d.edit(offset, 0, '{"id": -1}, ')
+                self.assertIs(d.value, value)
+                self.assertIs(d.value['items'], items)
+                self.assertIs(items[0], first)
+                self.assertIs(items[-1], last)
+                self.assertEqual(items[100:103], [{'id': -1}, 7, {'id': 100, 'tags': ['a', 'b\n'], 'on': True}])
+                d.edit(d.source.index('"items"'), 0, '"before": [], ')
+                d.edit(len(d.source) - 1, 0, ', "after": {}')
+                d.edit(d.source.index('"n"'), 3, '"m"')
+                self.assertEqual(list(d.value), ['name', 'before', 'items', 'm', 'after'])
+                self.assertIs(d.value['items'], items)
+                self.assertEqual(d.value, Tokenizer(d.source).match_value())
+
+    def test_edits_with_repeated_keys(self):
+        d = IncrementalDocument('{"a": [1, 2], "b": 0, "a": [3]}')
+        self.assertEqual(d.edit(7, 1, '5'), {'a': [3], 'b': 0})
+        self.assertEqual(d.edit(14, 3, '"a"'), {'a': [3]})
+        self.assertEqual(d.edit(14, 3, '"c"'), {'a': [3], 'c': 0})
+        self.assertEqual(d.edit(len(d.source) - 1, 0, ', "c": 4'), {'a': [3], 'c': 4})
+
+    def test_invalid_edits(self):
+        d = IncrementalDocument('{"a": [1, 2], "b": 3}')
+        with self.assertRaises(RuntimeError):
+            d.edit(8, 0, ',')
+        self.assertIsNone(d.value)
+        self.assertEqual(d.edit(8, 1, ''), {'a': [1, 2], 'b': 3})
+
+
+class TestPushParser(unittest.TestCase):
+
+    document = '{"a": [1, -2.5e3, "x\\u00e9\\ud83d\\ude00y"], "b": {"c": null, "d": [true, false, {}]}, "": []}'
+
+    def feed_all(self, parser, chunks):
+        results = []
+        for chunk in chunks:
+            results += parser.feed(chunk)
+        return results + parser.close()
+
+    def test_any_split_matches_match_value(self):
+        expected = Tokenizer(self.document).match_value()
+        for data in (self.document, self.document.encode()):
+            for size in (1, 2, 3, 7, len(data)):
+                chunks = [data[i:i + size] for i in range(0, len(data), size)]
+                self.assertEqual(self.feed_all(PushParser(), chunks), [expected], msg=size)
+
+    def test_multibyte_characters_split_across_chunks(self):
+        data = '["é☃😀", {"ключ": 1}]'.encode()
+        chunks = [data[i:i + 1] for i in range(len(data))]
+        self.assertEqual(self.feed_all(PushParser(), chunks), [['é☃😀', {'ключ': 1}]])
+
+    def test_values_are_returned_when_complete(self):
+        p = PushParser()
+        self.assertEqual(p.feed('{"a": [1, 2'), [])
+        self.assertEqual(p.feed(']} 12'), [{'a': [1, 2]}])
+        self.assertEqual(p.feed('3 "s'), [123])
+        self.assertEqual(p.feed('"[]'), ['s', []])
+        self.assertEqual(p.close(), [])
+
+    def test_events(self):
+        p = PushParser(events=True)
+        chunks = [self.document[i:i + 5] for i in range(0, len(self.document), 5)]
+        self.assertEqual(self.feed_all(p, chunks), list(Tokenizer(self.document, engine='regex').events()))
+
+    def test_options(self):
+        keys = KeyTable()
+        p = PushParser(use_decimal=True, keys=keys, intern_values=4)
+        self.assertEqual(self.feed_all(p, ['[{"k": 1.5, "v": "ab"}, {"k": 2, "v": "ab"}]']),
+                         [[{'k': Decimal('1.5'), 'v': 'ab'}, {'k': 2, 'v': 'ab'}]])
+        self.assertIn('k', keys.strings)
+        self.assertIn('ab', keys.strings)
+
+    def test_rejects_malformed_input(self):
+        for document in ('[1,', '{"a": 1', '"abc', '[1 2]', '{"a" 1}', '[1,]', '01'):
+            with self.assertRaises(RuntimeError, msg=document):
+                self.feed_all(PushParser(), [document])
+
+    def test_feed_after_close(self):
+        p = PushParser()
+        p.close()
+        with self.assertRaises(ValueError):
+            p.feed('1')
+
+
+class TestSkipAndSelect(unittest.TestCase):
+
+    document = ('{"meta": {"id": 7, "tags": ["]", "}"]}, '
+                '"items": [{"sku": "a", "n": 1}, {"n": 2}, {"sku": "b\\"]"}], "ok": true}')
+
+    def test_reading_from_tokens(self):
+        t = Tokenizer(self.document, engine='regex')
+        t.match(TokenType.BEGIN_OBJECT)
+        self.assertEqual(t.read_key(t.get()), 'meta')
+        t.skip(t.get())
+        t.match(TokenType.VALUE_SEPARATOR)
+        self.assertEqual(t.read_key(t.get()), 'items')
+        t.match(TokenType.BEGIN_ARRAY)
+        t.match(TokenType.BEGIN_OBJECT)
+        self.assertEqual(t.read_key(t.get()), 'sku')
+        readers = t.scalar_readers()
+        token = t.get()
+        self.assertEqual(readers[token[0]](token), 'a')
+        t.match(TokenType.VALUE_SEPARATOR)
+        self.assertEqual(t.read_key(t.get()), 'n')
+        token = t.get()
+        t.push_back(token)
+        with self.assertRaises(ValueError):
+            t.push_back(token)
+        self.assertEqual(t.match_number(), 1)
+        with self.assertRaises(RuntimeError):
+            t.read_key(t.get())
+
+    def test_skip_value(self):
+        t = Tokenizer('[[1, "[", {"a": []}], "s\\"", 3] 4', engine='regex')
+        t.match(TokenType.BEGIN_ARRAY)
+        t.skip_value()
+        t.match(TokenType.VALUE_SEPARATOR)
+        t.skip_value()
+        t.match(TokenType.VALUE_SEPARATOR)
+        t.skip_value()
+        t.match(TokenType.END_ARRAY)
+        self.assertEqual(t.match_number(), 4)
+
+    def test_skip_value_needs_the_whole_value(self):
+        with self.assertRaises(RuntimeError):
+            Tokenizer('[1, [2]', engine='regex').skip_value()
+        for document in ('[' * 100 + '1' + ']' * 99, '[' * 100 + '"]]]' + ']' * 100):
+            with mock.patch.object(json_tokenizer._RegexScanner, 'batch_size', 4):
+                with self.assertRaises(RuntimeError):
+                    Tokenizer(document, engine='regex').skip_value()
+
+    def test_skip_value_makes_no_tokens_for_raw_input(self):
+        document = '[' + ', '.join(['{"a": [1, "]}", {"b": null}]}'] * 1000) + '] 4'
+        feed = json_tokenizer._RegexScanner.feed
+        made = []
+
+        def counting_feed(scanner, text, final=False):
+            for batch in feed(scanner, text, final):
+                made.append(len(batch))
+                yield batch
+
+        with mock.patch.object(json_tokenizer._RegexScanner, 'feed', counting_feed), \
+                mock.patch.object(json_tokenizer._RegexScanner, 'batch_size', 16):
+            for source in (document, document.encode(), io.StringIO(document)):
+                del made[:]
+                t = Tokenizer(source, engine='regex')
+                t.skip_value()
+                self.assertEqual(t.match_number(), 4)
+                self.assertLess(sum(made), 100)
+
+    def test_select(self):
+        t = Tokenizer(self.document, engine='regex')
+        self.assertEqual(list(t.select(['$.meta.id', '$.items[*].sku', "$['ok']"])), [
+            ('$.meta.id', 7),
+            ('$.items[*].sku', 'a'),
+            ('$.items[*].sku', 'b"]'),
+            ("$['ok']", True),
+        ])
+
+    def test_select_indexes_and_wildcards(self):
+        t = Tokenizer(self.document, spans=True)
+        self.assertEqual(list(t.select(['$.items[1]', '$.meta.*'])), [
+            ('$.meta.*', 7),
+            ('$.meta.*', [']', '}']),
+            ('$.items[1]', {'n': 2}),
+        ])
+
+    def test_select_inside_a_selected_value(self):
+        t = Tokenizer(self.document, engine='regex')
+        self.assertEqual(list(t.select(['$.meta', '$.meta.tags[0]'])), [
+            ('$.meta', {'id': 7, 'tags': [']', '}']}),
+            ('$.meta.tags[0]', ']'),
+        ])
+
+    def test_rejects_invalid_paths(self):
+        for path in ('meta', '$.', '$[x]'):
+            with self.assertRaises(ValueError):
+                list(Tokenizer('{}').select([path]))
+
+
+class TestStreamInput(unittest.TestCase):
+
+    document = '{"price": 12.50, "note": "a \\"quoted\\" word", "ok": true, "n": null}'
+
+    def test_accepts_str(self):
+        t = Tokenizer('[1]')
+        self.assertEqual(t.get(), (TokenType.BEGIN_ARRAY, '['))
+        self.assertEqual(t.get(), (TokenType.NUMBER, '1'))
+
+    def test_accepts_text_streams(self):
+        expected = list(Tokenizer(self.document).token_stream)
+        for engine in Tokenizer.engines:
+            t = Tokenizer(io.StringIO(self.document), engine=engine)
+            self.assertEqual(list(t.token_stream), expected)
+
+    def test_tokens_split_across_chunks(self):
+        expected = list(Tokenizer(self.document).token_stream)
+        for engine in Tokenizer.engines:
+            for chunk_size in range(1, 9):
+                t = Tokenizer(io.StringIO(self.document), engine=engine, chunk_size=chunk_size)
+                self.assertEqual(list(t.token_stream), expected, (engine, chunk_size))
+
+    def test_number_split_between_reads(self):
+        t = Tokenizer(io.StringIO('[12345]'), engine='regex', chunk_size=3)
+        self.assertEqual(t.get(), (TokenType.BEGIN_ARRAY, '['))
+        self.assertEqual(t.get(), (TokenType.NUMBER, '12345'))
+
+    def test_escape_split_between_reads(self):
+        t = Tokenizer(io.StringIO('"a\\nb"'), engine='regex', chunk_size=3)
+        self.assertEqual(t.get(), (TokenType.BEGIN_STRING, '"'))
+        self.assertEqual(t.get(), (TokenType.STRING_CHAR, 'a'))
+        self.assertEqual(t.get(), (TokenType.STRING_CHAR, '\\n'))
+        self.assertEqual(t.get(), (TokenType.STRING_CHAR, 'b'))
+        self.assertEqual(t.get(), (TokenType.END_STRING, '"'))
+
+
+class TestBinaryInput(unittest.TestCase):
+
+    document = '{"name": "caf\u00e9 \u20ac", "n": -1.5, "ok": [true, null]}'.encode()
+
+    def test_scans_structure_without_decoding(self):
+        t = Tokenizer(self.document, engine='regex')
+        self.assertEqual(t.get(), (TokenType.BEGIN_OBJECT, '{'))
+        self.assertEqual(t.get(), (TokenType.BEGIN_STRING, '"'))
+        self.assertEqual(t.get(), (TokenType.STRING_CHAR, b'name'))
+        self.assertEqual(t.get(), (TokenType.END_STRING, '"'))
+        self.assertEqual(t.get(), (TokenType.NAME_SEPARATOR, ':'))
+        self.assertEqual(t.get(), (TokenType.BEGIN_STRING, '"'))
+        self.assertEqual(t.get(), (TokenType.STRING_CHAR, 'caf\u00e9 \u20ac'.encode()))
+
+    def test_match_string_decodes(self):
+        t = Tokenizer('"caf\u00e9 \u20ac"'.encode(), engine='regex')
+        self.assertEqual(t.match_string(), 'caf\u00e9 \u20ac')
+
+    def test_accepts_buffer_types(self):
+        expected = list(Tokenizer(self.document, engine='regex').token_stream)
+        for inputs in (bytearray(self.document), memoryview(self.document), io.BytesIO(self.document)):
+            self.assertEqual(list(Tokenizer(inputs, engine='regex').token_stream), expected)
+
+    def test_accepts_mmap(self):
+        expected = list(Tokenizer(self.document, engine='regex').token_stream)
+        with tempfile.TemporaryFile() as f:
+            f.write(self.document)
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                self.assertEqual(list(Tokenizer(m, engine='regex').token_stream), expected)
+
+    def test_multibyte_characters_split_across_chunks(self):
+        t = Tokenizer(io.BytesIO('"\u20ac\u20ac"'.encode()), engine='regex', chunk_size=2)
+        self.assertEqual(t.match_string(), '\u20ac\u20ac')
+
+    def test_skips_byte_order_mark(self):
+        document = b'\xef\xbb\xbf[1]'
+        for chunk_size in (1, 2, 64):
+            t = Tokenizer(io.BytesIO(document), engine='regex', chunk_size=chunk_size)
+            self.assertEqual(t.get(), (TokenType.BEGIN_ARRAY, '['))
+            self.assertEqual(t.get(), (TokenType.NUMBER, '1'))
+
+    def test_char_engine_decodes(self):
+        t = Tokenizer(b'\xef\xbb\xbf["\xc3\xa9"]')
+        self.assertEqual(t.get(), (TokenType.BEGIN_ARRAY, '['))
+        self.assertEqual(t.get(), (TokenType.BEGIN_STRING, '"'))
+        self.assertEqual(t.get(), (TokenType.STRING_CHAR, '\u00e9'))
+
+
+class TestTokenTape(unittest.TestCase):
+
+    def test_iterates_tokens(self):
+        tape = TokenTape('{"Name": "John", "Age": [50, true]}')
+        self.assertEqual(list(tape), [
+            (TokenType.BEGIN_OBJECT, '{'),
+            (TokenType.BEGIN_STRING, '"'),
+            (TokenType.STRING_CHAR, 'Name'),
+            (TokenType.END_STRING, '"'),
+            (TokenType.NAME_SEPARATOR, ':'),
+            (TokenType.BEGIN_STRING, '"'),
+            (TokenType.STRING_CHAR, 'John'),
+            (TokenType.END_STRING, '"'),
+            (TokenType.VALUE_SEPARATOR, ','),
+            (TokenType.BEGIN_STRING, '"'),
+            (TokenType.STRING_CHAR, 'Age'),
+            (TokenType.END_STRING, '"'),
+            (TokenType.NAME_SEPARATOR, ':'),
+            (TokenType.BEGIN_ARRAY, '['),
+            (TokenType.NUMBER, '50'),
+            (TokenType.VALUE_SEPARATOR, ','),
+            (TokenType.TRUE, 'true'),
+            (TokenType.END_ARRAY, ']'),
+            (TokenType.END_OBJECT, '}'),
+            (TokenType.END, ''),
+        ])
+
+    def test_records_escapes_separately(self):
+        tape = TokenTape('"a\\nb\\x"')
+        self.assertEqual(list(tape), [
+            (TokenType.BEGIN_STRING, '"'),
+            (TokenType.STRING_CHAR, 'a'),
+            (TokenType.STRING_CHAR, '\\n'),
+            (TokenType.STRING_CHAR, 'b'),
+            (TokenType.ERROR, '\\x'),
+            (TokenType.END_STRING, '"'),
+            (TokenType.END, ''),
+        ])
+
+    def test_indexing_and_spans(self):
+        tape = TokenTape('[1, "ab"]')
+        self.assertEqual(len(tape), 8)
+        self.assertEqual(tape[1], (TokenType.NUMBER, '1'))
+        self.assertEqual(tape[-2], (TokenType.END_ARRAY, ']'))
+        self.assertEqual(tape.type(4), TokenType.STRING_CHAR)
+        self.assertEqual(tape.span(4), (5, 7))
+        self.assertEqual(tape.text(4), 'ab')
+
+    def test_keeps_mmap_sources(self):
+        with tempfile.TemporaryFile() as f:
+            f.write(b'[1, "ab"]')
+            f.flush()
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as m:
+                tape = TokenTape(m)
+                self.assertIs(tape.source, m)
+                self.assertEqual(m.tell(), 0)
+                self.assertEqual(list(TokenTape(m)), list(tape))
+                self.assertEqual(tape.text(4), b'ab')
+
+    def test_slicing(self):
+        tape = TokenTape('[1, 2, 3]')
+        self.assertEqual(list(tape[1:6:2]), [
+            (TokenType.NUMBER, '1'),
+            (TokenType.NUMBER, '2'),
+            (TokenType.NUMBER, '3'),
+        ])
+
+    def test_binary_source(self):
+        tape = TokenTape(b'\xef\xbb\xbf["\xc3\xa9", 2]')
+        self.assertEqual(tape[2], (TokenType.STRING_CHAR, b'\xc3\xa9'))
+        self.assertEqual(tape[5], (TokenType.NUMBER, '2'))
+
+    def test_tokenizer_walks_tape(self):
+        tape = TokenTape('{"a": ["b", "c"]}')
+        for _ in range(2):
+            self.assertEqual(Tokenizer(tape).match_object(), {'a': ['b', 'c']})
+
+    def test_stores_a_few_bytes_per_token(self):
+        tape = TokenTape('[1]')
+        itemsize = tape.types.itemsize + tape.starts.itemsize + tape.lengths.itemsize
+        self.assertLessEqual(itemsize, 9)
+
+
+class TestStructuralIndex(unittest.TestCase):
+
+    document = '{"a": [1, "x\\"]", true], "b\\\\": -2.5e3} 7'
+    offsets = [0, 1, 3, 4, 6, 7, 8, 10, 15, 16, 18, 22, 23, 25, 29, 30, 32, 38, 40]
+
+    samples = [
+        document,
+        '{"k": "caf\u00e9 \\u00e9", "n": [0, -1.5E+2, null, false]}\n',
+        '[01, 1., "open',
+        'tr ue \\"x" \f 1',
+        '',
+    ]
+
+    def test_offsets(self):
+        self.assertEqual(list(structural_index(self.document)), self.offsets)
+        self.assertEqual(list(structural_index(b'\xef\xbb\xbf' + self.document.encode())),
+                         [offset + 3 for offset in self.offsets])
+
+    def test_offsets_without_numpy(self):
+        with mock.patch.object(json_tokenizer, 'numpy', None):
+            self.assertEqual(list(structural_index(self.document)), self.offsets)
+            self.assertEqual(list(TokenTape(self.document, indexed=True)), list(TokenTape(self.document)))
+
+    @unittest.skipUnless(json_tokenizer.numpy, "NumPy is not installed")
+    def test_numpy_matches_pattern(self):
+        for sample in self.samples:
+            for source in (sample, sample.encode()):
+                expected = list(structural_index(source))
+                with mock.patch.object(json_tokenizer, 'numpy', None):
+                    self.assertEqual(list(structural_index(source)), expected, source)
+
+    @unittest.skipUnless(json_tokenizer.numpy, "NumPy is not installed")
+    def test_numpy_across_blocks(self):
+        document = '[' + ', '.join(['"a\\\\\\"b"', '12.5', 'true', '{"c": null}'] * 20) + ']'
+        expected = list(structural_index(document))
+        with mock.patch.object(json_tokenizer, 'INDEX_BLOCK_SIZE', 3):
+            self.assertEqual(list(structural_index(document)), expected)
+            self.assertEqual(list(TokenTape(document, indexed=True)), list(TokenTape(document)))
+
+    def test_indexed_tape_matches_scanned_tape(self):
+        for sample in self.samples:
+            for source in (sample, sample.encode()):
+                self.assertEqual(list(TokenTape(source, indexed=True)), list(TokenTape(source)), source)
+
+
+class TestSpans(unittest.TestCase):
+
+    def test_records_offsets(self):
+        t = Tokenizer('[10, "ab"]', spans=True)
+        tokens = [(token.type, token.start, token.end) for token in t.token_stream]
+        self.assertEqual(tokens, [
+            (TokenType.BEGIN_ARRAY, 0, 1),
+            (TokenType.NUMBER, 1, 3),
+            (TokenType.VALUE_SEPARATOR, 3, 4),
+            (TokenType.BEGIN_STRING, 5, 6),
+            (TokenType.STRING_CHAR, 6, 8),
+            (TokenType.END_STRING, 8, 9),
+            (TokenType.END_ARRAY, 9, 10),
+            (TokenType.END, 10, 10),
+        ])
+
+    def test_slices_text_on_demand(self):
+        t = Tokenizer('{"key": -1.5}', spans=True)
+        t.get()
+        t.get()
+        self.assertEqual(t.get().text, 'key')
+        t.get()
+        t.get()
+        self.assertEqual(t.get().text, '-1.5')
+
+    def test_records_line_and_column(self):
+        t = Tokenizer('{\n  "a": [\n    1]}', spans=True)
+        positions = [(token.type, token.line, token.column) for token in t.token_stream]
+        self.assertIn((TokenType.BEGIN_STRING, 2, 3), positions)
+        self.assertIn((TokenType.NUMBER, 3, 5), positions)
+
+    def test_positions_across_chunks(self):
+        document = '[\n"abc",\n12345,\ntrue]'
+        for chunk_size in range(1, 8):
+            t = Tokenizer(io.StringIO(document), spans=True, chunk_size=chunk_size)
+            for token in t.token_stream:
+                if token.type in (TokenType.NUMBER, TokenType.TRUE):
+                    self.assertEqual(token.text, document[token.start:token.end])
+                    self.assertEqual(token.column, 1)
+                    self.assertEqual(token.line, 3 if token.type == TokenType.NUMBER else 4)
+
+    def test_stands_in_for_tuples(self):
+        t = Tokenizer('{"a": ["b", "c\\n"]}', spans=True)
+        self.assertTrue(t.seeing(TokenType.BEGIN_OBJECT))
+        self.assertTrue(t.seeing('{'))
+        self.assertEqual(t.match_object(), {'a': ['b', 'c\n']})
+
+    def test_binary_input(self):
+        t = Tokenizer(b'["\xc3\xa9", 7]', spans=True)
+        tokens = list(t.token_stream)
+        self.assertEqual(tokens[2].text, b'\xc3\xa9')
+        self.assertEqual(tokens[5][1], '7')
+
+
+class TestNumericArrays(unittest.TestCase):
+
+    document = ('{"line": [[1.5, 2], [3, -4e2]], "ids": [1, 2, 3], "big": [1, 123456789012345678901],'
+                ' "mixed": [1, "2"], "empty": [], "mixed_big": [-8682871501786955742539860, 0.98]}')
+
+    def test_arrays_of_numbers(self):
+        for numpy in (json_tokenizer.numpy, None):
+            with mock.patch.object(json_tokenizer, 'numpy', numpy):
+                for document in (self.document, self.document.encode()):
+                    value = Tokenizer(document, engine='regex', numeric_arrays='array').match_value()
+                    self.assertEqual(value['line'], [array('d', [1.5, 2.0]), array('d', [3.0, -400.0])])
+                    self.assertEqual(value['ids'], array('q', [1, 2, 3]))
+                    self.assertEqual(value['big'], [1, 123456789012345678901])
+                    self.assertEqual(value['mixed_big'], [-8682871501786955742539860, 0.98])
+                    self.assertEqual(value['mixed'], [1, '2'])
+                    self.assertEqual(value['empty'], [])
+
+    def test_long_arrays(self):
+        numbers = list(range(-500, 500))
+        for numpy in (json_tokenizer.numpy, None):
+            with mock.patch.object(json_tokenizer, 'numpy', numpy):
+                t = Tokenizer(str(numbers), engine='regex', numeric_arrays='array')
+                self.assertEqual(t.match_array(), array('q', numbers))
+                t = Tokenizer(str([n / 4 for n in numbers]), engine='regex', numeric_arrays='array')
+                self.assertEqual(t.match_array(), array('d', [n / 4 for n in numbers]))
+
+    @unittest.skipIf(json_tokenizer.numpy is None, "NumPy is not installed")
+    def test_numpy(self):
+        value = Tokenizer(self.document, engine='regex', numeric_arrays='numpy').match_value()
+        self.assertEqual(value['line'][1].tolist(), [3.0, -400.0])
+        self.assertEqual(value['ids'].dtype, json_tokenizer.numpy.int64)
+
+    def test_use_decimal(self):
+        t = Tokenizer('[1, 2.50]', engine='regex', numeric_arrays='array', use_decimal=True)
+        self.assertEqual(t.match_value(), [1, Decimal('2.50')])
+
+    def test_arrays_cut_by_chunks(self):
+        for chunk_size in range(1, 20):
+            t = Tokenizer(io.StringIO(self.document), engine='regex', numeric_arrays='array', chunk_size=chunk_size)
+            value = t.match_value()
+            self.assertEqual([list(numbers) for numbers in value['line']], [[1.5, 2], [3, -400]])
+            self.assertEqual(list(value['ids']), [1, 2, 3])
+
+    def test_events_skip_and_select(self):
+        options = {'engine': 'regex', 'numeric_arrays': 'array'}
+        self.assertEqual(list(Tokenizer(self.document, **options).events()),
+                         list(Tokenizer(self.document, engine='regex').events()))
+        self.assertEqual(list(Tokenizer(self.document, **options).select(['$.line[1][0]', '$.ids'])),
+                         [('$.line[1][0]', 3.0), ('$.ids', array('q', [1, 2, 3]))])
+        t = Tokenizer('[[1, 2], 3] 4', **options)
+        t.skip_value()
+        self.assertEqual(t.match_number(), 4)
+
+    def test_invalid_arrays_are_not_numbers(self):
+        for document in ('[1,]', '[1 2]', '[01]', '[1.]', '[-]', '[1e]'):
+            with self.assertRaises(RuntimeError, msg=document):
+                Tokenizer(document, engine='regex', numeric_arrays='array').match_value()
+
+    def test_options(self):
+        with self.assertRaises(ValueError):
+            Tokenizer('[1]', numeric_arrays='array')
+        with self.assertRaises(ValueError):
+            Tokenizer('[1]', engine='regex', numeric_arrays='list')
+        with mock.patch.object(json_tokenizer, 'numpy', None):
+            with self.assertRaises(ValueError):
+                Tokenizer('[1]', engine='regex', numeric_arrays='numpy')
 
 
 if __name__ == "__main__":
@@ -0,0 +1,289 @@
+"""Writes Python values and parse events out as JSON, incrementally."""
+
+from collections.abc import Mapping
+from decimal import Decimal
+import io
+import math
+import numbers
+import re
+
+from json_tokenizer import number_pattern
+
+try:
+    import numpy
+except ImportError: # NumPy is optional; encode_scalar only needs it for NumPy bools
+    numpy = None
+
+DEFAULT_BUFFER_SIZE = 1 << 16
+
+# The characters a JSON string cannot hold as they are.  Surrogates are
+# escaped too, as they cannot be encoded in UTF-8.
+escape_pattern = re.compile(r'[\x00-\x1f"\\\ud800-\udfff]')
+_escapes = {
+    '"': '\\"', '\\': '\\\\', '\b': '\\b', '\f': '\\f', '\n': '\\n', '\r': '\\r', '\t': '\\t',
+}
+_END = object()
+
+
+def encode_string(text) -> str:
+    """Returns text as a JSON string, quotes included.
+
+    Only quotes, backslashes, control characters and lone surrogates are
+    escaped; a string with none of them is quoted as it is.
+    """
+    if escape_pattern.search(text) is None:
+        return '"' + text + '"'
+    return '"' + escape_pattern.sub(_escape, text) + '"'
+
+
+def _escape(m):
+    char = m.group()
+    return _escapes.get(char) or f'\\u{ord(char):04x}'
+
+
+def encode_scalar(value) -> str:
+    """Returns the JSON text of a string, number, bool or None.
+
+    Numbers are ints, floats, Decimals or other numbers.Integral types,
+    and bools may be NumPy bools.  Raises ValueError for anything else,
+    and for numbers JSON cannot hold, such as NaN and infinities.
+    """
+    cls = value.__class__
+    if cls is str:
+        return encode_string(value)
+    if value is None:
+        return 'null'
+    if value is True:
+        return 'true'
+    if value is False:
+        return 'false'
+    if isinstance(value, int):
+        return int.__repr__(value)
+    if isinstance(value, float):
+        if not math.isfinite(value):
+            raise ValueError(f"{value!r} cannot be written as JSON")
+        return float.__repr__(value)
+    if isinstance(value, Decimal):
+        text = str(value)
+        if not number_pattern.match(text):
+            raise ValueError(f"{value!r} cannot be written as JSON")
+        return text
+    if isinstance(value, str):
+        return encode_string(value)
+    if isinstance(value, numbers.Integral): # such as NumPy ints
+        return int.__repr__(int(value))
+    if numpy is not None and isinstance(value, numpy.bool_):
+        return 'true' if value else 'false'
+    raise ValueError(f"Object of type {cls.__name__} cannot be written as JSON")
+
+
+class JsonWriter:
+    """Writes JSON values to sink, a text or binary file, as they are given.
+
+    Output goes through a buffer of about buffer_size characters, which is
+    written out whenever it fills, so the memory used stays bounded
+    however much is written.  Binary sinks get UTF-8; unless binary is
+    given, any sink that is not an io.TextIOBase is taken to be binary.
+
+    Without indent the output is compact, with no spaces.  With indent, a
+    number of spaces or a string, every member and element goes on its
+    own line indented by one more level, as json.dumps lays it out.
+    Successive top-level values are written on separate lines.
+
+    Objects may be any Mapping with str keys, and arrays a list, tuple or
+    any other iterable, so a generator can be written out as a long array
+    without being held in memory.  The output is read back by Tokenizer as
+    the same values.
+    """
+
+    def __init__(self, sink, indent=None, binary=None, buffer_size=DEFAULT_BUFFER_SIZE):
+        self.sink = sink
+        self.binary = not isinstance(sink, io.TextIOBase) if binary is None else binary
+        self.buffer_size = buffer_size
+        self.buffer = []
+        self.indent = ' ' * indent if isinstance(indent, int) else indent
+        self.colon = ':' if indent is None else ': '
+        self.newlines = ['\n'] # a newline and the indent, by depth
+        self.written = 0 # top-level values written
+        self.stack = [] # [is_object, members] of each container open in write_events
+        self.after_key = False
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.flush()
+
+    def write(self, value):
+        """Writes value out as the next top-level value."""
+        buffer = self.buffer
+        append = buffer.append
+        colon = self.colon
+        if self.stack:
+            raise ValueError("write called inside a value begun by write_events")
+        if self.written:
+            append('\n')
+        self.written += 1
+        stack = [] # the iterator and kind of each open container
+        depth = 0
+        while True:
+            cls = value.__class__
+            if cls is dict or cls is list or cls is tuple or not (
+                    cls is str or cls is int or cls is float or value is None or value is True
+                    or value is False) and _is_container(value):
+                is_object = cls is dict or isinstance(value, Mapping)
+                items = iter(value.items() if is_object else value)
+                item = next(items, _END)
+                if item is _END:
+                    append('{}' if is_object else '[]')
+                else:
+                    append('{' if is_object else '[')
+                    depth += 1
+                    stack.append((items, is_object))
+                    if self.indent is not None:
+                        append(self._newline(depth))
+                    if is_object:
+                        key, value = item
+                        append(self._key(key))
+                        append(colon)
+                    else:
+                        value = item
+                    continue
+            else:
+                append(encode_scalar(value))
+
+            # Start the next member of the innermost container, after a
+            # comma, or close it once its iterator runs out.
+            while stack:
+                items, is_object = stack[-1]
+                item = next(items, _END)
+                if item is not _END:
+                    append(',')
+                    if self.indent is not None:
+                        append(self._newline(depth))
+                    if is_object:
+                        key, value = item
+                        append(self._key(key))
+                        append(colon)
+                    else:
+                        value = item
+                    if len(buffer) >= 4096:
+                        self._spill()
+                    break
+                stack.pop()
+                depth -= 1
+                if self.indent is not None:
+                    append(self._newline(depth))
+                append('}' if is_object else ']')
+            else:
+                break
+        self._spill()
+
+    def write_events(self, events):
+        """Writes (prefix, event, value) triples as Tokenizer.events gives them.
+
+        A value may be spread over several calls.  Raises ValueError for
+        events that do not make up JSON.
+        """
+        buffer = self.buffer
+        append = buffer.append
+        stack = self.stack
+        indented = self.indent is not None
+        for _, event, value in events:
+            if event == 'end_map' or event == 'end_array':
+                if not stack or stack[-1][0] != (event == 'end_map') or self.after_key:
+                    raise ValueError(f"Unexpected {event}")
+                members = stack.pop()[1]
+                if members and indented:
+                    append(self._newline(len(stack)))
+                append('}' if event == 'end_map' else ']')
+                if not stack:
+                    self._spill()
+                continue
+            if self.after_key:
+                if event == 'map_key':
+                    raise ValueError("Expected a value after a key")
+                self.after_key = False
+            elif stack:
+                is_object, members = stack[-1]
+                if is_object != (event == 'map_key'):
+                    raise ValueError(f"Unexpected {event} in {'an object' if is_object else 'an array'}")
+                if members:
+                    append(',')
+                if indented:
+                    append(self._newline(len(stack)))
+                stack[-1][1] += 1
+            else:
+                if event == 'map_key':
+                    raise ValueError("Unexpected map_key outside an object")
+                if self.written:
+                    append('\n')
+                self.written += 1
+            if event == 'map_key':
+                append(self._key(value))
+                append(self.colon)
+                self.after_key = True
+            elif event == 'start_map' or event == 'start_array':
+                append('{' if event == 'start_map' else '[')
+                stack.append([event == 'start_map', 0])
+            elif event in ('string', 'number', 'boolean', 'null'):
+                append(encode_scalar(value))
+            else:
+                raise ValueError(f"Unknown event {event!r}")
+            if len(buffer) >= 4096:
+                self._spill()
+
+    def flush(self):
+        """Writes out everything buffered, and flushes sink if it can be."""
+        self._spill(True)
+        if hasattr(self.sink, 'flush'):
+            self.sink.flush()
+
+    def _spill(self, everything=False):
+        """Writes the buffer out if it holds buffer_size characters or more."""
+        if not self.buffer:
+            return
+        text = ''.join(self.buffer)
+        self.buffer.clear()
+        if len(text) < self.buffer_size and not everything:
+            self.buffer.append(text)
+            return
+        self.sink.write(text.encode('utf-8') if self.binary else text)
+
+    def _newline(self, depth):
+        """Returns a newline and the indent for depth."""
+        newlines = self.newlines
+        while len(newlines) <= depth:
+            newlines.append(newlines[-1] + self.indent)
+        return newlines[depth]
+
+    @staticmethod
+    def _key(key):
+        if key.__class__ is not str and not isinstance(key, str):
+            raise ValueError(f"Object keys must be str, not {key.__class__.__name__}")
+        return encode_string(key)
+
+
+def _is_container(value):
+    """Returns whether value is written as an object or an array."""
+    return isinstance(value, Mapping) or (
+        hasattr(value, '__iter__') and not isinstance(value, (str, bytes, bytearray, memoryview)))
+
+
+def dump(value, sink, indent=None, binary=None):
+    """Writes value to sink as JSON; see JsonWriter."""
+    with JsonWriter(sink, indent, binary) as writer:
+        writer.write(value)
+
+
+def dumps(value, indent=None) -> str:
+    """Returns value as a JSON str; see JsonWriter."""
+    sink = io.StringIO()
+    dump(value, sink, indent)
+    return sink.getvalue()
+
+
+def dump_events(events, sink, indent=None, binary=None):
+    """Writes the (prefix, event, value) triples events to sink as JSON."""
+    with JsonWriter(sink, indent, binary) as writer:
+        writer.write_events(events)
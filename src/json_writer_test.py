@@ -0,0 +1,133 @@
+"""Unit tests for the streaming JSON writer."""
+
+from decimal import Decimal
+import io
+import json
+import unittest
+from json_columns import parse_columns
+from json_tokenizer import Tokenizer
+from json_writer import JsonWriter, dump, dump_events, dumps
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
+
+
+class TestDumps(unittest.TestCase):
+
+    value = {
+        "a": [1, -2.5, 1e300, True, False, None, 12345678901234567890],
+        "s": "plain",
+        "escaped": 'quote " backslash \\ tab \t nul \x00 \x1f',
+        "unicode ☃": "\U0001F600 é",
+        "empty": [{}, [], ""],
+        "nested": {"b": [[{"c": [0]}]]},
+    }
+
+    def test_matches_json_dumps(self):
+        self.assertEqual(dumps(self.value),
+                         json.dumps(self.value, ensure_ascii=False, separators=(',', ':')))
+        for indent in (2, '\t'):
+            self.assertEqual(dumps(self.value, indent),
+                             json.dumps(self.value, ensure_ascii=False, indent=indent))
+
+    def test_round_trips_through_tokenizer(self):
+        for indent in (None, 4):
+            self.assertEqual(Tokenizer(dumps(self.value, indent), engine='regex').match_value(), self.value)
+
+    def test_lone_surrogates_are_escaped(self):
+        self.assertEqual(dumps('\ud800'), '"\\ud800"')
+
+    def test_decimals_keep_their_digits(self):
+        self.assertEqual(dumps([Decimal('1.10'), Decimal('-2E+5')]), '[1.10,-2E+5]')
+
+    def test_iterables_are_arrays(self):
+        self.assertEqual(dumps({"n": (i * i for i in range(4)), "t": (1, 2)}), '{"n":[0,1,4,9],"t":[1,2]}')
+
+    def test_deep_nesting(self):
+        value = []
+        for _ in range(10000):
+            value = [value]
+        self.assertEqual(dumps(value), '[' * 10001 + ']' * 10001)
+
+    def test_numeric_arrays_round_trip(self):
+        document = '{"ids":[1,-2,3],"line":[[1.5,2.0],[3.0,-400.0]]}'
+        modes = ('array', 'numpy') if numpy is not None else ('array',)
+        for mode in modes:
+            value = Tokenizer(document, engine='regex', numeric_arrays=mode).match_value()
+            self.assertEqual(dumps(value), document, msg=mode)
+
+    @unittest.skipIf(numpy is None, "NumPy is not installed")
+    def test_numpy_numbers(self):
+        columns = parse_columns('[{"a": 1, "b": 0.5}, {"a": 2, "b": 1}]', use_numpy=True)
+        self.assertEqual(dumps(columns), '{"a":[1,2],"b":[0.5,1.0]}')
+        self.assertEqual(dumps(parse_columns('[{"a": true}, {"a": false}]', use_numpy=True)),
+                         '{"a":[true,false]}')
+        self.assertEqual(dumps([numpy.int8(-3), numpy.uint64(2 ** 64 - 1)]), f'[-3,{2 ** 64 - 1}]')
+
+    def test_rejects_what_json_cannot_hold(self):
+        for value in (float('nan'), [float('inf')], {1: 2}, {"a": b"bytes"}, object(), Decimal('NaN')):
+            with self.assertRaises(ValueError, msg=repr(value)):
+                dumps(value)
+
+
+class TestJsonWriter(unittest.TestCase):
+
+    def test_binary_sink_gets_utf8(self):
+        sink = io.BytesIO()
+        dump({"k": "☃"}, sink)
+        self.assertEqual(sink.getvalue(), '{"k":"☃"}'.encode())
+
+    def test_values_go_on_separate_lines(self):
+        sink = io.StringIO()
+        with JsonWriter(sink) as writer:
+            for i in range(3):
+                writer.write({"i": i})
+        self.assertEqual(sink.getvalue(), '{"i":0}\n{"i":1}\n{"i":2}')
+
+    def test_buffers_writes(self):
+        writes = []
+
+        class Sink:
+            def write(self, text):
+                writes.append(text)
+
+        with JsonWriter(Sink(), binary=False, buffer_size=1000) as writer:
+            writer.write([list(range(100)) for _ in range(100)])
+        text = ''.join(writes)
+        self.assertEqual(json.loads(text), [list(range(100))] * 100)
+        self.assertLess(len(writes), len(text) // 1000 + 2)
+        self.assertTrue(all(len(part) >= 1000 for part in writes[:-1]))
+
+
+class TestDumpEvents(unittest.TestCase):
+
+    document = '{"a": [1, 2.5, {"b": null}], "c": "d\\n", "e": {}, "f": [[], true]}'
+
+    def test_round_trips_events(self):
+        events = Tokenizer(self.document, engine='regex').events()
+        for indent in (None, 2):
+            sink = io.StringIO()
+            dump_events(Tokenizer(self.document, engine='regex').events(), sink, indent)
+            self.assertEqual(sink.getvalue(), dumps(json.loads(self.document), indent))
+        sink = io.StringIO()
+        with JsonWriter(sink) as writer:
+            for event in events:
+                writer.write_events([event])
+        self.assertEqual(json.loads(sink.getvalue()), json.loads(self.document))
+
+    def test_rejects_events_out_of_place(self):
+        bad = (
+            [('', 'end_array', None)],
+            [('', 'start_map', None), ('', 'number', 1)],
+            [('', 'start_array', None), ('', 'end_map', None)],
+            [('', 'start_map', None), ('', 'map_key', 'a'), ('', 'end_map', None)],
+        )
+        for events in bad:
+            with self.assertRaises(ValueError, msg=events):
+                dump_events(events, io.StringIO())
+
+
+if __name__ == "__main__":
+    unittest.main()